@@ -4,29 +4,70 @@ from flask_cors import CORS
 from dotenv import load_dotenv
 load_dotenv()
 
-from extensions import db  # <-- shared db instance
+from extensions import db, configure_sqlite  # <-- shared db instance
+from http_cache import init_compression
+from idempotency import init_idempotency
+from llm_scheduler import init_llm_scheduler
+from pricing import init_pricing
+from ratelimit import init_rate_limiting
 
 
-def create_app():
+def create_app(config=None):
+    """
+    `config` overrides any setting below or read from the environment by
+    the init_* helpers, e.g. for tests:
+
+        create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://", "RATELIMIT_ENABLED": False})
+
+    ("sqlite://" is one in-memory database shared by every session: Flask-
+    SQLAlchemy gives in-memory SQLite a single-connection StaticPool.)
+    """
+
     app = Flask(__name__)
 
-    # Configure SQLite database
+    # Configure SQLite database (DATABASE_URL overrides, e.g. in production)
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
     DB_PATH = os.path.join(BASE_DIR, "restaurant.db")
-    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{DB_PATH}"
+    app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get(
+        "DATABASE_URL", f"sqlite:///{DB_PATH}"
+    )
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-    app.config["SECRET_KEY"] = "change_me_later"
+    app.config["SECRET_KEY"] = os.environ.get("SECRET_KEY", "change_me_later")
+
+    # Applied before the init_* helpers, which only setdefault their settings
+    if config:
+        app.config.update(config)
 
     # Allow React frontend to access this backend
     CORS(app, resources={r"/api/*": {"origins": "*"}})
 
+    # gzip/brotli for large JSON responses
+    init_compression(app)
+
+    # Token buckets + concurrency caps for the assistant and heavy admin endpoints
+    init_rate_limiting(app)
+
+    # Replay stored responses for retried create_order / deposit calls
+    init_idempotency(app)
+
+    # Compiled pricing / promotion rules, cached per worker
+    init_pricing(app)
+
+    # Priority queue + in-flight cap in front of the Ollama model server
+    init_llm_scheduler(app)
+
     # Initialize SQLAlchemy with this app
     db.init_app(app)
 
-    # Import models and create tables
+    # Register models and per-connection SQLite settings. No DDL here: the
+    # schema is managed by versioned migrations (`flask --app app db upgrade`).
     with app.app_context():
         from models import User, Dish, Order, OrderItem
-        db.create_all()
+        configure_sqlite(db.engine)
+
+    # CLI commands (flask --app app wallet-snapshot, ...)
+    from commands import register_commands
+    register_commands(app)
 
     # Register route blueprints
     from routes.auth_routes import auth_bp
@@ -35,6 +76,9 @@ def create_app():
     from routes.wallet_routes import wallet_bp
     from routes.admin_routes import admin_bp
     from routes.assistant_routes import assistant_bp
+    from routes.kitchen_routes import kitchen_bp
+    from routes.delivery_routes import delivery_bp
+    from routes.pricing_routes import pricing_bp
 
     app.register_blueprint(auth_bp)
     app.register_blueprint(menu_bp)
@@ -42,11 +86,9 @@ def create_app():
     app.register_blueprint(wallet_bp)
     app.register_blueprint(admin_bp)
     app.register_blueprint(assistant_bp)
-
-
-
-
-
+    app.register_blueprint(kitchen_bp)
+    app.register_blueprint(delivery_bp)
+    app.register_blueprint(pricing_bp)
 
     # Health route
     @app.route("/api/health")
@@ -57,5 +99,12 @@ def create_app():
 
 
 if __name__ == "__main__":
+    # Development server only. For production use gunicorn (see gunicorn.conf.py):
+    #   gunicorn -c gunicorn.conf.py wsgi:app
+    import migrations
+
     app = create_app()
+    with app.app_context():
+        # Dev convenience: bring the local database up to date on start
+        migrations.upgrade(db.engine)
     app.run(host="127.0.0.1", port=5000, debug=True)
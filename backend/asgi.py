@@ -0,0 +1,16 @@
+"""
+ASGI entry point, for running under uvicorn instead of gunicorn:
+
+    uvicorn asgi:app --workers 4
+
+Flask is a WSGI app, so this wraps it with asgiref (pip install asgiref).
+Requests still run in a thread pool; prefer gunicorn unless you need an
+ASGI server. Run `flask --app app db upgrade` first, uvicorn has no
+master-process hook for it.
+"""
+
+from asgiref.wsgi import WsgiToAsgi
+
+from wsgi import app as wsgi_app
+
+app = WsgiToAsgi(wsgi_app)
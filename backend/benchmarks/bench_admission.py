@@ -0,0 +1,103 @@
+"""
+Checkout latency under mixed load, with and without admission control.
+
+Background clients hammer /api/admin/orders (full-table scan) and
+/api/assistant/chat (LLM simulated by a 2s sleep) while checkout clients
+place orders and record their latency.
+
+    python -m benchmarks.bench_admission [seconds]
+"""
+
+import http.client
+import json
+import logging
+import sys
+import threading
+import time
+
+from werkzeug.serving import make_server
+
+import routes.assistant_routes as assistant_routes
+from benchmarks.common import make_app, seed
+
+SIMULATED_LLM_SECONDS = 2.0
+
+
+def fake_llm(messages):
+    time.sleep(SIMULATED_LLM_SECONDS)
+    return {"message": {"role": "assistant", "content": "Try the noodles."}}
+
+
+def worker(port, method, path, body_fn, stop, latencies=None, statuses=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    i = 0
+    while not stop.is_set():
+        body = json.dumps(body_fn(i)) if body_fn else None
+        start = time.perf_counter()
+        conn.request(method, path, body=body, headers={"Content-Type": "application/json"})
+        resp = conn.getresponse()
+        resp.read()
+        if latencies is not None:
+            latencies.append(time.perf_counter() - start)
+        if statuses is not None:
+            statuses[resp.status] = statuses.get(resp.status, 0) + 1
+        i += 1
+
+
+def run(enabled, duration, port):
+    app = make_app()
+    app.config["RATELIMIT_ENABLED"] = enabled
+    with app.app_context():
+        seed(n_users=400, n_orders=800)
+
+    server = make_server("127.0.0.1", port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    stop = threading.Event()
+    checkout_latency = []
+    background = {}
+    threads = []
+
+    for n in range(6):
+        threads.append(threading.Thread(
+            target=worker, args=(port, "GET", "/api/admin/orders", None, stop, None, background)))
+        threads.append(threading.Thread(
+            target=worker,
+            args=(port, "POST", "/api/assistant/chat",
+                  lambda i, n=n: {"user_id": 100 + n, "message": "something spicy"},
+                  stop, None, background)))
+    for n in range(2):
+        threads.append(threading.Thread(
+            target=worker,
+            args=(port, "POST", "/api/orders/",
+                  lambda i, n=n: {"user_id": 1 + n * 50 + i % 50, "items": [{"dish_id": 1}]},
+                  stop, checkout_latency)))
+
+    for t in threads:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    server.shutdown()
+
+    checkout_latency.sort()
+    p50 = checkout_latency[len(checkout_latency) // 2]
+    p99 = checkout_latency[int(len(checkout_latency) * 0.99)]
+    label = "admission control ON " if enabled else "admission control OFF"
+    print(
+        f"{label}: checkout p50 {p50 * 1000:7.1f} ms  p99 {p99 * 1000:7.1f} ms  "
+        f"({len(checkout_latency)} orders)  background statuses {dict(sorted(background.items()))}"
+    )
+
+
+def main():
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    assistant_routes.ollama_chat = fake_llm
+    run(False, duration, 5071)
+    run(True, duration, 5072)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Bytes and CPU saved by response compression and conditional GETs.
+
+    python -m benchmarks.bench_compression
+"""
+
+import gzip
+import time
+
+from benchmarks.common import make_app, seed, timed
+from http_cache import brotli
+
+
+ENDPOINTS = ["/api/admin/orders", "/api/admin/users", "/api/orders/user/7", "/api/menu/"]
+
+
+def compression_table(body):
+    rows = []
+    for level in (1, 6, 9):
+        start = time.process_time()
+        for _ in range(10):
+            out = gzip.compress(body, compresslevel=level, mtime=0)
+        cpu = (time.process_time() - start) / 10
+        rows.append((f"gzip-{level}", len(out), cpu))
+    if brotli is not None:
+        for quality in (1, 4, 6, 11):
+            start = time.process_time()
+            for _ in range(3):
+                out = brotli.compress(body, quality=quality)
+            cpu = (time.process_time() - start) / 3
+            rows.append((f"br-{quality}", len(out), cpu))
+    return rows
+
+
+def main():
+    app = make_app()
+    with app.app_context():
+        seed(n_users=500, n_orders=5000)
+
+    client = app.test_client()
+
+    for path in ENDPOINTS:
+        plain = client.get(path, headers={"Accept-Encoding": "identity"})
+        body = plain.get_data()
+        etag = plain.headers["ETag"]
+
+        full_time, _ = timed(lambda: client.get(path, headers={"Accept-Encoding": "gzip"}))
+        hit_time, hit = timed(
+            lambda: client.get(path, headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+        )
+        assert hit.status_code == 304, hit.status_code
+
+        print(f"\n{path}: {len(body):,} bytes uncompressed")
+        for name, size, cpu in compression_table(body):
+            print(f"  {name:<8} {size:>10,} bytes  ({size / len(body):6.1%})  {cpu * 1000:7.2f} ms CPU")
+        print(f"  200 (query + serialize + gzip): {full_time * 1000:7.2f} ms")
+        print(f"  304 (aggregate query only):     {hit_time * 1000:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Delivery batch quality and solve time as order volume grows.
+
+Compares three planners on the same simulated orders:
+  fifo      batches in arrival order, nearest-neighbour route
+  sweep     angular sweep clustering, nearest-neighbour route
+  sweep+2o  sweep clustering, nearest-neighbour + 2-opt (the production planner)
+
+    python -m benchmarks.bench_delivery
+"""
+
+import math
+import random
+import time
+
+from delivery import (
+    DEFAULT_CAPACITY,
+    DEFAULT_TIME_BUDGET,
+    Stop,
+    _distance_matrix,
+    _tour_length,
+    nearest_neighbour_tour,
+    plan_batches,
+)
+
+DEPOT = (40.7128, -74.0060)
+
+
+def simulate_stops(n, rng):
+    """Orders spread over ~8 km, half of them around a few busy neighbourhoods."""
+    hotspots = [(rng.uniform(-0.06, 0.06), rng.uniform(-0.08, 0.08)) for _ in range(6)]
+    stops = []
+    for order_id in range(1, n + 1):
+        if rng.random() < 0.5:
+            dlat, dlng = rng.choice(hotspots)
+            dlat += rng.gauss(0, 0.005)
+            dlng += rng.gauss(0, 0.006)
+        else:
+            r = 0.07 * math.sqrt(rng.random())
+            theta = rng.uniform(0, 2 * math.pi)
+            dlat, dlng = r * math.sin(theta), r * math.cos(theta) * 1.3
+        stops.append(Stop(order_id, DEPOT[0] + dlat, DEPOT[1] + dlng))
+    return stops
+
+
+def fifo_plan(stops, drivers, capacity):
+    total = 0.0
+    for k in range(0, min(len(stops), len(drivers) * capacity), capacity):
+        chunk = stops[k:k + capacity]
+        dist = _distance_matrix([DEPOT] + [(s.lat, s.lng) for s in chunk])
+        total += _tour_length(dist, nearest_neighbour_tour(dist))
+    return total
+
+
+def main():
+    rng = random.Random(7)
+    capacity = DEFAULT_CAPACITY
+
+    print(f"capacity={capacity}, time budget={DEFAULT_TIME_BUDGET * 1000:.0f} ms")
+    print(f"{'orders':>7} {'fifo km/order':>14} {'sweep':>8} {'sweep+2o':>9} {'solve ms':>9}")
+
+    for n in (50, 200, 1_000, 5_000):
+        stops = simulate_stops(n, rng)
+        drivers = list(range(1, math.ceil(n / capacity) + 1))
+
+        fifo_km = fifo_plan(stops, drivers, capacity)
+
+        sweep, _ = plan_batches(DEPOT, stops, drivers, capacity, improve=False)
+        sweep_km = sum(b.route_km for b in sweep)
+
+        start = time.perf_counter()
+        best, _ = plan_batches(DEPOT, stops, drivers, capacity)
+        solve = time.perf_counter() - start
+        best_km = sum(b.route_km for b in best)
+
+        print(
+            f"{n:>7,} {fifo_km / n:>14.2f} {sweep_km / n:>8.2f} {best_km / n:>9.2f} {solve * 1000:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
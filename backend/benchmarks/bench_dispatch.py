@@ -0,0 +1,48 @@
+"""
+Kitchen dispatch throughput with thousands of open orders.
+
+    python -m benchmarks.bench_dispatch
+"""
+
+import time
+
+from benchmarks.common import make_app, seed
+from dispatch import chef_loads, claim_next_order, dispatch_pending
+from extensions import db
+
+
+def run(n_orders, n_chefs):
+    app = make_app()
+    with app.app_context():
+        seed(n_users=500, n_dishes=80, n_orders=n_orders, n_chefs=n_chefs, statuses=("paid",))
+
+        start = time.perf_counter()
+        assigned = dispatch_pending()
+        dispatch_time = time.perf_counter() - start
+
+        loads = chef_loads().values()
+
+        chef_ids = list(chef_loads())
+        claims = min(500, n_orders)
+        start = time.perf_counter()
+        for i in range(claims):
+            claim_next_order(chef_ids[i % len(chef_ids)])
+        claim_time = time.perf_counter() - start
+
+        db.session.remove()
+
+    print(
+        f"{n_orders:>7,} open orders / {n_chefs:>3} chefs: "
+        f"dispatch {dispatch_time * 1000:8.1f} ms ({assigned / dispatch_time:>9,.0f} orders/s), "
+        f"load min/max {min(loads)}/{max(loads)}, "
+        f"claim {claim_time / claims * 1000:6.2f} ms/claim"
+    )
+
+
+def main():
+    for n_orders, n_chefs in [(1_000, 10), (5_000, 20), (20_000, 40)]:
+        run(n_orders, n_chefs)
+
+
+if __name__ == "__main__":
+    main()
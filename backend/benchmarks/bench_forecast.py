@@ -0,0 +1,147 @@
+"""
+Demand forecast job over years of order history.
+
+Generates orders with weekly and daily seasonality, then reports:
+- peak Python memory of the chunked aggregation vs. loading every row at once
+- total job time with the fitting done inline vs. in a process pool
+- forecast error on a held-out day vs. "same as last week"
+
+    python -m benchmarks.bench_forecast [days] [orders_per_day]
+"""
+
+import random
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from sqlalchemy import func, insert, select
+
+from benchmarks.common import make_app, seed
+from extensions import db
+from forecast import aggregate_history, run_forecast
+from models import Order, OrderItem, DemandForecast
+
+
+N_DISHES = 300
+WEEKDAY_FACTOR = [0.8, 0.85, 0.9, 1.0, 1.3, 1.5, 1.2]
+# Lunch and dinner peaks
+HOUR_WEIGHTS = [0.2] * 11 + [2, 3, 2] + [0.5] * 3 + [2, 3.5, 3, 1.5] + [0.3] * 3
+
+
+def generate_history(days, orders_per_day, end, rng, chunk=50_000):
+    popularity = [1 / (k + 1) ** 0.8 for k in range(N_DISHES)]
+    hours = list(range(24))
+    orders, items = [], []
+    order_id, item_id = 2, 1_000_000
+
+    def flush():
+        db.session.execute(insert(Order), orders)
+        db.session.execute(insert(OrderItem), items)
+        orders.clear()
+        items.clear()
+
+    for d in range(days):
+        day = end - timedelta(days=days - d)
+        trend = 1 + 0.3 * d / days
+        n = int(orders_per_day * WEEKDAY_FACTOR[day.weekday()] * trend * rng.uniform(0.9, 1.1))
+        for _ in range(n):
+            created = datetime.combine(day, datetime.min.time()) + timedelta(
+                hours=rng.choices(hours, HOUR_WEIGHTS)[0], minutes=rng.randint(0, 59)
+            )
+            orders.append(
+                {
+                    "id": order_id, "customer_id": rng.randint(1, 50), "status": "delivered",
+                    "total_price": 20.0, "discount_applied": 0.0,
+                    "created_at": created, "updated_at": created,
+                }
+            )
+            for dish_id in set(rng.choices(range(1, N_DISHES + 1), popularity, k=rng.randint(1, 3))):
+                items.append(
+                    {
+                        "id": item_id, "order_id": order_id, "dish_id": dish_id,
+                        "quantity": rng.randint(1, 2), "unit_price": 10.0,
+                    }
+                )
+                item_id += 1
+            order_id += 1
+        if len(items) >= chunk:
+            flush()
+    flush()
+    db.session.commit()
+
+
+def actual_totals(day):
+    start = datetime.combine(day, datetime.min.time())
+    rows = db.session.execute(
+        select(OrderItem.dish_id, func.sum(OrderItem.quantity))
+        .join(Order, Order.id == OrderItem.order_id)
+        .where(Order.created_at >= start, Order.created_at < start + timedelta(days=1))
+        .group_by(OrderItem.dish_id)
+    ).all()
+    return dict(rows)
+
+
+def peak_mib(fn):
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 2**20
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 730
+    orders_per_day = int(sys.argv[2]) if len(sys.argv) > 2 else 400
+    rng = random.Random(3)
+
+    app = make_app()
+    with app.app_context():
+        seed(n_users=50, n_dishes=N_DISHES, n_orders=1, statuses=("cancelled",))
+        end = date.today()
+        start = time.perf_counter()
+        generate_history(days, orders_per_day, end, rng)
+        n_items = db.session.query(func.count(OrderItem.id)).scalar()
+        print(f"{n_items:,} order items over {days} days ({time.perf_counter() - start:.0f}s to generate)")
+
+        dish_ids = np.arange(1, N_DISHES + 1)
+        held_out = end - timedelta(days=1)
+        window_start = held_out - timedelta(days=56)
+
+        chunked = peak_mib(lambda: aggregate_history(dish_ids, window_start, held_out, 20_000))
+        full = peak_mib(
+            lambda: db.session.execute(
+                select(OrderItem.dish_id, OrderItem.quantity, Order.created_at)
+                .join(Order, Order.id == OrderItem.order_id)
+            ).all()
+        )
+        print(f"peak memory: chunked aggregation {chunked:.1f} MiB, fetch all rows {full:.1f} MiB")
+
+        for workers in (1, 4):
+            start = time.perf_counter()
+            run_forecast(target_date=held_out, workers=workers)
+            print(f"forecast job, {workers} worker(s): {time.perf_counter() - start:.2f}s")
+
+        actual = actual_totals(held_out)
+        last_week = actual_totals(held_out - timedelta(days=7))
+        forecast = {
+            f.dish_id: f.total for f in DemandForecast.query.filter_by(target_date=held_out)
+        }
+        models = db.session.execute(
+            select(DemandForecast.model, func.count()).group_by(DemandForecast.model)
+        ).all()
+
+        def mae(pred):
+            return sum(abs(pred.get(d, 0) - actual.get(d, 0)) for d in range(1, N_DISHES + 1)) / N_DISHES
+
+        total = sum(actual.values())
+        print(f"held-out day {held_out}: {total} portions")
+        print(f"  MAE per dish, forecast:           {mae(forecast):.2f}  (models: {dict(models)})")
+        print(f"  MAE per dish, same as last week:  {mae(last_week):.2f}")
+        print(f"  total portions forecast: {sum(forecast.values()):.0f} "
+              f"(error {abs(sum(forecast.values()) - total) / max(total, 1):.1%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Cost of a retried create_order with and without an Idempotency-Key.
+
+Compares a retry without a key (which places another order every time), the
+first keyed request, a retry answered from the per-worker LRU and a retry
+answered from the idempotency_key table (LRU cold, e.g. another worker).
+
+    python -m benchmarks.bench_idempotency
+"""
+
+import uuid
+
+from benchmarks.common import make_app, seed, timed
+from extensions import db
+from ledger import record_entry
+from models import Dish, User, Order
+
+
+def main():
+    app = make_app()
+    with app.app_context():
+        seed(n_users=200, n_orders=20000)
+        user_id = db.session.query(User.id).filter(User.role == "vip").first()[0]
+        dish_ids = [d for (d,) in db.session.query(Dish.id).limit(5)]
+        # Enough money for every timed order
+        record_entry(user_id, "deposit", 100_000_000)
+        db.session.commit()
+
+    client = app.test_client()
+    cache = app.extensions["idempotency"]
+    body = {
+        "user_id": user_id,
+        "items": [{"dish_id": d, "quantity": 1} for d in dish_ids],
+    }
+
+    def post(key=None):
+        headers = {"Idempotency-Key": key} if key else {}
+        return client.post("/api/orders/", json=body, headers=headers)
+
+    first_time, first = timed(lambda: post(str(uuid.uuid4())))
+    assert first.status_code == 201, first.get_json()
+
+    # Retrying without a key re-runs everything and places another order each time
+    with app.app_context():
+        before = Order.query.count()
+    plain_time, _ = timed(post)
+    with app.app_context():
+        duplicates = Order.query.count() - before
+
+    key = str(uuid.uuid4())
+    post(key)
+    lru_time, replay = timed(lambda: post(key))
+    assert replay.headers.get("Idempotent-Replayed") == "true"
+
+    def cold_replay():
+        cache.discard(("create_order", key))
+        return post(key)
+
+    db_time, replay = timed(cold_replay)
+    assert replay.headers.get("Idempotent-Replayed") == "true"
+
+    print(f"retry without a key:                    {plain_time * 1000:7.2f} ms "
+          f"({duplicates} duplicate orders placed)")
+    print(f"first request with a key (+ reserve):   {first_time * 1000:7.2f} ms")
+    print(f"retry, replayed from LRU:               {lru_time * 1000:7.2f} ms")
+    print(f"retry, replayed from table:             {db_time * 1000:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+How many assistant messages skip the LLM, and what that saves.
+
+Routes a sample of typical chat messages through parse_intent and times
+/api/assistant/chat for a structured query (rules path) and an open-ended
+one (LLM simulated by a SIMULATED_LLM_SECONDS sleep).
+
+    python -m benchmarks.bench_intent
+"""
+
+import time
+
+import routes.assistant_routes as assistant_routes
+from benchmarks.common import make_app, seed, timed
+from intent import parse_intent
+
+SIMULATED_LLM_SECONDS = 2.0
+
+SAMPLE_MESSAGES = [
+    "vegan under $15",
+    "cheapest fish dish",
+    "top 3 spicy dishes between $10 and $20",
+    "My maximum budget is $20. I'm in the mood for: spicy fish.",
+    "most expensive beef",
+    "plant-based noodles $8-$12",
+    "chicken curry 15 or less",
+    "show me salads over 10 dollars",
+    "something spicy, not too expensive",
+    "what goes well with a glass of red wine?",
+    "I don't know what I want, just suggest something popular.",
+    "something light for a date night",
+]
+
+
+def fake_llm(messages):
+    time.sleep(SIMULATED_LLM_SECONDS)
+    return {"message": {"role": "assistant", "content": "Try the noodles."}}
+
+
+def main():
+    parse_time, _ = timed(lambda: [parse_intent(m) for m in SAMPLE_MESSAGES], repeat=200)
+    routed = [m for m in SAMPLE_MESSAGES if parse_intent(m).confident]
+
+    assistant_routes.ollama_chat = fake_llm
+    app = make_app()
+    app.config["RATELIMIT_ENABLED"] = False
+    with app.app_context():
+        seed(n_users=50, n_dishes=500, n_orders=1)
+    client = app.test_client()
+
+    def chat(message):
+        return client.post("/api/assistant/chat", json={"user_id": 1, "message": message})
+
+    rules_time, resp = timed(lambda: chat("cheapest vegan dish under $15"))
+    assert resp.get_json()["route"] == "rules", resp.get_json()
+    llm_time, resp = timed(lambda: chat("something light for a date night"), repeat=3)
+    assert resp.get_json()["route"] == "llm", resp.get_json()
+
+    print(f"parse_intent:                   {parse_time / len(SAMPLE_MESSAGES) * 1e6:7.1f} us/message")
+    print(f"sample routed to rules:         {len(routed)}/{len(SAMPLE_MESSAGES)}")
+    print(f"/chat, rules path (500 dishes): {rules_time * 1000:7.1f} ms")
+    print(f"/chat, LLM path ({SIMULATED_LLM_SECONDS:.0f}s model):     {llm_time * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Per-user wallet balance read latency with millions of ledger rows.
+
+Compares a full SUM over the user's ledger with the snapshot + tail read used
+by ledger.balance_cents(), and times the bulk snapshot and reconcile jobs.
+
+    python -m benchmarks.bench_ledger [total_rows] [users]
+"""
+
+import random
+import sys
+import time
+from datetime import datetime
+
+from sqlalchemy import func, insert
+
+from benchmarks.common import make_app
+from extensions import db
+from ledger import balance_cents, reconcile, record_entry, take_snapshots
+from models import User, LedgerEntry
+
+
+def fill_ledger(total_rows, n_users, rng, chunk=50_000):
+    now = datetime.utcnow()
+    db.session.execute(
+        insert(User),
+        [
+            {"id": i, "name": f"U{i}", "email": f"u{i}@x", "password_hash": "x"}
+            for i in range(1, n_users + 1)
+        ],
+    )
+    written = 0
+    while written < total_rows:
+        size = min(chunk, total_rows - written)
+        rows = []
+        for _ in range(size):
+            if rng.random() < 0.3:
+                kind, amount = "deposit", rng.randint(1_000, 10_000)
+            else:
+                kind, amount = "order_debit", -rng.randint(500, 4_000)
+            rows.append(
+                {"user_id": rng.randint(1, n_users), "kind": kind, "amount_cents": amount, "created_at": now}
+            )
+        db.session.execute(insert(LedgerEntry), rows)
+        written += size
+    db.session.commit()
+
+
+def full_sum(user_id):
+    return (
+        db.session.query(func.coalesce(func.sum(LedgerEntry.amount_cents), 0))
+        .filter(LedgerEntry.user_id == user_id)
+        .scalar()
+    )
+
+
+def median_latency(fn, user_ids):
+    samples = []
+    for user_id in user_ids:
+        start = time.perf_counter()
+        fn(user_id)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.99)]
+
+
+def main():
+    total_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    n_users = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+    rng = random.Random(1)
+
+    app = make_app()
+    with app.app_context():
+        start = time.perf_counter()
+        fill_ledger(total_rows, n_users, rng)
+        print(f"ledger: {total_rows:,} rows / {n_users:,} users (filled in {time.perf_counter() - start:.1f}s)")
+
+        sample = [rng.randint(1, n_users) for _ in range(300)]
+
+        p50, p99 = median_latency(full_sum, sample)
+        print(f"  full SUM per read:        p50 {p50 * 1000:7.3f} ms   p99 {p99 * 1000:7.3f} ms")
+
+        start = time.perf_counter()
+        written = take_snapshots(min_entries=1)
+        print(f"  snapshot job:             {written:,} snapshots in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        # Some activity after the snapshot, as in production
+        for user_id in sample[:100]:
+            record_entry(user_id, "deposit", 500)
+        db.session.commit()
+
+        p50, p99 = median_latency(balance_cents, sample)
+        print(f"  snapshot + tail per read: p50 {p50 * 1000:7.3f} ms   p99 {p99 * 1000:7.3f} ms")
+
+        assert all(balance_cents(u) == full_sum(u) for u in sample[:50])
+
+        start = time.perf_counter()
+        report = reconcile()
+        print(
+            f"  reconcile:                {report['users_checked']:,} users in "
+            f"{(time.perf_counter() - start) * 1000:.0f} ms, {len(report['mismatches'])} mismatches"
+        )
+
+
+if __name__ == "__main__":
+    main()
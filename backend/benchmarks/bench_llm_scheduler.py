@@ -0,0 +1,196 @@
+"""
+Assistant latency for VIP vs regular customers, with and without the LLM
+scheduler, against a fake Ollama server.
+
+The fake server behaves like `ollama serve` with OLLAMA_NUM_PARALLEL=2: two
+slots, extra requests wait in arrival order, and each slot keeps the prompt
+of its last request so a new prompt only pays for the part after the shared
+prefix. Prompt evaluation costs PROMPT_MS_PER_TOKEN per uncached token
+(~4 characters), generation a fixed GENERATION_SECONDS.
+
+Scheduler off = LLM_MAX_IN_FLIGHT far above the server's slots, so every
+request goes straight to the server and queues there.
+
+    python -m benchmarks.bench_llm_scheduler [seconds]
+"""
+
+import http.client
+import json
+import logging
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from werkzeug.serving import make_server
+
+import routes.assistant_routes as assistant_routes
+from benchmarks.common import make_app, seed
+from llm_scheduler import LLMScheduler
+
+SERVER_PARALLEL = 2
+PROMPT_MS_PER_TOKEN = 0.5
+GENERATION_SECONDS = 0.3
+
+VIP_CLIENTS = 2
+REGULAR_CLIENTS = 10
+
+
+class FakeOllama:
+    def __init__(self, parallel):
+        self.slots = [None] * parallel  # last prompt seen by each slot
+        self.free = list(range(parallel))
+        self.cond = threading.Condition()
+        self.waiting = []
+        self.prompt_chars = 0
+        self.cached_chars = 0
+
+    def _acquire(self):
+        me = object()
+        with self.cond:
+            self.waiting.append(me)
+            while not self.free or self.waiting[0] is not me:
+                self.cond.wait()
+            self.waiting.pop(0)
+            slot = self.free.pop()
+            self.cond.notify_all()
+            return slot
+
+    def _release(self, slot):
+        with self.cond:
+            self.free.append(slot)
+            self.cond.notify_all()
+
+    def chat(self, payload):
+        prompt = "".join(m["content"] for m in payload["messages"])
+        slot = self._acquire()
+        try:
+            previous = self.slots[slot] or ""
+            shared = 0
+            for a, b in zip(previous, prompt):
+                if a != b:
+                    break
+                shared += 1
+            self.slots[slot] = prompt
+
+            uncached_tokens = (len(prompt) - shared) / 4
+            prompt_seconds = uncached_tokens * PROMPT_MS_PER_TOKEN / 1000
+            time.sleep(prompt_seconds + GENERATION_SECONDS)
+        finally:
+            self._release(slot)
+
+        with self.cond:
+            self.prompt_chars += len(prompt)
+            self.cached_chars += shared
+
+        return {
+            "message": {"role": "assistant", "content": "Try the noodles."},
+            "prompt_eval_count": int(uncached_tokens),
+            "prompt_eval_duration": int(prompt_seconds * 1e9),
+            "eval_duration": int(GENERATION_SECONDS * 1e9),
+        }
+
+
+def serve_fake_ollama(fake):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            body = json.dumps(fake.chat(payload)).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def client(port, user_id, stop, latencies):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+    body = json.dumps({"user_id": user_id, "message": "something spicy, not too expensive"})
+    while not stop.is_set():
+        start = time.perf_counter()
+        conn.request("POST", "/api/assistant/chat", body=body,
+                     headers={"Content-Type": "application/json"})
+        resp = conn.getresponse()
+        resp.read()
+        if resp.status == 200:
+            latencies.append(time.perf_counter() - start)
+
+
+def run(max_in_flight, duration, port):
+    fake = FakeOllama(SERVER_PARALLEL)
+    ollama = serve_fake_ollama(fake)
+    assistant_routes.OLLAMA_URL = f"http://127.0.0.1:{ollama.server_address[1]}"
+
+    app = make_app()
+    app.config["RATELIMIT_ENABLED"] = False
+    app.extensions["llm_scheduler"] = LLMScheduler(
+        max_in_flight=max_in_flight, max_queue=256, queue_timeout=120
+    )
+    with app.app_context():
+        seed(n_users=100, n_orders=1)
+
+    server = make_server("127.0.0.1", port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    stop = threading.Event()
+    vip, regular = [], []
+    # seed() makes every 10th user a VIP
+    users = [(10 * (k + 1), vip) for k in range(VIP_CLIENTS)]
+    users += [(10 * k + 1, regular) for k in range(REGULAR_CLIENTS)]
+    threads = [
+        threading.Thread(target=client, args=(port, user_id, stop, latencies), daemon=True)
+        for user_id, latencies in users
+    ]
+    for t in threads:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    server.shutdown()
+    ollama.shutdown()
+
+    snapshot = app.extensions["llm_scheduler"].snapshot()
+    reuse = fake.cached_chars / fake.prompt_chars if fake.prompt_chars else 0.0
+    return vip, regular, snapshot, reuse
+
+
+def describe(latencies):
+    if len(latencies) < 2:
+        return f"n={len(latencies)}"
+    cuts = statistics.quantiles(latencies, n=20)
+    return (
+        f"n={len(latencies):4d}  p50={statistics.median(latencies) * 1000:6.0f} ms  "
+        f"p95={cuts[18] * 1000:6.0f} ms"
+    )
+
+
+def main():
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 15
+
+    for label, max_in_flight, port in (
+        ("scheduler off", 64, 5071),
+        (f"scheduler on (LLM_MAX_IN_FLIGHT={SERVER_PARALLEL})", SERVER_PARALLEL, 5072),
+    ):
+        vip, regular, snapshot, reuse = run(max_in_flight, duration, port)
+        print(f"\n{label}:")
+        print(f"  VIP      {describe(vip)}")
+        print(f"  regular  {describe(regular)}")
+        print(f"  avg queue wait {snapshot['avg_queue_wait_ms']} ms (in the scheduler), "
+              f"avg generation {snapshot['avg_generation_ms']} ms")
+        print(f"  prompt characters served from the slot cache: {reuse:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Checkout pricing cost as the number of active pricing rules grows.
+
+Compares the compiled index (pricing.CompiledRules) with scanning every rule
+for every cart line, and reports how long a recompile takes.
+
+    python -m benchmarks.bench_pricing
+"""
+
+import random
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from pricing import CompiledRules, compile_rules
+
+
+RULE_COUNTS = [10, 100, 1_000, 10_000]
+N_DISHES = 500
+CART_SIZE = 5
+
+Dish = namedtuple("Dish", ["id", "price"])
+Customer = namedtuple("Customer", ["role", "total_spent", "order_count"])
+
+RuleRow = namedtuple(
+    "RuleRow",
+    [
+        "id", "name", "kind", "is_active", "dish_id", "bundle_dish_ids", "percent_off",
+        "amount_off", "start_minute", "end_minute", "days_mask", "valid_from",
+        "valid_until", "min_total_spent", "min_order_count",
+    ],
+)
+
+
+class LinearRules(CompiledRules):
+    """Same evaluation, but every rule is a candidate for every dish."""
+
+    def candidates(self, slot, dish_id):
+        return (
+            r for r in self.rules
+            if r.dish_id in (dish_id, None) and (r.kind != "bundle" or dish_id in r.bundle)
+        )
+
+
+def random_rules(n, rng):
+    rows = []
+    for i in range(1, n + 1):
+        roll = rng.random()
+        start = rng.randrange(0, 24 * 60, 30)
+        end = (start + rng.choice([60, 120, 180])) % (24 * 60)
+        window = (start, end) if rng.random() < 0.7 else (None, None)
+        days = rng.randrange(1, 128) if rng.random() < 0.5 else None
+        fields = dict(
+            id=i, name=f"rule {i}", is_active=True, dish_id=None, bundle_dish_ids=None,
+            percent_off=None, amount_off=None, start_minute=window[0], end_minute=window[1],
+            days_mask=days, valid_from=None, valid_until=None,
+            min_total_spent=None, min_order_count=None,
+        )
+        if i <= 3:
+            # A few restaurant-wide happy hours / peak surcharges
+            fields.update(kind="time_of_day", percent_off=rng.choice([-10, 15, 20]))
+        elif roll < 0.25:
+            fields.update(kind="time_of_day", dish_id=rng.randint(1, N_DISHES), percent_off=rng.choice([-5, 10]))
+        elif roll < 0.75:
+            fields.update(kind="dish_promo", dish_id=rng.randint(1, N_DISHES), amount_off=rng.choice([0.5, 1, 2]))
+        else:
+            bundle = rng.sample(range(1, N_DISHES + 1), rng.choice([2, 3]))
+            fields.update(kind="bundle", bundle_dish_ids=",".join(map(str, bundle)), percent_off=15)
+        rows.append(RuleRow(**fields))
+    return rows
+
+
+def time_quotes(engine, carts, user, now):
+    start = time.perf_counter()
+    for cart in carts:
+        engine.quote(user, cart, now=now)
+    return (time.perf_counter() - start) / len(carts)
+
+
+def main():
+    rng = random.Random(7)
+    dishes = [Dish(i, round(rng.uniform(5, 30), 2)) for i in range(1, N_DISHES + 1)]
+    carts = [
+        [(d, rng.randint(1, 3)) for d in rng.sample(dishes, CART_SIZE)] for _ in range(500)
+    ]
+    user = Customer("vip", 500.0, 12)
+    now = datetime(2025, 6, 6, 19, 30)
+
+    print(f"{'rules':>7} {'compile':>10} {'indexed quote':>14} {'linear quote':>13}")
+    for n in RULE_COUNTS:
+        rows = random_rules(n, rng)
+
+        start = time.perf_counter()
+        compiled = compile_rules(rows)
+        compile_time = time.perf_counter() - start
+
+        linear = LinearRules(compiled.rules, [])
+
+        indexed = time_quotes(compiled, carts, user, now)
+        scanned = time_quotes(linear, carts[:50], user, now)
+        print(
+            f"{n:>7} {compile_time * 1000:>8.1f}ms {indexed * 1e6:>11.1f} µs "
+            f"{scanned * 1e6:>10.1f} µs"
+        )
+
+
+if __name__ == "__main__":
+    main()
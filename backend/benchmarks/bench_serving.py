@@ -0,0 +1,110 @@
+"""
+Requests/sec of the Flask dev server vs the gunicorn production profile.
+
+Both servers run against the same seeded throwaway database. Load comes from
+several client processes using keep-alive connections.
+
+    python -m benchmarks.bench_serving [seconds] [client_processes]
+"""
+
+import http.client
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.common import make_app, seed
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Mix of cheap and heavier read endpoints
+PATHS = ["/api/health", "/api/menu/", "/api/orders/user/7", "/api/admin/users"]
+
+
+def client_loop(port, duration):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    done = errors = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        path = PATHS[done % len(PATHS)]
+        try:
+            conn.request("GET", path, headers={"Accept-Encoding": "gzip"})
+            resp = conn.getresponse()
+            resp.read()
+            if resp.status != 200:
+                errors += 1
+            done += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    return done, errors
+
+
+def wait_until_up(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/api/health")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def measure(name, cmd, port, env, duration, clients):
+    proc = subprocess.Popen(
+        cmd, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_up(port)
+        with ProcessPoolExecutor(clients) as pool:
+            results = list(pool.map(client_loop, [port] * clients, [duration] * clients))
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+    done = sum(r[0] for r in results)
+    errors = sum(r[1] for r in results)
+    print(f"{name:<32} {done / duration:>9,.0f} req/s   ({errors} errors)")
+
+
+def main():
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    fd, db_path = tempfile.mkstemp(suffix=".db", prefix="bench_serving_")
+    os.close(fd)
+    app = make_app(db_path)
+    with app.app_context():
+        seed(n_users=300, n_orders=3000)
+
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{db_path}",
+        GUNICORN_ACCESSLOG="",
+        SCHEMA_STARTUP="upgrade",
+        # Measure serving, not the per-IP limit on /api/admin/users
+        RATELIMIT_ENABLED="0",
+    )
+
+    print(f"{clients} client processes, {duration:.0f}s per run, {os.cpu_count()} CPUs")
+    measure("dev server (app.py, debug)", [sys.executable, "app.py"], 5000, env, duration, clients)
+    measure(
+        "gunicorn (gunicorn.conf.py)",
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"],
+        5057,
+        dict(env, BIND="127.0.0.1:5057"),
+        duration,
+        clients,
+    )
+
+    os.remove(db_path)
+
+
+if __name__ == "__main__":
+    main()
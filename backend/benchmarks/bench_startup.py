@@ -0,0 +1,87 @@
+"""
+Worker cold-start cost of the schema check, and what the hot-path indexes buy.
+
+    python -m benchmarks.bench_startup
+"""
+
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine, text
+
+import migrations
+from app import create_app
+from benchmarks.common import seed
+from extensions import db
+
+
+def time_boot(db_path, check, repeat=20):
+    """Median seconds for a fresh engine + the given schema check."""
+    samples = []
+    for _ in range(repeat):
+        engine = create_engine(f"sqlite:///{db_path}")
+        start = time.perf_counter()
+        check(engine)
+        samples.append(time.perf_counter() - start)
+        engine.dispose()
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def time_query(engine, sql, params, repeat=50):
+    with engine.connect() as conn:
+        start = time.perf_counter()
+        for i in range(repeat):
+            conn.execute(text(sql), params(i)).fetchall()
+    return (time.perf_counter() - start) / repeat
+
+
+HOT_QUERIES = [
+    ("orders for one user", 'SELECT * FROM "order" WHERE customer_id = :v ORDER BY created_at DESC',
+     lambda i: {"v": i % 1000 + 1}),
+    ("items for one order", "SELECT * FROM order_item WHERE order_id = :v",
+     lambda i: {"v": i * 97 + 1}),
+    ("next order for a chef", 'SELECT id FROM "order" WHERE status = \'paid\' AND assigned_chef_id = :v '
+     "ORDER BY priority_at LIMIT 1", lambda i: {"v": 1001 + i % 20}),
+]
+
+
+def main():
+    fd, db_path = tempfile.mkstemp(suffix=".db", prefix="bench_startup_")
+    os.close(fd)
+    os.remove(db_path)
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    migrations.upgrade(engine, target=3)
+
+    # Fill through the ORM models on the same file; create_app() runs no DDL,
+    # so the schema stays at revision 3
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}"})
+    with app.app_context():
+        seed(n_users=1000, n_orders=100_000, n_chefs=20, statuses=("paid", "delivered"))
+
+    print("hot queries without indexes (revision 3):")
+    before = {name: time_query(engine, sql, p) for name, sql, p in HOT_QUERIES}
+    start = time.perf_counter()
+    migrations.upgrade(engine)
+    print(f"  (building indexes took {time.perf_counter() - start:.2f}s)")
+    for name, sql, p in HOT_QUERIES:
+        after = time_query(engine, sql, p)
+        print(f"  {name:<24} {before[name] * 1000:8.3f} ms -> {after * 1000:7.3f} ms")
+    engine.dispose()
+
+    print("per-boot schema check:")
+    with app.app_context():
+        create_all = time_boot(db_path, lambda e: db.metadata.create_all(e))
+    noop_upgrade = time_boot(db_path, migrations.upgrade)
+    verify = time_boot(db_path, migrations.verify)
+    print(f"  db.create_all() (old create_app)  {create_all * 1000:7.2f} ms")
+    print(f"  migrations.upgrade() (no-op)      {noop_upgrade * 1000:7.2f} ms")
+    print(f"  migrations.verify()               {verify * 1000:7.2f} ms")
+
+    os.remove(db_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Run benchmarks from the backend/ directory, e.g.:
+
+    python -m benchmarks.bench_compression
+"""
+
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from app import create_app
+from dispatch import priority_for
+from extensions import db
+
+
+def make_app(db_path=None):
+    """
+    create_app() backed by a throwaway SQLite file, so benchmarks never touch
+    backend/restaurant.db.
+    """
+
+    if db_path is None:
+        fd, db_path = tempfile.mkstemp(suffix=".db", prefix="bench_")
+        os.close(fd)
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}"})
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+    return app
+
+
+DISH_WORDS = ["spicy", "vegan", "fish", "chicken", "beef", "rice", "noodle", "salad", "tofu", "curry"]
+
+
+def seed(
+    n_users=100,
+    n_dishes=60,
+    n_orders=2000,
+    items_per_order=3,
+    n_chefs=0,
+    statuses=("paid", "preparing", "on_the_way", "delivered", "cancelled"),
+    seed_value=42,
+):
+    """
+    Bulk-insert a synthetic but realistic dataset. Must run inside an app context.
+
+    Chefs get ids n_users+1 .. n_users+n_chefs and each dish is owned by one of
+    them. Returns (user_ids, dish_ids).
+    """
+
+    from models import User, Dish, Order, OrderItem, LedgerEntry
+
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+
+    db.session.execute(
+        insert(User),
+        [
+            {
+                "id": i,
+                "name": f"User {i}",
+                "email": f"user{i}@example.com",
+                "password_hash": "x",
+                "role": "vip" if i % 10 == 0 else "customer",
+                "total_spent": 0.0,
+                "order_count": 0,
+                "warnings": 0,
+                "is_blacklisted": False,
+                "is_active": True,
+                "created_at": now - timedelta(days=365),
+            }
+            for i in range(1, n_users + 1)
+        ]
+        + [
+            {
+                "id": i,
+                "name": f"Chef {i}",
+                "email": f"chef{i}@example.com",
+                "password_hash": "x",
+                "role": "chef",
+                "is_active": True,
+            }
+            for i in range(n_users + 1, n_users + n_chefs + 1)
+        ],
+    )
+
+    db.session.execute(
+        insert(LedgerEntry),
+        [
+            {"user_id": i, "kind": "deposit", "amount_cents": 100_000, "created_at": now}
+            for i in range(1, n_users + 1)
+        ],
+    )
+
+    db.session.execute(
+        insert(Dish),
+        [
+            {
+                "id": i,
+                "name": f"{rng.choice(DISH_WORDS).title()} {rng.choice(DISH_WORDS)} #{i}",
+                "description": " ".join(rng.choice(DISH_WORDS) for _ in range(8)),
+                "price": round(rng.uniform(4, 40), 2),
+                "is_vip_only": i % 12 == 0,
+                "chef_id": n_users + 1 + i % n_chefs if n_chefs else None,
+            }
+            for i in range(1, n_dishes + 1)
+        ],
+    )
+
+    orders = []
+    items = []
+    item_id = 1
+    for order_id in range(1, n_orders + 1):
+        created = now - timedelta(minutes=rng.randint(0, 60 * 24 * 90))
+        total = 0.0
+        for _ in range(items_per_order):
+            dish_id = rng.randint(1, n_dishes)
+            qty = rng.randint(1, 3)
+            price = round(rng.uniform(4, 40), 2)
+            total += price * qty
+            items.append(
+                {
+                    "id": item_id,
+                    "order_id": order_id,
+                    "dish_id": dish_id,
+                    "quantity": qty,
+                    "unit_price": price,
+                }
+            )
+            item_id += 1
+        customer_id = rng.randint(1, n_users)
+        orders.append(
+            {
+                "id": order_id,
+                "customer_id": customer_id,
+                "status": rng.choice(statuses),
+                "total_price": round(total, 2),
+                "discount_applied": 0.0,
+                "created_at": created,
+                "updated_at": created,
+                "priority_at": priority_for(created, customer_id % 10 == 0),
+            }
+        )
+
+    db.session.execute(insert(Order), orders)
+    db.session.execute(insert(OrderItem), items)
+    db.session.commit()
+
+    return list(range(1, n_users + 1)), list(range(1, n_dishes + 1))
+
+
+def timed(fn, repeat=20):
+    """Run fn `repeat` times; return (median_seconds, last_result)."""
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples[len(samples) // 2], result
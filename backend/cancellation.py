@@ -0,0 +1,162 @@
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import bindparam, case, func, insert, select, update
+
+from dispatch import ORDER_TRANSITIONS
+from extensions import db
+from ledger import to_cents
+from loyalty import vip_qualified_clause
+from models import User, Order, LedgerEntry
+
+
+# Every status from which the state machine allows 'cancelled'
+CANCELLABLE_STATUSES = tuple(
+    sorted(status for status, targets in ORDER_TRANSITIONS.items() if "cancelled" in targets)
+)
+
+# Orders per transaction. Each batch commits on its own, so row locks on
+# "order"/"user" are held for one batch instead of the whole job.
+DEFAULT_BATCH_SIZE = 500
+
+
+def _refund_amounts(orders):
+    """
+    {order_id: cents to refund}. Orders paid through the ledger are refunded
+    exactly what was debited; orders from before the ledger existed fall back
+    to their total_price.
+    """
+
+    order_ids = [o.id for o in orders]
+    debited = dict(
+        db.session.execute(
+            select(LedgerEntry.order_id, func.sum(LedgerEntry.amount_cents))
+            .where(
+                LedgerEntry.order_id.in_(order_ids),
+                LedgerEntry.kind == "order_debit",
+            )
+            .group_by(LedgerEntry.order_id)
+        ).all()
+    )
+    return {
+        o.id: -debited[o.id] if o.id in debited else to_cents(o.total_price or 0)
+        for o in orders
+    }
+
+
+def _cancel_batch(order_ids):
+    """Cancel one batch in a single transaction. Returns (cancelled, refunded_cents, demoted)."""
+
+    order_table = Order.__table__
+    user_table = User.__table__
+
+    # 1. Flip the status. RETURNING gives us exactly the rows this statement
+    #    won, so a concurrent cancel can never refund the same order twice.
+    cancelled = db.session.execute(
+        update(order_table)
+        .where(order_table.c.id.in_(order_ids))
+        .where(order_table.c.status.in_(CANCELLABLE_STATUSES))
+        .values(status="cancelled", updated_at=datetime.utcnow())
+        .returning(order_table.c.id, order_table.c.customer_id, order_table.c.total_price)
+    ).all()
+
+    if not cancelled:
+        db.session.commit()
+        return [], 0, []
+
+    # 2. Refund: one ledger insert per order, sent as a single executemany
+    refunds = _refund_amounts(cancelled)
+    ledger_rows = [
+        {
+            "user_id": o.customer_id,
+            "kind": "refund",
+            "amount_cents": refunds[o.id],
+            "order_id": o.id,
+            "created_at": datetime.utcnow(),
+        }
+        for o in cancelled
+        if refunds[o.id] > 0
+    ]
+    if ledger_rows:
+        db.session.execute(insert(LedgerEntry), ledger_rows)
+
+    # 3. Reverse the per-user stats, one executemany UPDATE for all users
+    per_user = defaultdict(lambda: {"spent": 0.0, "orders": 0})
+    for o in cancelled:
+        per_user[o.customer_id]["spent"] += o.total_price or 0
+        per_user[o.customer_id]["orders"] += 1
+
+    new_spent = user_table.c.total_spent - bindparam("b_spent")
+    new_count = user_table.c.order_count - bindparam("b_orders")
+    db.session.execute(
+        update(user_table)
+        .where(user_table.c.id == bindparam("b_user_id"))
+        .values(
+            total_spent=case((new_spent < 0, 0), else_=new_spent),
+            order_count=case((new_count < 0, 0), else_=new_count),
+        ),
+        [
+            {"b_user_id": user_id, "b_spent": round(v["spent"], 2), "b_orders": v["orders"]}
+            for user_id, v in per_user.items()
+        ],
+    )
+
+    # 4. Demote VIPs who no longer qualify (same rules as qualifies_for_vip)
+    demoted = db.session.execute(
+        update(User)
+        .where(User.id.in_(list(per_user)))
+        .where(User.role == "vip")
+        .where(~vip_qualified_clause())
+        .values(role="customer")
+        .returning(User.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+
+    db.session.commit()
+
+    return [o.id for o in cancelled], sum(refunds.values()), list(demoted)
+
+
+def cancel_orders(order_ids, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Cancel orders, refund their customers and reverse spend / order count /
+    VIP status.
+
+    Works in set-based batches: per batch one UPDATE for the orders, one
+    executemany INSERT for the refunds, one executemany UPDATE for the user
+    stats and one UPDATE for demotions. Orders that are unknown or no longer
+    cancellable are reported as skipped.
+    """
+
+    order_ids = list(dict.fromkeys(order_ids))
+
+    summary = {"cancelled": [], "skipped": [], "refunded_cents": 0, "demoted_user_ids": []}
+
+    for start in range(0, len(order_ids), batch_size):
+        batch = order_ids[start:start + batch_size]
+        cancelled, refunded, demoted = _cancel_batch(batch)
+
+        summary["cancelled"].extend(cancelled)
+        summary["refunded_cents"] += refunded
+        summary["demoted_user_ids"].extend(demoted)
+
+        done = set(cancelled)
+        summary["skipped"].extend(i for i in batch if i not in done)
+
+    summary["demoted_user_ids"] = sorted(set(summary["demoted_user_ids"]))
+
+    # Bulk statements bypass the session; make sure loaded objects are refreshed
+    db.session.expire_all()
+
+    return summary
+
+
+def cancellable_order_ids(statuses):
+    """Ids of orders in any of `statuses` that may still be cancelled."""
+    wanted = [s for s in statuses if s in CANCELLABLE_STATUSES]
+    return [
+        order_id
+        for (order_id,) in db.session.query(Order.id)
+        .filter(Order.status.in_(wanted))
+        .order_by(Order.id.asc())
+    ]
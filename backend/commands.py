@@ -0,0 +1,115 @@
+import time
+from datetime import date
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+import migrations
+from extensions import db
+from idempotency import DEFAULT_SWEEP_BATCH_SIZE, sweep_expired
+from ledger import DEFAULT_SNAPSHOT_MIN_ENTRIES, reconcile, take_snapshots
+
+
+db_cli = AppGroup("db", help="Schema migrations.")
+
+
+@db_cli.command("upgrade")
+@click.option("--to", "target", type=int, default=None, help="Target revision (default: latest).")
+def db_upgrade_command(target):
+    """Apply pending migrations."""
+    applied = migrations.upgrade(db.engine, target=target, echo=click.echo)
+    if not applied:
+        click.echo("Nothing to do.")
+    click.echo(f"Database at revision {migrations.current_revision(db.engine)}.")
+
+
+@db_cli.command("downgrade")
+@click.option("--to", "target", type=int, required=True, help="Revision to go back to (0 = empty).")
+def db_downgrade_command(target):
+    """Revert migrations above --to."""
+    migrations.downgrade(db.engine, target=target, echo=click.echo)
+    click.echo(f"Database at revision {migrations.current_revision(db.engine)}.")
+
+
+@db_cli.command("current")
+def db_current_command():
+    """Show the applied and latest revisions."""
+    click.echo(
+        f"current: {migrations.current_revision(db.engine)}  "
+        f"head: {migrations.head_revision()}"
+    )
+
+
+@db_cli.command("verify")
+def db_verify_command():
+    """Exit non-zero unless the database is at the latest revision."""
+    try:
+        revision = migrations.verify(db.engine)
+    except migrations.SchemaOutOfDate as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Schema up to date (revision {revision}).")
+
+
+@click.command("wallet-snapshot")
+@click.option(
+    "--min-entries",
+    default=DEFAULT_SNAPSHOT_MIN_ENTRIES,
+    show_default=True,
+    help="Only snapshot users with at least this many new ledger entries.",
+)
+def wallet_snapshot_command(min_entries):
+    """Write wallet balance snapshots (run from cron)."""
+    written = take_snapshots(min_entries=min_entries)
+    click.echo(f"Wrote {written} balance snapshot(s).")
+
+
+@click.command("wallet-reconcile")
+def wallet_reconcile_command():
+    """Verify every derived wallet balance against the full ledger."""
+    report = reconcile()
+    click.echo(
+        f"Checked {report['users_checked']} user(s): "
+        f"{len(report['mismatches'])} mismatch(es), "
+        f"{len(report['negative_balances'])} negative balance(s)."
+    )
+    for m in report["mismatches"]:
+        click.echo(
+            f"  user {m['user_id']}: ledger={m['ledger_cents']} derived={m['derived_cents']}"
+        )
+    if report["mismatches"]:
+        raise SystemExit(1)
+
+
+@click.command("idempotency-sweep")
+@click.option("--batch-size", default=DEFAULT_SWEEP_BATCH_SIZE, show_default=True)
+def idempotency_sweep_command(batch_size):
+    """Delete expired Idempotency-Key rows (run from cron)."""
+    deleted = sweep_expired(
+        ttl_hours=current_app.config["IDEMPOTENCY_TTL_HOURS"], batch_size=batch_size
+    )
+    click.echo(f"Deleted {deleted} expired idempotency key(s).")
+
+
+@click.command("forecast")
+@click.option("--date", "target", default=None, help="Day to forecast, YYYY-MM-DD (default: tomorrow).")
+@click.option("--window-days", default=56, show_default=True, help="Days of daily history the models see.")
+@click.option("--workers", default=None, type=int, help="Worker processes (default: CPUs, max 4).")
+def forecast_command(target, window_days, workers):
+    """Forecast per-dish demand from the order history (run from cron)."""
+    # NumPy is only needed by this job, not by the web workers
+    from forecast import run_forecast
+
+    target_date = date.fromisoformat(target) if target else None
+    start = time.perf_counter()
+    count = run_forecast(target_date=target_date, window_days=window_days, workers=workers)
+    click.echo(f"Forecast {count} dish(es) in {time.perf_counter() - start:.1f}s.")
+
+
+def register_commands(app):
+    """Attach the project's `flask --app app <command>` commands."""
+    app.cli.add_command(db_cli)
+    app.cli.add_command(wallet_snapshot_command)
+    app.cli.add_command(wallet_reconcile_command)
+    app.cli.add_command(idempotency_sweep_command)
+    app.cli.add_command(forecast_command)
@@ -0,0 +1,269 @@
+import math
+import os
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import bindparam, func, update
+
+from extensions import db
+from models import User, Order, DeliveryBatch
+
+
+# Where every route starts and ends – override in .env
+RESTAURANT_LAT = float(os.environ.get("RESTAURANT_LAT", "40.7128"))
+RESTAURANT_LNG = float(os.environ.get("RESTAURANT_LNG", "-74.0060"))
+
+# Orders a driver can carry in one trip
+DEFAULT_CAPACITY = 5
+
+# Wall-clock budget for the whole planning run. Clustering and nearest-neighbour
+# routes are always built; 2-opt improvement stops when the budget runs out.
+DEFAULT_TIME_BUDGET = 0.2  # seconds
+
+EARTH_RADIUS_KM = 6371.0
+
+
+Stop = namedtuple("Stop", ["order_id", "lat", "lng"])
+PlannedBatch = namedtuple("PlannedBatch", ["driver_id", "stops", "route_km"])
+
+
+class PlanningConflict(RuntimeError):
+    """Raised when orders changed state while a plan was being saved."""
+
+
+# ---------------------------------------------------------------------------
+# Pure planning (no database access) – used by the API and the benchmark
+# ---------------------------------------------------------------------------
+
+def haversine_km(a, b):
+    """Great-circle distance between two (lat, lng) points in km."""
+    lat1, lng1 = math.radians(a[0]), math.radians(a[1])
+    lat2, lng2 = math.radians(b[0]), math.radians(b[1])
+    h = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(h))
+
+
+def _distance_matrix(points):
+    n = len(points)
+    dist = [[0.0] * n for _ in range(n)]
+    for i in range(n):
+        for j in range(i + 1, n):
+            d = haversine_km(points[i], points[j])
+            dist[i][j] = dist[j][i] = d
+    return dist
+
+
+def _tour_length(dist, tour):
+    return sum(dist[tour[k]][tour[k + 1]] for k in range(len(tour) - 1))
+
+
+def sweep_clusters(depot, stops, capacity):
+    """
+    Group stops into batches of at most `capacity` by sweeping a ray around the
+    depot. The sweep starts at the widest angular gap so that a tight cluster of
+    addresses is not split between the first and last batch.
+    """
+
+    if not stops:
+        return []
+
+    by_angle = sorted(
+        stops, key=lambda s: math.atan2(s.lat - depot[0], s.lng - depot[1])
+    )
+    angles = [math.atan2(s.lat - depot[0], s.lng - depot[1]) for s in by_angle]
+
+    # Gap after stop k (wrapping around); start right after the largest one
+    gaps = [
+        (angles[(k + 1) % len(angles)] - angles[k]) % (2 * math.pi)
+        for k in range(len(angles))
+    ]
+    start = (max(range(len(gaps)), key=gaps.__getitem__) + 1) % len(by_angle)
+    ordered = by_angle[start:] + by_angle[:start]
+
+    return [ordered[k:k + capacity] for k in range(0, len(ordered), capacity)]
+
+
+def nearest_neighbour_tour(dist):
+    """Closed tour over matrix indices 1..n starting and ending at depot 0."""
+    n = len(dist)
+    unvisited = set(range(1, n))
+    tour = [0]
+    while unvisited:
+        last = tour[-1]
+        nxt = min(unvisited, key=lambda j: dist[last][j])
+        tour.append(nxt)
+        unvisited.remove(nxt)
+    tour.append(0)
+    return tour
+
+
+def two_opt(dist, tour, deadline):
+    """
+    Improve a closed tour in place with 2-opt moves until no move helps or the
+    deadline (a time.perf_counter() value) passes.
+    """
+
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for i in range(1, len(tour) - 2):
+            for j in range(i + 1, len(tour) - 1):
+                a, b = tour[i - 1], tour[i]
+                c, d = tour[j], tour[j + 1]
+                delta = dist[a][c] + dist[b][d] - dist[a][b] - dist[c][d]
+                if delta < -1e-9:
+                    tour[i:j + 1] = reversed(tour[i:j + 1])
+                    improved = True
+            if time.perf_counter() >= deadline:
+                break
+    return tour
+
+
+def plan_batches(
+    depot,
+    stops,
+    driver_ids,
+    capacity=DEFAULT_CAPACITY,
+    time_budget=DEFAULT_TIME_BUDGET,
+    improve=True,
+):
+    """
+    Split `stops` into capacity-sized batches, route each one and hand them to
+    drivers.
+
+    Stops are expected in priority order: only the first
+    len(driver_ids) * capacity are planned, the rest are returned as leftovers
+    for the next run. Returns (batches, leftover_stops).
+    """
+
+    deadline = time.perf_counter() + time_budget
+
+    planned = stops[: len(driver_ids) * capacity]
+    leftovers = stops[len(planned):]
+
+    clusters = sweep_clusters(depot, planned, capacity)
+
+    routed = []
+    for cluster in clusters:
+        points = [depot] + [(s.lat, s.lng) for s in cluster]
+        dist = _distance_matrix(points)
+        tour = nearest_neighbour_tour(dist)
+        routed.append((cluster, dist, tour))
+
+    # Improve only once every batch has a valid route, so a tight budget
+    # degrades route quality rather than dropping batches.
+    if improve:
+        for cluster, dist, tour in routed:
+            if time.perf_counter() >= deadline:
+                break
+            two_opt(dist, tour, deadline)
+
+    batches = []
+    for driver_id, (cluster, dist, tour) in zip(driver_ids, routed):
+        ordered_stops = [cluster[idx - 1] for idx in tour[1:-1]]
+        batches.append(PlannedBatch(driver_id, ordered_stops, _tour_length(dist, tour)))
+
+    return batches, leftovers
+
+
+# ---------------------------------------------------------------------------
+# Database side
+# ---------------------------------------------------------------------------
+
+def available_drivers():
+    """Active delivery staff without an unfinished batch, lowest id first."""
+    busy = db.session.query(DeliveryBatch.driver_id).filter(
+        DeliveryBatch.status == "assigned"
+    )
+    return [
+        driver_id
+        for (driver_id,) in db.session.query(User.id)
+        .filter(
+            User.role == "delivery",
+            User.is_active.is_(True),
+            User.id.notin_(busy),
+        )
+        .order_by(User.id.asc())
+    ]
+
+
+def ready_stops(limit):
+    """Routable ready orders, highest kitchen priority (oldest) first."""
+    rows = (
+        db.session.query(Order.id, Order.delivery_lat, Order.delivery_lng)
+        .filter(
+            Order.status == "ready",
+            Order.delivery_lat.isnot(None),
+            Order.delivery_lng.isnot(None),
+        )
+        .order_by(func.coalesce(Order.priority_at, Order.created_at).asc(), Order.id.asc())
+        .limit(limit)
+    )
+    return [Stop(order_id, lat, lng) for order_id, lat, lng in rows]
+
+
+def assign_delivery_batches(capacity=DEFAULT_CAPACITY, time_budget=DEFAULT_TIME_BUDGET):
+    """
+    Plan batches for ready orders, save them and move their orders to
+    'on_the_way'. Returns the list of created DeliveryBatch rows.
+    """
+
+    drivers = available_drivers()
+    if not drivers:
+        return []
+
+    stops = ready_stops(limit=len(drivers) * capacity)
+    if not stops:
+        return []
+
+    depot = (RESTAURANT_LAT, RESTAURANT_LNG)
+    plans, _ = plan_batches(depot, stops, drivers, capacity, time_budget)
+
+    batches = []
+    rows = []
+    for plan in plans:
+        batch = DeliveryBatch(driver_id=plan.driver_id, route_km=round(plan.route_km, 3))
+        db.session.add(batch)
+        db.session.flush()  # need batch.id for the orders
+        batches.append(batch)
+
+        for position, stop in enumerate(plan.stops, start=1):
+            rows.append(
+                {"b_order_id": stop.order_id, "b_batch_id": batch.id, "b_stop": position}
+            )
+
+    table = Order.__table__
+    result = db.session.execute(
+        update(table)
+        .where(table.c.id == bindparam("b_order_id"))
+        .where(table.c.status == "ready")
+        .values(
+            status="on_the_way",
+            delivery_batch_id=bindparam("b_batch_id"),
+            delivery_stop=bindparam("b_stop"),
+        ),
+        rows,
+    )
+
+    if result.rowcount != len(rows):
+        db.session.rollback()
+        raise PlanningConflict("Some orders changed status while planning; try again.")
+
+    db.session.commit()
+    return batches
+
+
+def current_batch(driver_id):
+    """The driver's unfinished batch, or None."""
+    return DeliveryBatch.query.filter_by(driver_id=driver_id, status="assigned").first()
+
+
+def complete_batch_if_done(batch):
+    """Mark the batch completed once none of its orders are still on the way."""
+    if all(o.status != "on_the_way" for o in batch.orders):
+        batch.status = "completed"
+        batch.completed_at = datetime.utcnow()
@@ -0,0 +1,220 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, func, update
+
+from extensions import db
+from models import User, Dish, Order, OrderItem
+
+
+# Order lifecycle. Any status change must follow one of these edges.
+ORDER_TRANSITIONS = {
+    "pending": {"paid", "cancelled"},
+    "paid": {"preparing", "cancelled"},
+    "preparing": {"ready", "cancelled"},
+    "ready": {"on_the_way", "cancelled"},
+    "on_the_way": {"delivered"},
+    "delivered": set(),
+    "cancelled": set(),
+}
+
+ORDER_STATUSES = set(ORDER_TRANSITIONS)
+
+# Statuses that count towards a chef's current load
+CHEF_ACTIVE_STATUSES = ("paid", "preparing")
+
+# VIP orders jump the queue as if they had been placed this much earlier.
+# Since every queued order ages at the same rate, "age + VIP bonus" ordering is
+# the same as ordering by (created_at - bonus), which we store as priority_at.
+VIP_HEAD_START = timedelta(minutes=10)
+
+
+class InvalidTransition(ValueError):
+    """Raised when an order status change is not allowed by ORDER_TRANSITIONS."""
+
+    def __init__(self, current, requested):
+        self.current = current
+        self.requested = requested
+        allowed = sorted(ORDER_TRANSITIONS.get(current, ()))
+        super().__init__(
+            f"Cannot move order from '{current}' to '{requested}'. Allowed: {allowed}."
+        )
+
+
+def check_transition(current, requested):
+    """Raise InvalidTransition unless `current -> requested` is a valid edge."""
+    if requested not in ORDER_TRANSITIONS.get(current, ()):
+        raise InvalidTransition(current, requested)
+
+
+def transition(order, new_status):
+    """
+    Move an order to `new_status`, enforcing the lifecycle state machine.
+    The caller is responsible for committing.
+    """
+
+    check_transition(order.status, new_status)
+    order.status = new_status
+
+
+def priority_for(created_at, is_vip):
+    """Queue key for a new order: earlier priority_at is served first."""
+    if is_vip:
+        return created_at - VIP_HEAD_START
+    return created_at
+
+
+def _priority_column():
+    # Orders created before dispatch existed have no priority_at
+    return func.coalesce(Order.priority_at, Order.created_at)
+
+
+def chef_loads():
+    """
+    Current load per active chef: number of orders assigned to them that are
+    still queued or being prepared. Chefs with nothing assigned have load 0.
+    """
+
+    loads = {
+        chef_id: 0
+        for (chef_id,) in db.session.query(User.id).filter(
+            User.role == "chef", User.is_active.is_(True)
+        )
+    }
+
+    rows = (
+        db.session.query(Order.assigned_chef_id, func.count(Order.id))
+        .filter(
+            Order.assigned_chef_id.isnot(None),
+            Order.status.in_(CHEF_ACTIVE_STATUSES),
+        )
+        .group_by(Order.assigned_chef_id)
+    )
+    for chef_id, count in rows:
+        if chef_id in loads:
+            loads[chef_id] = count
+
+    return loads
+
+
+def dispatch_pending():
+    """
+    Assign every paid, unassigned order to a chef.
+
+    Orders are taken in priority order. Each goes to the least-loaded active
+    chef among the chefs of its dishes (Dish.chef_id); orders whose dishes have
+    no active chef go to the least-loaded chef overall. Uses three queries and
+    one executemany UPDATE regardless of the number of orders.
+
+    Returns the number of orders assigned.
+    """
+
+    loads = chef_loads()
+    if not loads:
+        return 0
+
+    open_orders = [
+        order_id
+        for (order_id,) in db.session.query(Order.id)
+        .filter(Order.status == "paid", Order.assigned_chef_id.is_(None))
+        .order_by(_priority_column().asc(), Order.id.asc())
+    ]
+    if not open_orders:
+        return 0
+
+    dish_chefs = {}
+    rows = (
+        db.session.query(OrderItem.order_id, Dish.chef_id)
+        .join(Dish, Dish.id == OrderItem.dish_id)
+        .join(Order, Order.id == OrderItem.order_id)
+        .filter(
+            Order.status == "paid",
+            Order.assigned_chef_id.is_(None),
+            Dish.chef_id.isnot(None),
+        )
+        .distinct()
+    )
+    for order_id, chef_id in rows:
+        if chef_id in loads:
+            dish_chefs.setdefault(order_id, []).append(chef_id)
+
+    all_chefs = list(loads)
+    assignments = []
+
+    for order_id in open_orders:
+        candidates = dish_chefs.get(order_id) or all_chefs
+        chef_id = min(candidates, key=lambda c: (loads[c], c))
+        loads[chef_id] += 1
+        assignments.append({"b_order_id": order_id, "b_chef_id": chef_id})
+
+    table = Order.__table__
+    stmt = (
+        update(table)
+        .where(table.c.id == bindparam("b_order_id"))
+        .where(table.c.status == "paid")
+        .where(table.c.assigned_chef_id.is_(None))
+        .values(assigned_chef_id=bindparam("b_chef_id"))
+    )
+    db.session.execute(stmt, assignments)
+    db.session.commit()
+
+    return len(assignments)
+
+
+def chef_queue(chef_id, limit=50):
+    """Orders assigned to a chef and not yet claimed, highest priority first."""
+    return (
+        Order.query.filter_by(assigned_chef_id=chef_id, status="paid")
+        .order_by(_priority_column().asc(), Order.id.asc())
+        .limit(limit)
+        .all()
+    )
+
+
+def claim_next_order(chef_id, max_attempts=3):
+    """
+    Move the chef's highest-priority queued order to 'preparing' and return it.
+
+    Unassigned orders are dispatched first so a chef never sees an empty queue
+    while work is waiting. The claim is a compare-and-set UPDATE, so two
+    workers racing for the same order cannot both win. Returns None when
+    there is nothing to claim.
+    """
+
+    has_unassigned = db.session.query(
+        Order.query.filter(
+            Order.status == "paid", Order.assigned_chef_id.is_(None)
+        ).exists()
+    ).scalar()
+    if has_unassigned:
+        dispatch_pending()
+
+    table = Order.__table__
+    for _ in range(max_attempts):
+        next_id = (
+            db.session.query(Order.id)
+            .filter_by(assigned_chef_id=chef_id, status="paid")
+            .order_by(_priority_column().asc(), Order.id.asc())
+            .limit(1)
+            .scalar()
+        )
+        if next_id is None:
+            return None
+
+        result = db.session.execute(
+            update(table)
+            .where(table.c.id == next_id)
+            .where(table.c.status == "paid")
+            .where(table.c.assigned_chef_id == chef_id)
+            .values(status="preparing")
+        )
+        db.session.commit()
+
+        if result.rowcount == 1:
+            return db.session.get(Order, next_id)
+
+    return None
+
+
+def new_order_priority(user):
+    """priority_at for an order being placed right now by `user`."""
+    return priority_for(datetime.utcnow(), user.role == "vip")
@@ -1,4 +1,23 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
 
 # Single global SQLAlchemy instance for the whole project
 db = SQLAlchemy()
+
+# How long a SQLite connection waits for another writer before "database is locked"
+SQLITE_BUSY_TIMEOUT_MS = 15000
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    # WAL lets readers in other workers proceed while one worker writes
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+def configure_sqlite(engine):
+    """Apply multi-process friendly pragmas to every new SQLite connection."""
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", _set_sqlite_pragmas)
@@ -0,0 +1,262 @@
+"""
+Offline demand forecasting for kitchen prep-ahead planning.
+
+    flask --app app forecast [--date YYYY-MM-DD]
+
+1. Stream (dish, quantity, order time) for every non-cancelled order item in
+   chunks and fold each chunk into two fixed-size NumPy arrays:
+     profile[dish, weekday, hour]  all history, the shape of a day
+     daily[dish, day]              the last `window_days` full days
+   Memory therefore depends on the number of dishes and the window, not on
+   how many years of history there are.
+2. Fit two lightweight models per dish in a process pool and keep the one
+   with the lower error on the last week of the window:
+     seasonal_average  mean of the same weekday over the last 4 weeks
+     exp_smoothing     weekday-adjusted exponential smoothing of daily totals
+3. Split the day's total over the hours with the dish's profile for that
+   weekday and store one DemandForecast row per dish.
+
+Times are bucketed in restaurant local time (RESTAURANT_TIMEZONE).
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, time, timedelta, timezone
+
+import numpy as np
+from sqlalchemy import delete, insert, select
+
+from extensions import db
+from models import Dish, Order, OrderItem, DemandForecast
+from pricing import local_today, restaurant_tz
+
+
+DEFAULT_WINDOW_DAYS = 8 * 7
+DEFAULT_CHUNK_SIZE = 50_000
+DEFAULT_ALPHA = 0.3
+
+# Days at the end of the window used to pick the better model per dish
+BACKTEST_DAYS = 7
+SEASONAL_WEEKS = 4
+
+# Fitting a dish takes microseconds; below this many dishes the pool's
+# start-up cost is larger than the work
+MIN_DISHES_FOR_POOL = 200
+
+
+def _local_midnight_utc(day, tz):
+    """Naive UTC datetime of local midnight at the start of `day`."""
+    local = datetime.combine(day, time.min).replace(tzinfo=tz)
+    return local.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+# ---------------------------------------------------------------------------
+# 1. Streaming aggregation
+# ---------------------------------------------------------------------------
+
+def _local_buckets(created_at, tz):
+    """
+    (weekday, hour, local date ordinal) arrays for naive-UTC datetimes.
+    Conversion runs once per distinct hour in the chunk, not once per row.
+    """
+
+    hours = np.array(created_at, dtype="datetime64[h]")
+    distinct, inverse = np.unique(hours, return_inverse=True)
+
+    weekday = np.empty(len(distinct), dtype=np.int64)
+    hour = np.empty(len(distinct), dtype=np.int64)
+    ordinal = np.empty(len(distinct), dtype=np.int64)
+    for k, value in enumerate(distinct.astype(datetime)):
+        local = value.replace(tzinfo=timezone.utc).astimezone(tz)
+        weekday[k], hour[k], ordinal[k] = local.weekday(), local.hour, local.toordinal()
+
+    return weekday[inverse], hour[inverse], ordinal[inverse]
+
+
+def aggregate_history(dish_ids, window_start, window_end, chunk_size=DEFAULT_CHUNK_SIZE, tz=None):
+    """
+    Stream the order history before `window_end` (a local date, exclusive).
+    Returns (profile, daily) indexed like the sorted `dish_ids` array.
+    """
+
+    tz = tz or timezone.utc
+    window_days = (window_end - window_start).days
+    profile = np.zeros((len(dish_ids), 7, 24))
+    daily = np.zeros((len(dish_ids), window_days))
+    first_ordinal = window_start.toordinal()
+
+    stmt = (
+        select(OrderItem.dish_id, OrderItem.quantity, Order.created_at)
+        .join(Order, Order.id == OrderItem.order_id)
+        .where(Order.status != "cancelled")
+        .where(Order.created_at < _local_midnight_utc(window_end, tz))
+        .execution_options(yield_per=chunk_size)
+    )
+
+    for chunk in db.session.execute(stmt).partitions():
+        dish, quantity, created_at = zip(*chunk)
+        dish = np.fromiter(dish, dtype=np.int64, count=len(chunk))
+        quantity = np.fromiter(quantity, dtype=np.float64, count=len(chunk))
+
+        index = np.searchsorted(dish_ids, dish)
+        index = np.minimum(index, len(dish_ids) - 1)
+        known = dish_ids[index] == dish  # skip items of dishes deleted since
+        weekday, hour, ordinal = _local_buckets(created_at, tz)
+
+        np.add.at(profile, (index[known], weekday[known], hour[known]), quantity[known])
+
+        day = ordinal - first_ordinal
+        recent = known & (day >= 0)
+        np.add.at(daily, (index[recent], day[recent]), quantity[recent])
+
+    return profile, daily
+
+
+# ---------------------------------------------------------------------------
+# 2. Models (pure functions; run in worker processes)
+# ---------------------------------------------------------------------------
+
+def seasonal_average(series, weekdays, target_weekday, upto):
+    """Mean of the last SEASONAL_WEEKS days before `upto` on the target weekday."""
+    same = np.flatnonzero(weekdays[:upto] == target_weekday)[-SEASONAL_WEEKS:]
+    return float(series[same].mean()) if len(same) else 0.0
+
+
+def _weekday_factors(series, weekdays):
+    """Average demand per weekday relative to the overall average (1.0 = normal)."""
+    overall = series.mean()
+    factors = np.ones(7)
+    if overall > 0:
+        for wd in range(7):
+            same = series[weekdays == wd]
+            if len(same):
+                factors[wd] = same.mean() / overall
+    return factors
+
+
+def exp_smoothing(series, weekdays, target_weekday, upto, alpha, factors):
+    """Exponentially smoothed, weekday-adjusted level of days before `upto`."""
+    level = None
+    for t in range(upto):
+        factor = factors[weekdays[t]]
+        if factor <= 0:
+            continue
+        value = series[t] / factor
+        level = value if level is None else alpha * value + (1 - alpha) * level
+    return 0.0 if level is None else float(level * factors[target_weekday])
+
+
+def fit_dish(task):
+    """
+    Fit both models for one dish and forecast the target day.
+    task = (dish_id, daily series, weekday of each day, target weekday, alpha)
+    Returns (dish_id, model name, forecast total, backtest MAE).
+    """
+
+    dish_id, series, weekdays, target_weekday, alpha = task
+    if not series.any():
+        return dish_id, "seasonal_average", 0.0, 0.0
+
+    n = len(series)
+    first = max(SEASONAL_WEEKS, n - BACKTEST_DAYS)
+
+    def models(factors):
+        return {
+            "seasonal_average": lambda wd, upto: seasonal_average(series, weekdays, wd, upto),
+            "exp_smoothing": lambda wd, upto: exp_smoothing(
+                series, weekdays, wd, upto, alpha, factors
+            ),
+        }
+
+    # Backtest with weekday factors learnt before the held-out days only
+    best = None
+    for name, predict in models(_weekday_factors(series[:first], weekdays[:first])).items():
+        errors = [abs(predict(weekdays[t], t) - series[t]) for t in range(first, n)]
+        mae = float(np.mean(errors)) if errors else 0.0
+        if best is None or mae < best[1]:
+            best = (name, mae)
+
+    name, mae = best
+    predict = models(_weekday_factors(series, weekdays))[name]
+    return dish_id, name, max(0.0, predict(target_weekday, n)), mae
+
+
+def fit_all(tasks, workers):
+    if workers <= 1 or len(tasks) < MIN_DISHES_FOR_POOL:
+        return [fit_dish(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunksize = max(1, len(tasks) // (workers * 4))
+        return list(pool.map(fit_dish, tasks, chunksize=chunksize))
+
+
+# ---------------------------------------------------------------------------
+# 3. Pipeline
+# ---------------------------------------------------------------------------
+
+def hourly_split(total, day_profile, week_profile):
+    """Spread `total` over 24 hours following the dish's usual shape."""
+    shape = day_profile if day_profile.sum() > 0 else week_profile
+    if shape.sum() <= 0:
+        return np.zeros(24)
+    return total * shape / shape.sum()
+
+
+def run_forecast(
+    target_date=None,
+    window_days=DEFAULT_WINDOW_DAYS,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    workers=None,
+    alpha=DEFAULT_ALPHA,
+):
+    """
+    Forecast every dish for `target_date` (default: tomorrow, local time) and
+    replace that day's DemandForecast rows. Returns the number of dishes.
+    """
+
+    tz = restaurant_tz()
+    today = local_today()
+    target_date = target_date or today + timedelta(days=1)
+    workers = workers or min(os.cpu_count() or 1, 4)
+
+    # Only complete days feed the daily series
+    window_end = min(target_date, today)
+    window_start = window_end - timedelta(days=window_days)
+
+    dish_ids = np.array(
+        [d for (d,) in db.session.query(Dish.id).order_by(Dish.id.asc())], dtype=np.int64
+    )
+    if not len(dish_ids):
+        return 0
+
+    profile, daily = aggregate_history(dish_ids, window_start, window_end, chunk_size, tz)
+
+    weekdays = np.array(
+        [(window_start + timedelta(days=k)).weekday() for k in range(window_days)]
+    )
+    target_weekday = target_date.weekday()
+    tasks = [
+        (int(dish_id), daily[k], weekdays, target_weekday, alpha)
+        for k, dish_id in enumerate(dish_ids)
+    ]
+    results = fit_all(tasks, workers)
+
+    generated_at = datetime.utcnow()
+    rows = []
+    for k, (dish_id, model, total, mae) in enumerate(results):
+        hours = hourly_split(total, profile[k, target_weekday], profile[k].sum(axis=0))
+        rows.append(
+            {
+                "target_date": target_date,
+                "dish_id": dish_id,
+                "total": round(total, 2),
+                "hourly": ",".join(f"{q:.2f}" for q in hours),
+                "model": model,
+                "backtest_mae": round(mae, 3),
+                "generated_at": generated_at,
+            }
+        )
+
+    db.session.execute(delete(DemandForecast).where(DemandForecast.target_date == target_date))
+    db.session.execute(insert(DemandForecast), rows)
+    db.session.commit()
+    return len(rows)
@@ -0,0 +1,49 @@
+"""
+Production gunicorn profile.
+
+    cd backend
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Every setting can be overridden from the environment (WEB_CONCURRENCY,
+GUNICORN_THREADS, BIND, ...) or on the command line.
+"""
+
+import multiprocessing
+import os
+
+cpu_count = multiprocessing.cpu_count()
+
+bind = os.environ.get("BIND", f"0.0.0.0:{os.environ.get('PORT', '5000')}")
+
+# Processes for CPU-bound work (JSON, compression), threads to overlap I/O
+# (SQLite, Ollama). Workers are capped because SQLite serializes writers.
+workers = int(os.environ.get("WEB_CONCURRENCY", min(cpu_count * 2 + 1, 9)))
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+worker_class = "gthread"
+
+# Load the app once in the master, then fork: faster startup, shared memory,
+# and the schema version check in wsgi.py runs once instead of per worker
+preload_app = True
+
+# The assistant endpoint can wait up to 120s on Ollama
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 150))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers periodically (staggered) to contain leaks; gunicorn replaces
+# them gracefully, finishing in-flight requests first. SIGHUP reloads all workers.
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 2000))
+max_requests_jitter = max_requests // 10
+
+accesslog = os.environ.get("GUNICORN_ACCESSLOG", "-") or None
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    """Give each worker its own connection pool."""
+    from extensions import db
+
+    app = server.app.wsgi()
+    with app.app_context():
+        # close=False: leave the parent's connections alone, just forget them
+        db.engine.dispose(close=False)
@@ -0,0 +1,190 @@
+import gzip
+import hashlib
+from collections import namedtuple
+from datetime import timezone
+
+from flask import current_app, request
+from sqlalchemy import func
+
+try:
+    import brotli  # optional: pip install brotli
+except ImportError:
+    brotli = None
+
+
+# Only JSON goes through the compressor; images/static files are served elsewhere
+COMPRESSIBLE_MIMETYPES = {"application/json"}
+
+# Bodies smaller than this are sent as-is: the gzip header + CPU isn't worth it
+DEFAULT_MIN_SIZE = 1024
+
+# Level 6 / quality 4 sit at the knee of the size-vs-CPU curve for our
+# repetitive JSON (see benchmarks/bench_compression.py)
+DEFAULT_GZIP_LEVEL = 6
+DEFAULT_BROTLI_QUALITY = 4
+
+
+CollectionValidators = namedtuple("CollectionValidators", ["etag", "last_modified"])
+
+
+def init_compression(app):
+    """
+    Register the response compression middleware on the app.
+
+    Settings (all optional):
+      COMPRESS_MIN_SIZE        bytes below which responses are not compressed
+      COMPRESS_GZIP_LEVEL      1-9
+      COMPRESS_BROTLI_QUALITY  0-11 (only used if the brotli package is installed)
+    """
+
+    app.config.setdefault("COMPRESS_MIN_SIZE", DEFAULT_MIN_SIZE)
+    app.config.setdefault("COMPRESS_GZIP_LEVEL", DEFAULT_GZIP_LEVEL)
+    app.config.setdefault("COMPRESS_BROTLI_QUALITY", DEFAULT_BROTLI_QUALITY)
+
+    app.after_request(compress_response)
+
+
+def available_encodings():
+    """Encodings we can produce, in server preference order."""
+    if brotli is not None:
+        return ["br", "gzip"]
+    return ["gzip"]
+
+
+def compress_response(response):
+    """
+    after_request hook: gzip/brotli-encode JSON bodies the client accepts.
+    """
+
+    if response.direct_passthrough or not 200 <= response.status_code < 300:
+        return response
+    if response.status_code == 204:
+        return response
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+    if "Content-Encoding" in response.headers:
+        return response
+
+    # The body now depends on Accept-Encoding, even when we end up not compressing
+    response.vary.add("Accept-Encoding")
+
+    body = response.get_data()
+    if len(body) < current_app.config["COMPRESS_MIN_SIZE"]:
+        return response
+
+    encoding = request.accept_encodings.best_match(available_encodings())
+    if encoding == "br":
+        compressed = brotli.compress(
+            body, quality=current_app.config["COMPRESS_BROTLI_QUALITY"]
+        )
+    elif encoding == "gzip":
+        compressed = gzip.compress(
+            body, compresslevel=current_app.config["COMPRESS_GZIP_LEVEL"], mtime=0
+        )
+    else:
+        return response
+
+    response.set_data(compressed)
+    response.headers["Content-Encoding"] = encoding
+
+    # A strong ETag must change with the encoding; weaken it instead of rehashing
+    etag, is_weak = response.get_etag()
+    if etag and not is_weak:
+        response.set_etag(etag, weak=True)
+
+    return response
+
+
+def collection_validators(query, *timestamp_columns):
+    """
+    Compute a weak ETag and Last-Modified for the rows matched by `query`.
+
+    Uses a single aggregate query (row count + newest timestamp), so checking
+    freshness never loads or serializes the rows themselves. Pass the model's
+    created_at and updated_at columns so both inserts and status changes
+    produce a new validator.
+    """
+
+    aggregates = [func.count()] + [func.max(col) for col in timestamp_columns]
+    row = query.order_by(None).with_entities(*aggregates).one()
+
+    count = row[0]
+    timestamps = [ts for ts in row[1:] if ts is not None]
+    newest = max(timestamps) if timestamps else None
+
+    fingerprint = f"{request.path}:{count}:{newest.isoformat() if newest else ''}"
+    etag = hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()
+
+    last_modified = None
+    if newest is not None:
+        last_modified = newest.replace(microsecond=0, tzinfo=timezone.utc)
+
+    return CollectionValidators(etag=etag, last_modified=last_modified)
+
+
+def append_only_validators(query, id_column, created_column):
+    """
+    Validators for an append-only table (rows are never updated or deleted):
+    the newest row identifies the whole collection. Fetching it walks the
+    primary key index, unlike count(*) + max() over every row.
+    """
+
+    newest = (
+        query.order_by(None)
+        .with_entities(id_column, created_column)
+        .order_by(id_column.desc())
+        .limit(1)
+        .first()
+    )
+    newest_id, created = newest if newest else (0, None)
+
+    fingerprint = f"{request.path}:{newest_id}"
+    etag = hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()
+
+    last_modified = None
+    if created is not None:
+        last_modified = created.replace(microsecond=0, tzinfo=timezone.utc)
+
+    return CollectionValidators(etag=etag, last_modified=last_modified)
+
+
+def combine_validators(*validators):
+    """
+    Merge validators of several collections that feed one response
+    (e.g. users + their ledger entries).
+    """
+
+    etag = hashlib.sha1(":".join(v.etag for v in validators).encode("utf-8")).hexdigest()
+    modified = [v.last_modified for v in validators if v.last_modified is not None]
+    return CollectionValidators(etag=etag, last_modified=max(modified) if modified else None)
+
+
+def not_modified(validators):
+    """
+    Return a 304 response if the client's cached copy is still fresh, else None.
+
+    If-None-Match wins over If-Modified-Since when both are sent (RFC 9110).
+    """
+
+    if request.if_none_match:
+        fresh = request.if_none_match.contains_weak(validators.etag)
+    elif request.if_modified_since and validators.last_modified:
+        fresh = validators.last_modified <= request.if_modified_since
+    else:
+        fresh = False
+
+    if not fresh:
+        return None
+
+    response = current_app.response_class(status=304)
+    return apply_validators(response, validators)
+
+
+def apply_validators(response, validators):
+    """Attach the ETag / Last-Modified headers to an outgoing response."""
+    response.set_etag(validators.etag, weak=True)
+    if validators.last_modified is not None:
+        response.last_modified = validators.last_modified
+    # Let clients cache, but always revalidate with the validators above
+    response.headers["Cache-Control"] = "no-cache"
+    return response
@@ -0,0 +1,338 @@
+"""
+Idempotency-Key support for endpoints that move money.
+
+A client sends `Idempotency-Key: <uuid>` with a POST and reuses the same key
+when it retries. The first request reserves the key (a row with no response
+yet), runs normally and stores its response in the same transaction as its
+own writes (views call commit_or_defer() instead of db.session.commit()).
+Any retry with that key gets the stored response back, marked with
+`Idempotent-Replayed: true`, without running validation, lookups or the
+transaction again.
+
+Recent responses are also kept in a per-process LRU, so most retries are
+answered without touching the database at all.
+
+- Same key, different body   -> 422 (the key was reused for another request)
+- Same key, first one running -> 409 + Retry-After
+- 5xx or an exception         -> the reservation is dropped so a retry re-runs
+- Reservation older than IDEMPOTENCY_LEASE_SECONDS with no response
+                              -> the worker died mid-request (nothing was
+                                 committed); the next retry takes it over
+
+Requests without the header behave exactly as before.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import current_app, g, jsonify, make_response, request
+from sqlalchemy import delete, insert, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from models import IdempotencyKey
+
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 64
+
+DEFAULT_TTL_HOURS = 24
+# Longer than any request can run (gunicorn kills workers after 150 s)
+DEFAULT_LEASE_SECONDS = 180
+DEFAULT_CACHE_SIZE = 10_000
+DEFAULT_SWEEP_BATCH_SIZE = 1000
+
+
+class ResponseCache:
+    """Bounded LRU of completed responses: (scope, key) -> (hash, status, body, stored_at)."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, cache_key):
+        with self._lock:
+            item = self._items.get(cache_key)
+            if item is not None:
+                self._items.move_to_end(cache_key)
+            return item
+
+    def put(self, cache_key, item):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._items[cache_key] = item
+            self._items.move_to_end(cache_key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def discard(self, cache_key):
+        with self._lock:
+            self._items.pop(cache_key, None)
+
+
+def init_idempotency(app):
+    """
+    Settings (env vars of the same name override the defaults):
+      IDEMPOTENCY_TTL_HOURS     how long a key is honoured (default 24)
+      IDEMPOTENCY_CACHE_SIZE    responses kept in memory per worker (default 10000)
+      IDEMPOTENCY_LEASE_SECONDS after this long a reservation without a response
+                                is treated as abandoned (default 180)
+    """
+
+    app.config.setdefault(
+        "IDEMPOTENCY_TTL_HOURS",
+        float(os.environ.get("IDEMPOTENCY_TTL_HOURS", DEFAULT_TTL_HOURS)),
+    )
+    app.config.setdefault(
+        "IDEMPOTENCY_CACHE_SIZE",
+        int(os.environ.get("IDEMPOTENCY_CACHE_SIZE", DEFAULT_CACHE_SIZE)),
+    )
+    app.config.setdefault(
+        "IDEMPOTENCY_LEASE_SECONDS",
+        float(os.environ.get("IDEMPOTENCY_LEASE_SECONDS", DEFAULT_LEASE_SECONDS)),
+    )
+
+    app.extensions["idempotency"] = ResponseCache(app.config["IDEMPOTENCY_CACHE_SIZE"])
+
+
+def _request_hash():
+    return hashlib.sha256(request.get_data()).hexdigest()
+
+
+def _replay(status_code, body):
+    response = current_app.response_class(body, status=status_code, mimetype="application/json")
+    response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+
+def _key_mismatch():
+    return jsonify(
+        {"error": f"{IDEMPOTENCY_HEADER} was already used for a different request"}
+    ), 422
+
+
+def _in_progress():
+    response = jsonify({"error": f"A request with this {IDEMPOTENCY_HEADER} is still in progress"})
+    response.status_code = 409
+    response.headers["Retry-After"] = "1"
+    return response
+
+
+def _reserve(scope, key, request_hash):
+    """Insert the placeholder row. Returns False if the key already exists."""
+    try:
+        db.session.execute(
+            insert(IdempotencyKey).values(
+                scope=scope, key=key, request_hash=request_hash, created_at=datetime.utcnow()
+            )
+        )
+        db.session.commit()
+        return True
+    except IntegrityError:
+        db.session.rollback()
+        return False
+
+
+def _take_over_abandoned(scope, key, request_hash, lease):
+    """
+    Re-reserve a key whose holder never stored a response within the lease.
+    Its writes were never committed (they share the response's transaction),
+    so running the request again cannot apply them twice.
+    """
+
+    now = datetime.utcnow()
+    result = db.session.execute(
+        update(IdempotencyKey)
+        .where(
+            IdempotencyKey.scope == scope,
+            IdempotencyKey.key == key,
+            IdempotencyKey.request_hash == request_hash,
+            IdempotencyKey.status_code.is_(None),
+            IdempotencyKey.created_at < now - timedelta(seconds=lease),
+        )
+        .values(created_at=now)
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def _release(scope, key):
+    db.session.rollback()
+    db.session.execute(
+        delete(IdempotencyKey).where(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+    )
+    db.session.commit()
+
+
+def _existing_response(scope, key, request_hash, ttl):
+    """Answer for a key that is already reserved or completed."""
+
+    row = db.session.execute(
+        select(
+            IdempotencyKey.request_hash,
+            IdempotencyKey.status_code,
+            IdempotencyKey.response_body,
+            IdempotencyKey.created_at,
+        ).where(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+    ).first()
+
+    if row is None:
+        # Released or swept between our insert attempt and this read
+        return None
+    if row.request_hash != request_hash:
+        return _key_mismatch()
+    if row.status_code is None:
+        return _in_progress()
+
+    age = (datetime.utcnow() - row.created_at).total_seconds()
+    if age < ttl:
+        stored_at = time.time() - age
+        current_app.extensions["idempotency"].put(
+            (scope, key), (row.request_hash, row.status_code, row.response_body, stored_at)
+        )
+    return _replay(row.status_code, row.response_body)
+
+
+def _claim(scope, key, request_hash, ttl, lease):
+    """
+    Reserve the key for this request. Returns (True, None) if the view should
+    run, or (False, response) with the answer for a duplicate.
+    """
+
+    for _ in range(2):
+        if _reserve(scope, key, request_hash):
+            return True, None
+        if _take_over_abandoned(scope, key, request_hash, lease):
+            return True, None
+        existing = _existing_response(scope, key, request_hash, ttl)
+        if existing is not None:
+            return False, existing
+        # Released or swept in between; try to reserve again
+
+    return False, _in_progress()
+
+
+def commit_or_defer():
+    """
+    Commit the current view's writes. Inside an @idempotent request with a key
+    this only flushes: the decorator commits them together with the stored
+    response, so a crash can never leave one without the other.
+    """
+
+    if g.get("idempotency_key") is not None:
+        db.session.flush()
+    else:
+        db.session.commit()
+
+
+def idempotent(scope):
+    """
+    Make a POST view safe to retry with an Idempotency-Key header.
+
+    Responses below 500 are stored and replayed (a rejected request stays
+    rejected for that key; the client sends a new key for a new attempt).
+    The view must commit through commit_or_defer().
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            if key is None:
+                return view(*args, **kwargs)
+
+            key = key.strip()
+            if not key or len(key) > MAX_KEY_LENGTH:
+                return jsonify(
+                    {"error": f"{IDEMPOTENCY_HEADER} must be 1-{MAX_KEY_LENGTH} characters"}
+                ), 400
+
+            cache = current_app.extensions["idempotency"]
+            ttl = current_app.config["IDEMPOTENCY_TTL_HOURS"] * 3600
+            request_hash = _request_hash()
+
+            # Fast path: a retry this worker has already answered
+            cached = cache.get((scope, key))
+            if cached is not None:
+                cached_hash, status_code, body, stored_at = cached
+                if time.time() - stored_at < ttl:
+                    if cached_hash != request_hash:
+                        return _key_mismatch()
+                    return _replay(status_code, body)
+                cache.discard((scope, key))
+
+            claimed, existing = _claim(
+                scope, key, request_hash, ttl, current_app.config["IDEMPOTENCY_LEASE_SECONDS"]
+            )
+            if not claimed:
+                return existing
+
+            g.idempotency_key = (scope, key)
+            try:
+                response = make_response(view(*args, **kwargs))
+            except Exception:
+                _release(scope, key)
+                raise
+            finally:
+                g.idempotency_key = None
+
+            if response.status_code >= 500:
+                _release(scope, key)
+                return response
+            if response.status_code >= 400:
+                # Rejected requests write nothing; drop anything left pending
+                db.session.rollback()
+
+            # One transaction: the view's writes and the response that records them
+            body = response.get_data(as_text=True)
+            db.session.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+                .values(status_code=response.status_code, response_body=body)
+            )
+            db.session.commit()
+            cache.put((scope, key), (request_hash, response.status_code, body, time.time()))
+
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def sweep_expired(ttl_hours=DEFAULT_TTL_HOURS, batch_size=DEFAULT_SWEEP_BATCH_SIZE):
+    """
+    Delete keys older than `ttl_hours`, `batch_size` rows per transaction so
+    the write lock is only ever held briefly. Returns the number deleted.
+    """
+
+    cutoff = datetime.utcnow() - timedelta(hours=ttl_hours)
+    deleted = 0
+    while True:
+        batch = db.session.execute(
+            select(IdempotencyKey.scope, IdempotencyKey.key)
+            .where(IdempotencyKey.created_at < cutoff)
+            .order_by(IdempotencyKey.created_at.asc())
+            .limit(batch_size)
+        ).all()
+        if not batch:
+            break
+
+        db.session.execute(
+            delete(IdempotencyKey).where(
+                tuple_(IdempotencyKey.scope, IdempotencyKey.key).in_(
+                    [tuple(row) for row in batch]
+                )
+            )
+        )
+        db.session.commit()
+        deleted += len(batch)
+
+    return deleted
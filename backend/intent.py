@@ -0,0 +1,204 @@
+"""
+Intent / slot parsing for assistant chat messages.
+
+Many chat messages are structured queries in disguise ("vegan under $15",
+"cheapest fish dish", "top 3 spicy dishes between $10 and $20"). This parser
+pulls out the slots the deterministic recommender understands:
+
+    price bounds    under / below / up to / budget is $X, over / at least $X,
+                    between $X and $Y, $X-$Y
+    dish keywords   spicy, vegan, fish, meat, chicken, ... (DISH_TERMS); all
+                    must match, or any one for "fish or chicken"
+    sort            cheapest / most expensive
+    result count    top N, N dishes
+
+and marks the message `confident` only when every remaining word is filler.
+Anything else ("something light for a date night", "not too expensive")
+is left to the LLM.
+
+Pure string work: no database, no Flask.
+"""
+
+import re
+from collections import namedtuple
+
+
+Intent = namedtuple(
+    "Intent",
+    [
+        "min_price",
+        "max_price",
+        "keywords",
+        "match_any",
+        "sort",
+        "max_results",
+        "unparsed",
+        "confident",
+    ],
+)
+
+MAX_RESULTS_LIMIT = 20
+
+# Keyword -> words that must appear in a dish's name/description to match
+DISH_TERMS = {
+    "spicy": ("spicy",),
+    "vegan": ("vegan",),
+    "fish": ("fish",),
+    "meat": ("beef", "chicken", "meat"),
+    "rice": ("rice",),
+    "chicken": ("chicken",),
+    "beef": ("beef",),
+    "noodle": ("noodle",),
+    "tofu": ("tofu",),
+    "curry": ("curry",),
+    "salad": ("salad",),
+}
+
+# Words customers use -> keyword
+_KEYWORD_WORDS = {
+    "spicy": "spicy",
+    "spice": "spicy",
+    "vegan": "vegan",
+    "plant-based": "vegan",
+    "plant based": "vegan",
+    "fish": "fish",
+    "seafood": "fish",
+    "meat": "meat",
+    "meaty": "meat",
+    "rice": "rice",
+    "chicken": "chicken",
+    "beef": "beef",
+    "noodle": "noodle",
+    "noodles": "noodle",
+    "tofu": "tofu",
+    "curry": "curry",
+    "curries": "curry",
+    "salad": "salad",
+    "salads": "salad",
+}
+
+_SORT_WORDS = [
+    (r"least expensive|lowest[- ]priced?|cheapest|cheap|inexpensive|affordable", "price_asc"),
+    (r"most expensive|highest[- ]priced?|priciest|fanciest|premium", "price_desc"),
+]
+
+# Words that carry no constraint once the slots are taken out
+FILLER = set(
+    """
+    a an the some something anything any me i i'm im my we us our for with and of in is
+    are be what what's whats which show give find get recommend suggest list please dish
+    dishes food foods meal meals option options one ones thing things want would like
+    looking mood to eat order have do you your can could that it's on menu just only
+    today tonight now there ideas idea suggestions suggestion good nice hi hello hey
+    """.split()
+)
+
+# Stands in for a matched keyword while the rest of the message is checked
+_KEYWORD_MARK = "§"
+
+_NUMBER = r"\$?\s*(\d+(?:\.\d{1,2})?)\s*(?:\$|dollars?|bucks?|usd)?"
+
+_BETWEEN = [
+    re.compile(rf"\bbetween\s+{_NUMBER}\s+(?:and|to|-)\s+{_NUMBER}"),
+    re.compile(r"\$\s*(\d+(?:\.\d{1,2})?)\s*(?:-|to)\s*\$?\s*(\d+(?:\.\d{1,2})?)"),
+]
+_MAX_PRICE = [
+    re.compile(
+        rf"(?:\b(?:under|below|less than|cheaper than|no more than|not more than|at most|"
+        rf"up to|within|max(?:imum)?)|<=?)\s*{_NUMBER}"
+    ),
+    re.compile(rf"\b(?:(?:my\s+)?(?:max(?:imum)?\s+)?budget\s+(?:is|of)?)\s*{_NUMBER}"),
+    re.compile(rf"{_NUMBER}\s+or\s+(?:less|under|below)\b"),
+]
+_MIN_PRICE = [
+    re.compile(
+        rf"(?:\b(?:over|above|more than|at least|min(?:imum)?)|>=?)\s*{_NUMBER}"
+    ),
+    re.compile(rf"{_NUMBER}\s+(?:or\s+more|and\s+up)\b"),
+]
+_COUNT = [
+    re.compile(r"\btop\s+(\d{1,2})\b"),
+    re.compile(r"\b(\d{1,2})\s+(?:dishes|options|ideas|suggestions)\b"),
+]
+
+
+def _take(patterns, text):
+    """First match of any pattern; returns (groups, text with the match blanked) or (None, text)."""
+    for pattern in patterns:
+        match = pattern.search(text)
+        if match:
+            return match.groups(), text[: match.start()] + " " + text[match.end() :]
+    return None, text
+
+
+def parse_intent(message):
+    """Parse a chat message into an Intent."""
+
+    text = message.lower().replace("’", "'")
+
+    min_price = max_price = None
+    groups, text = _take(_BETWEEN, text)
+    if groups:
+        low, high = sorted(float(g) for g in groups)
+        min_price, max_price = low, high
+    groups, text = _take(_MAX_PRICE, text)
+    if groups:
+        max_price = float(groups[0])
+    groups, text = _take(_MIN_PRICE, text)
+    if groups:
+        min_price = float(groups[0])
+
+    max_results = None
+    groups, text = _take(_COUNT, text)
+    if groups:
+        max_results = min(MAX_RESULTS_LIMIT, max(1, int(groups[0])))
+
+    sort = None
+    for pattern, name in _SORT_WORDS:
+        match = re.search(rf"\b(?:{pattern})\b", text)
+        if match:
+            sort = name
+            text = text[: match.start()] + " " + text[match.end() :]
+            break
+
+    keywords = []
+    for word in sorted(_KEYWORD_WORDS, key=len, reverse=True):
+        pattern = rf"\b{re.escape(word)}\b"
+        if re.search(pattern, text):
+            keyword = _KEYWORD_WORDS[word]
+            if keyword not in keywords:
+                keywords.append(keyword)
+            text = re.sub(pattern, f" {_KEYWORD_MARK} ", text)
+
+    words = [w for w in re.findall(rf"[a-z0-9$'<>{_KEYWORD_MARK}]+", text) if w not in FILLER]
+
+    # "fish or chicken": fine as long as every keyword is part of one "or" list
+    match_any = False
+    if "or" in words:
+        chain = [w for w in words if w in (_KEYWORD_MARK, "or")]
+        if chain == [_KEYWORD_MARK] + ["or", _KEYWORD_MARK] * (len(chain) // 2):
+            match_any = True
+            words = [w for w in words if w != "or"]
+
+    unparsed = [w for w in words if w != _KEYWORD_MARK]
+
+    found = (
+        min_price is not None
+        or max_price is not None
+        or keywords
+        or sort is not None
+    )
+    confident = bool(found) and not unparsed and (
+        min_price is None or max_price is None or min_price <= max_price
+    )
+
+    return Intent(
+        min_price=min_price,
+        max_price=max_price,
+        keywords=keywords,
+        match_any=match_any,
+        sort=sort,
+        max_results=max_results,
+        unparsed=unparsed,
+        confident=confident,
+    )
@@ -0,0 +1,183 @@
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+
+from sqlalchemy import and_, func, insert, literal, select
+
+from extensions import db
+from models import LedgerEntry, BalanceSnapshot
+
+
+LEDGER_KINDS = {"opening", "deposit", "order_debit", "refund"}
+
+# The snapshot job skips users with fewer new entries than this since their
+# last snapshot; their tail is already cheap to sum.
+DEFAULT_SNAPSHOT_MIN_ENTRIES = 50
+
+
+def to_cents(amount):
+    """Dollars (float/str/Decimal) -> integer cents, rounding half up."""
+    return int(
+        (Decimal(str(amount)) * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP)
+    )
+
+
+def from_cents(cents):
+    """Integer cents -> dollars float for JSON responses."""
+    return round(cents / 100, 2)
+
+
+def record_entry(user_id, kind, amount_cents, order_id=None):
+    """
+    Append one ledger entry. This is the only write a wallet movement needs;
+    the caller commits.
+    """
+
+    if kind not in LEDGER_KINDS:
+        raise ValueError(f"Unknown ledger entry kind: {kind}")
+
+    entry = LedgerEntry(
+        user_id=user_id,
+        kind=kind,
+        amount_cents=amount_cents,
+        order_id=order_id,
+    )
+    db.session.add(entry)
+    return entry
+
+
+def balance_cents(user_id):
+    """Current balance: latest snapshot plus the ledger entries after it."""
+
+    snapshot = (
+        db.session.query(BalanceSnapshot.balance_cents, BalanceSnapshot.last_entry_id)
+        .filter(BalanceSnapshot.user_id == user_id)
+        .order_by(BalanceSnapshot.last_entry_id.desc())
+        .first()
+    )
+    base, last_entry_id = snapshot if snapshot else (0, 0)
+
+    tail = (
+        db.session.query(func.coalesce(func.sum(LedgerEntry.amount_cents), 0))
+        .filter(LedgerEntry.user_id == user_id, LedgerEntry.id > last_entry_id)
+        .scalar()
+    )
+    return base + tail
+
+
+def _latest_snapshots():
+    """Subquery: each user's most recent snapshot (user_id, balance_cents, last_entry_id)."""
+    newest = (
+        select(
+            BalanceSnapshot.user_id,
+            func.max(BalanceSnapshot.last_entry_id).label("last_entry_id"),
+        )
+        .group_by(BalanceSnapshot.user_id)
+        .subquery()
+    )
+    return (
+        select(
+            BalanceSnapshot.user_id,
+            BalanceSnapshot.balance_cents,
+            BalanceSnapshot.last_entry_id,
+        )
+        .join(
+            newest,
+            and_(
+                BalanceSnapshot.user_id == newest.c.user_id,
+                BalanceSnapshot.last_entry_id == newest.c.last_entry_id,
+            ),
+        )
+        .subquery()
+    )
+
+
+def balances_for(user_ids=None):
+    """
+    Balances for many users in two set-based queries.
+    Returns {user_id: cents}; users with no ledger activity are omitted.
+    """
+
+    snap = _latest_snapshots()
+
+    snap_query = select(snap.c.user_id, snap.c.balance_cents)
+    tail_query = (
+        select(LedgerEntry.user_id, func.sum(LedgerEntry.amount_cents))
+        .outerjoin(snap, snap.c.user_id == LedgerEntry.user_id)
+        .where(LedgerEntry.id > func.coalesce(snap.c.last_entry_id, 0))
+        .group_by(LedgerEntry.user_id)
+    )
+    if user_ids is not None:
+        snap_query = snap_query.where(snap.c.user_id.in_(user_ids))
+        tail_query = tail_query.where(LedgerEntry.user_id.in_(user_ids))
+
+    balances = dict(db.session.execute(snap_query).all())
+    for user_id, tail in db.session.execute(tail_query):
+        balances[user_id] = balances.get(user_id, 0) + tail
+
+    return balances
+
+
+def take_snapshots(min_entries=DEFAULT_SNAPSHOT_MIN_ENTRIES):
+    """
+    Write a new snapshot for every user with at least `min_entries` ledger
+    entries since their last one, in a single INSERT ... SELECT.
+    Returns the number of snapshots written.
+    """
+
+    snap = _latest_snapshots()
+    rows = (
+        select(
+            LedgerEntry.user_id,
+            func.coalesce(func.max(snap.c.balance_cents), 0)
+            + func.sum(LedgerEntry.amount_cents),
+            func.max(LedgerEntry.id),
+            literal(datetime.utcnow()),
+        )
+        .outerjoin(snap, snap.c.user_id == LedgerEntry.user_id)
+        .where(LedgerEntry.id > func.coalesce(snap.c.last_entry_id, 0))
+        .group_by(LedgerEntry.user_id)
+        .having(func.count(LedgerEntry.id) >= min_entries)
+    )
+
+    result = db.session.execute(
+        insert(BalanceSnapshot).from_select(
+            ["user_id", "balance_cents", "last_entry_id", "created_at"], rows
+        )
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def reconcile():
+    """
+    Verify, for every user, that snapshot + tail equals the full ledger sum.
+
+    A mismatch means a snapshot is wrong (or the ledger was edited). Runs as
+    two grouped queries, so it is safe to schedule during service.
+    """
+
+    full = dict(
+        db.session.execute(
+            select(LedgerEntry.user_id, func.sum(LedgerEntry.amount_cents)).group_by(
+                LedgerEntry.user_id
+            )
+        ).all()
+    )
+    derived = balances_for()
+
+    mismatches = [
+        {
+            "user_id": user_id,
+            "ledger_cents": full.get(user_id, 0),
+            "derived_cents": derived.get(user_id, 0),
+        }
+        for user_id in sorted(set(full) | set(derived))
+        if full.get(user_id, 0) != derived.get(user_id, 0)
+    ]
+    negative = sorted(user_id for user_id, cents in full.items() if cents < 0)
+
+    return {
+        "users_checked": len(full),
+        "mismatches": mismatches,
+        "negative_balances": negative,
+    }
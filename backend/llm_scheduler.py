@@ -0,0 +1,242 @@
+"""
+Scheduler for LLM generations.
+
+Ollama works through a fixed number of requests at a time (OLLAMA_NUM_PARALLEL)
+and queues the rest in arrival order. This scheduler does the queueing on our
+side instead: waiting requests are admitted by priority (VIPs first), then
+arrival order, and a generation only starts once it holds one of the
+OLLAMA_NUM_PARALLEL slots in the rate-limit storage. With
+RATELIMIT_STORAGE_URL pointing at a SQLite file those slots are shared by
+every gunicorn worker, so the model server never sees more than it can run;
+with the default in-memory storage each worker only gets its share, rounded
+up (LLM_MAX_IN_FLIGHT). Every waiting request holds a worker thread, so the queue
+is kept short (LLM_MAX_QUEUE, by default one less than the threads left
+over by the in-flight generations) and anything beyond it is shed at once,
+like @concurrency_limit does. A request that waits longer than
+LLM_QUEUE_TIMEOUT seconds gives up too. Both become a fast 429 instead of
+threads piling up behind the model server while checkout traffic stalls.
+
+Every run reports queue wait and generation time separately.
+"""
+
+import heapq
+import itertools
+import math
+import multiprocessing
+import os
+import threading
+import time
+from collections import namedtuple
+
+from flask import current_app
+
+from ratelimit import MemoryStorage
+
+
+# Admission order; lower runs first
+PRIORITIES = {"vip": 0}
+DEFAULT_PRIORITY = 1
+
+DEFAULT_OLLAMA_NUM_PARALLEL = 2
+DEFAULT_QUEUE_TIMEOUT = 30  # seconds
+
+# A worker killed mid-generation frees its slot after this long; matches the
+# gunicorn timeout
+DEFAULT_SLOT_LEASE = 150  # seconds
+
+# Slots held in other workers free up without waking us; re-check this often
+SLOT_POLL_INTERVAL = 0.05  # seconds
+
+SLOT_NAME = "llm_generation"
+
+# Match gunicorn.conf.py
+DEFAULT_GUNICORN_THREADS = 4
+DEFAULT_WEB_CONCURRENCY = min(multiprocessing.cpu_count() * 2 + 1, 9)
+
+Timing = namedtuple("Timing", ["queue_wait", "generation"])
+
+
+class QueueFull(RuntimeError):
+    """Too many requests already waiting."""
+
+
+class QueueTimeout(RuntimeError):
+    """Waited LLM_QUEUE_TIMEOUT seconds without getting a generation slot."""
+
+
+class LLMScheduler:
+    """
+    `slots` is a rate-limit storage (ratelimit.py) holding `slot_limit`
+    generation slots, shared with other workers if the storage is. Without
+    one, only the per-worker `max_in_flight` applies.
+    """
+
+    def __init__(
+        self,
+        max_in_flight,
+        max_queue,
+        queue_timeout,
+        slots=None,
+        slot_limit=None,
+        slot_lease=DEFAULT_SLOT_LEASE,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.slots = slots or MemoryStorage()
+        self.slot_limit = slot_limit or max_in_flight
+        self.slot_lease = slot_lease
+
+        self._cond = threading.Condition()
+        self._waiting = []  # heap of (priority, seq)
+        self._seq = itertools.count()
+        self._in_flight = 0
+
+        # Totals for /api/admin/load
+        self._completed = 0
+        self._rejected = 0
+        self._wait_total = 0.0
+        self._generation_total = 0.0
+
+    def _admit(self, priority):
+        """
+        Block until this request may start.
+        Returns (seconds spent waiting, slot token).
+        """
+
+        ticket = (priority, next(self._seq))
+        enqueued = time.monotonic()
+        deadline = enqueued + self.queue_timeout
+
+        with self._cond:
+            must_wait = self._in_flight >= self.max_in_flight or self._waiting
+            if must_wait and len(self._waiting) >= self.max_queue:
+                self._rejected += 1
+                raise QueueFull("LLM queue is full")
+
+            heapq.heappush(self._waiting, ticket)
+            while True:
+                poll = None
+                if self._in_flight < self.max_in_flight and self._waiting[0] == ticket:
+                    token = self.slots.acquire_slot(SLOT_NAME, self.slot_limit, self.slot_lease)
+                    if token is not None:
+                        break
+                    # Every slot is busy in other workers
+                    poll = SLOT_POLL_INTERVAL
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                    self._rejected += 1
+                    # The head of the queue may have changed
+                    self._cond.notify_all()
+                    raise QueueTimeout("Timed out waiting for the LLM")
+                self._cond.wait(remaining if poll is None else min(remaining, poll))
+
+            heapq.heappop(self._waiting)
+            self._in_flight += 1
+            # Let the next in line re-check whether a slot is still free
+            self._cond.notify_all()
+
+        return time.monotonic() - enqueued, token
+
+    def run(self, fn, priority=DEFAULT_PRIORITY):
+        """Run fn() when a slot is free. Returns (result, Timing)."""
+
+        queue_wait, token = self._admit(priority)
+        start = time.monotonic()
+        try:
+            result = fn()
+        finally:
+            generation = time.monotonic() - start
+            self.slots.release_slot(SLOT_NAME, token)
+            with self._cond:
+                self._in_flight -= 1
+                self._completed += 1
+                self._wait_total += queue_wait
+                self._generation_total += generation
+                self._cond.notify_all()
+
+        return result, Timing(queue_wait=queue_wait, generation=generation)
+
+    def snapshot(self):
+        with self._cond:
+            done = self._completed or 1
+            return {
+                "in_flight": self._in_flight,
+                "waiting": len(self._waiting),
+                "max_in_flight": self.max_in_flight,
+                "slot_limit": self.slot_limit,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_queue_wait_ms": round(self._wait_total / done * 1000, 1),
+                "avg_generation_ms": round(self._generation_total / done * 1000, 1),
+            }
+
+
+def init_llm_scheduler(app):
+    """
+    Call after init_rate_limiting(); the generation slots live in its storage.
+
+    Settings (env vars of the same name override the defaults):
+      OLLAMA_NUM_PARALLEL   generations the model server runs at once; the
+                            cap across all workers sharing the storage
+      LLM_MAX_IN_FLIGHT     generations per worker; defaults to all of
+                            OLLAMA_NUM_PARALLEL when the storage is shared,
+                            else ceil(OLLAMA_NUM_PARALLEL / WEB_CONCURRENCY)
+      LLM_MAX_QUEUE         requests allowed to wait per worker; the default,
+                            GUNICORN_THREADS - LLM_MAX_IN_FLIGHT - 1, always
+                            leaves a thread free for other endpoints
+      LLM_QUEUE_TIMEOUT     seconds a request may wait for a slot
+      LLM_SLOT_LEASE        seconds before a slot held by a dead worker is
+                            given to someone else
+    """
+
+    storage = app.extensions["ratelimit"]["storage"]
+
+    app.config.setdefault(
+        "OLLAMA_NUM_PARALLEL",
+        int(os.environ.get("OLLAMA_NUM_PARALLEL", DEFAULT_OLLAMA_NUM_PARALLEL)),
+    )
+    slot_limit = app.config["OLLAMA_NUM_PARALLEL"]
+    if storage.shared:
+        per_worker = slot_limit
+    else:
+        workers = int(os.environ.get("WEB_CONCURRENCY", DEFAULT_WEB_CONCURRENCY))
+        per_worker = math.ceil(slot_limit / workers)
+    app.config.setdefault(
+        "LLM_MAX_IN_FLIGHT", int(os.environ.get("LLM_MAX_IN_FLIGHT", per_worker))
+    )
+    threads = int(os.environ.get("GUNICORN_THREADS", DEFAULT_GUNICORN_THREADS))
+    app.config.setdefault(
+        "LLM_MAX_QUEUE",
+        int(
+            os.environ.get(
+                "LLM_MAX_QUEUE", max(0, threads - app.config["LLM_MAX_IN_FLIGHT"] - 1)
+            )
+        ),
+    )
+    app.config.setdefault(
+        "LLM_QUEUE_TIMEOUT", float(os.environ.get("LLM_QUEUE_TIMEOUT", DEFAULT_QUEUE_TIMEOUT))
+    )
+    app.config.setdefault(
+        "LLM_SLOT_LEASE", float(os.environ.get("LLM_SLOT_LEASE", DEFAULT_SLOT_LEASE))
+    )
+
+    app.extensions["llm_scheduler"] = LLMScheduler(
+        max_in_flight=app.config["LLM_MAX_IN_FLIGHT"],
+        max_queue=app.config["LLM_MAX_QUEUE"],
+        queue_timeout=app.config["LLM_QUEUE_TIMEOUT"],
+        slots=storage,
+        slot_limit=slot_limit,
+        slot_lease=app.config["LLM_SLOT_LEASE"],
+    )
+
+
+def llm_scheduler():
+    return current_app.extensions["llm_scheduler"]
+
+
+def priority_for_role(role):
+    return PRIORITIES.get(role, DEFAULT_PRIORITY)
@@ -0,0 +1,31 @@
+from pricing import current_rules
+
+
+# VIP thresholds are loyalty_tier pricing rules (see pricing.py). A user who
+# reaches any tier qualifies; with no tiers configured the built-in one
+# applies: total_spent >= 200 OR order_count >= 5.
+
+
+def qualifies_for_vip(user):
+    return current_rules().qualifies_for_vip(user)
+
+
+def vip_qualified_clause():
+    """SQL version of qualifies_for_vip(), for set-based updates."""
+    return current_rules().vip_qualified_clause()
+
+
+def maybe_update_vip_status(user):
+    """
+    Promote a user to VIP based on the loyalty tiers.
+    Returns True if the user was just promoted.
+
+    Never demotes: cancellation (cancellation.py) moves VIPs who no longer
+    qualify back to 'customer' in bulk with vip_qualified_clause().
+    """
+
+    if user.role != "vip" and qualifies_for_vip(user):
+        user.role = "vip"
+        return True
+
+    return False
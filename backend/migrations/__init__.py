@@ -0,0 +1,158 @@
+"""
+Versioned schema migrations.
+
+Each file in migrations/versions is named NNNN_description.py and defines:
+
+    revision = N           # matches the file prefix, consecutive from 1
+    description = "..."
+    def upgrade(engine): ...
+    def downgrade(engine): ...
+
+Migrations receive the engine and open their own transactions, so steps that
+must not run inside one long transaction (index builds) can commit
+separately. The applied versions are recorded in the schema_version table.
+
+CLI (see commands.py):
+
+    flask --app app db upgrade [--to N]
+    flask --app app db downgrade --to N
+    flask --app app db current
+    flask --app app db verify
+"""
+
+import importlib
+import os
+import re
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+
+VERSIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "versions")
+MIGRATION_FILE_RE = re.compile(r"^(\d{4})_\w+\.py$")
+
+Migration = namedtuple("Migration", ["revision", "description", "module"])
+
+
+class SchemaOutOfDate(RuntimeError):
+    """Raised by verify() when the database is not at the latest revision."""
+
+    def __init__(self, current, head):
+        self.current = current
+        self.head = head
+        super().__init__(
+            f"Database schema is at revision {current}, code expects {head}. "
+            "Run `flask --app app db upgrade` before starting the server."
+        )
+
+
+def load_migrations():
+    """All migrations, ordered by revision."""
+
+    migrations = []
+    for filename in sorted(os.listdir(VERSIONS_DIR)):
+        match = MIGRATION_FILE_RE.match(filename)
+        if not match:
+            continue
+        module = importlib.import_module(f"migrations.versions.{filename[:-3]}")
+        if module.revision != int(match.group(1)):
+            raise RuntimeError(f"{filename}: revision {module.revision} does not match file name")
+        migrations.append(Migration(module.revision, module.description, module))
+
+    for expected, migration in enumerate(migrations, start=1):
+        if migration.revision != expected:
+            raise RuntimeError(f"Missing migration {expected:04d}")
+
+    return migrations
+
+
+def head_revision():
+    migrations = load_migrations()
+    return migrations[-1].revision if migrations else 0
+
+
+def _ensure_version_table(engine):
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE IF NOT EXISTS schema_version ("
+                " version INTEGER NOT NULL PRIMARY KEY,"
+                " description VARCHAR(200) NOT NULL,"
+                " applied_at DATETIME NOT NULL)"
+            )
+        )
+
+
+def current_revision(engine):
+    """Latest applied revision; 0 for a database that has never been migrated."""
+
+    if not inspect(engine).has_table("schema_version"):
+        return 0
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT MAX(version) FROM schema_version")).scalar() or 0
+
+
+def upgrade(engine, target=None, echo=None):
+    """Apply pending migrations up to `target` (default: head). Returns applied revisions."""
+
+    migrations = load_migrations()
+    target = migrations[-1].revision if target is None else target
+
+    _ensure_version_table(engine)
+    current = current_revision(engine)
+
+    applied = []
+    for migration in migrations:
+        if migration.revision <= current or migration.revision > target:
+            continue
+        if echo:
+            echo(f"Upgrading to {migration.revision:04d}: {migration.description}")
+        migration.module.upgrade(engine)
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    "INSERT INTO schema_version (version, description, applied_at) "
+                    "VALUES (:v, :d, :t)"
+                ),
+                {"v": migration.revision, "d": migration.description, "t": datetime.utcnow()},
+            )
+        applied.append(migration.revision)
+
+    return applied
+
+
+def downgrade(engine, target, echo=None):
+    """Revert applied migrations above `target`, newest first. Returns reverted revisions."""
+
+    migrations = load_migrations()
+    current = current_revision(engine)
+
+    reverted = []
+    for migration in reversed(migrations):
+        if migration.revision > current or migration.revision <= target:
+            continue
+        if echo:
+            echo(f"Downgrading {migration.revision:04d}: {migration.description}")
+        migration.module.downgrade(engine)
+        with engine.begin() as conn:
+            conn.execute(
+                text("DELETE FROM schema_version WHERE version = :v"),
+                {"v": migration.revision},
+            )
+        reverted.append(migration.revision)
+
+    return reverted
+
+
+def verify(engine):
+    """
+    Fast startup check: one query, no DDL. Raises SchemaOutOfDate unless the
+    database is exactly at the head revision.
+    """
+
+    current = current_revision(engine)
+    head = head_revision()
+    if current != head:
+        raise SchemaOutOfDate(current, head)
+    return current
@@ -0,0 +1,51 @@
+"""Small, idempotent DDL helpers shared by the migration scripts."""
+
+from sqlalchemy import inspect, text
+
+
+def table_exists(conn, table):
+    return inspect(conn).has_table(table)
+
+
+def column_exists(conn, table, column):
+    return column in {c["name"] for c in inspect(conn).get_columns(table)}
+
+
+def add_column(conn, table, column, ddl_type):
+    """ALTER TABLE ... ADD COLUMN, skipped if the column is already there."""
+    if not column_exists(conn, table, column):
+        conn.execute(text(f'ALTER TABLE "{table}" ADD COLUMN "{column}" {ddl_type}'))
+
+
+def drop_column(conn, table, column):
+    """ALTER TABLE ... DROP COLUMN (SQLite >= 3.35), skipped if already gone."""
+    if column_exists(conn, table, column):
+        conn.execute(text(f'ALTER TABLE "{table}" DROP COLUMN "{column}"'))
+
+
+def create_index_online(engine, name, table, columns):
+    """
+    Build one index without holding a long write lock.
+
+    - PostgreSQL: CREATE INDEX CONCURRENTLY outside any transaction, so
+      writes continue during the build.
+    - SQLite has no online index build; each index gets its own short
+      transaction instead of one lock held for the whole migration, and other
+      writers simply wait (busy_timeout) for that one build.
+    """
+
+    cols = ", ".join(f'"{c}"' for c in columns)
+
+    if engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(
+                text(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}" ON "{table}" ({cols})')
+            )
+    else:
+        with engine.begin() as conn:
+            conn.execute(text(f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" ({cols})'))
+
+
+def drop_index(engine, name):
+    with engine.begin() as conn:
+        conn.execute(text(f'DROP INDEX IF EXISTS "{name}"'))
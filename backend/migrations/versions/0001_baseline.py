@@ -0,0 +1,88 @@
+"""The original four tables, exactly as the first db.create_all() made them."""
+
+from sqlalchemy import text
+
+revision = 1
+description = "baseline: user, dish, order, order_item"
+
+
+def upgrade(engine):
+    # IF NOT EXISTS: databases created before migrations existed already have these
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+                CREATE TABLE IF NOT EXISTS user (
+                    id INTEGER NOT NULL,
+                    name VARCHAR(120) NOT NULL,
+                    email VARCHAR(120) NOT NULL,
+                    password_hash VARCHAR(256) NOT NULL,
+                    role VARCHAR(20) NOT NULL,
+                    deposit_balance FLOAT,
+                    total_spent FLOAT,
+                    order_count INTEGER,
+                    warnings INTEGER,
+                    is_blacklisted BOOLEAN,
+                    is_active BOOLEAN,
+                    created_at DATETIME,
+                    PRIMARY KEY (id),
+                    UNIQUE (email)
+                )
+                """
+            )
+        )
+        conn.execute(
+            text(
+                """
+                CREATE TABLE IF NOT EXISTS dish (
+                    id INTEGER NOT NULL,
+                    name VARCHAR(200) NOT NULL,
+                    description TEXT NOT NULL,
+                    price FLOAT NOT NULL,
+                    image_url VARCHAR(500),
+                    is_vip_only BOOLEAN,
+                    chef_id INTEGER,
+                    PRIMARY KEY (id),
+                    FOREIGN KEY(chef_id) REFERENCES user (id)
+                )
+                """
+            )
+        )
+        conn.execute(
+            text(
+                """
+                CREATE TABLE IF NOT EXISTS "order" (
+                    id INTEGER NOT NULL,
+                    customer_id INTEGER NOT NULL,
+                    status VARCHAR(20),
+                    total_price FLOAT,
+                    discount_applied FLOAT,
+                    created_at DATETIME,
+                    PRIMARY KEY (id),
+                    FOREIGN KEY(customer_id) REFERENCES user (id)
+                )
+                """
+            )
+        )
+        conn.execute(
+            text(
+                """
+                CREATE TABLE IF NOT EXISTS order_item (
+                    id INTEGER NOT NULL,
+                    order_id INTEGER NOT NULL,
+                    dish_id INTEGER NOT NULL,
+                    quantity INTEGER,
+                    unit_price FLOAT NOT NULL,
+                    PRIMARY KEY (id),
+                    FOREIGN KEY(order_id) REFERENCES "order" (id),
+                    FOREIGN KEY(dish_id) REFERENCES dish (id)
+                )
+                """
+            )
+        )
+
+
+def downgrade(engine):
+    with engine.begin() as conn:
+        for table in ("order_item", '"order"', "dish", "user"):
+            conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
@@ -0,0 +1,52 @@
+"""Columns for conditional GETs, kitchen dispatch and delivery batching."""
+
+from sqlalchemy import text
+
+from migrations.ops import add_column, drop_column
+
+revision = 2
+description = "updated_at columns, kitchen dispatch, delivery batches"
+
+# Foreign keys are declared on the models; they are not repeated in the ALTERs
+# because SQLite cannot DROP a column that carries a REFERENCES clause.
+NEW_COLUMNS = [
+    ("user", "updated_at", "DATETIME"),
+    ("dish", "updated_at", "DATETIME"),
+    ("order", "updated_at", "DATETIME"),
+    ("order", "priority_at", "DATETIME"),
+    ("order", "assigned_chef_id", "INTEGER"),
+    ("order", "delivery_address", "VARCHAR(300)"),
+    ("order", "delivery_lat", "FLOAT"),
+    ("order", "delivery_lng", "FLOAT"),
+    ("order", "delivery_batch_id", "INTEGER"),
+    ("order", "delivery_stop", "INTEGER"),
+]
+
+
+def upgrade(engine):
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+                CREATE TABLE IF NOT EXISTS delivery_batch (
+                    id INTEGER NOT NULL,
+                    driver_id INTEGER NOT NULL,
+                    status VARCHAR(20),
+                    route_km FLOAT,
+                    created_at DATETIME,
+                    completed_at DATETIME,
+                    PRIMARY KEY (id),
+                    FOREIGN KEY(driver_id) REFERENCES user (id)
+                )
+                """
+            )
+        )
+        for table, column, ddl_type in NEW_COLUMNS:
+            add_column(conn, table, column, ddl_type)
+
+
+def downgrade(engine):
+    with engine.begin() as conn:
+        for table, column, _ in reversed(NEW_COLUMNS):
+            drop_column(conn, table, column)
+        conn.execute(text("DROP TABLE IF EXISTS delivery_batch"))
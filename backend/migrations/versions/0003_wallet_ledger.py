@@ -0,0 +1,90 @@
+"""Append-only wallet ledger with balance snapshots."""
+
+from sqlalchemy import text
+
+from migrations.ops import column_exists
+
+revision = 3
+description = "wallet ledger and balance snapshots"
+
+
+def upgrade(engine):
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+                CREATE TABLE IF NOT EXISTS ledger_entry (
+                    id INTEGER NOT NULL,
+                    user_id INTEGER NOT NULL,
+                    kind VARCHAR(20) NOT NULL,
+                    amount_cents INTEGER NOT NULL,
+                    order_id INTEGER,
+                    created_at DATETIME,
+                    PRIMARY KEY (id),
+                    FOREIGN KEY(user_id) REFERENCES user (id),
+                    FOREIGN KEY(order_id) REFERENCES "order" (id)
+                )
+                """
+            )
+        )
+        conn.execute(
+            text(
+                "CREATE INDEX IF NOT EXISTS ix_ledger_entry_user_id_id "
+                "ON ledger_entry (user_id, id)"
+            )
+        )
+        conn.execute(
+            text(
+                """
+                CREATE TABLE IF NOT EXISTS balance_snapshot (
+                    id INTEGER NOT NULL,
+                    user_id INTEGER NOT NULL,
+                    balance_cents INTEGER NOT NULL,
+                    last_entry_id INTEGER NOT NULL,
+                    created_at DATETIME,
+                    PRIMARY KEY (id),
+                    FOREIGN KEY(user_id) REFERENCES user (id)
+                )
+                """
+            )
+        )
+        conn.execute(
+            text(
+                "CREATE INDEX IF NOT EXISTS ix_balance_snapshot_user_id_last_entry_id "
+                "ON balance_snapshot (user_id, last_entry_id)"
+            )
+        )
+
+        # Carry over balances from the old mutable column as one opening entry
+        # per user. The column itself is kept so a downgrade can restore it.
+        if column_exists(conn, "user", "deposit_balance"):
+            conn.execute(
+                text(
+                    """
+                    INSERT INTO ledger_entry (user_id, kind, amount_cents, created_at)
+                    SELECT u.id, 'opening', CAST(ROUND(u.deposit_balance * 100) AS INTEGER),
+                           CURRENT_TIMESTAMP
+                    FROM "user" u
+                    WHERE u.deposit_balance IS NOT NULL
+                      AND ROUND(u.deposit_balance * 100) != 0
+                      AND NOT EXISTS (SELECT 1 FROM ledger_entry l WHERE l.user_id = u.id)
+                    """
+                )
+            )
+
+
+def downgrade(engine):
+    with engine.begin() as conn:
+        # Write the ledger balances back to the mutable column before dropping
+        if column_exists(conn, "user", "deposit_balance"):
+            conn.execute(
+                text(
+                    """
+                    UPDATE "user" SET deposit_balance = COALESCE(
+                        (SELECT SUM(l.amount_cents) FROM ledger_entry l
+                         WHERE l.user_id = "user".id), 0) / 100.0
+                    """
+                )
+            )
+        conn.execute(text("DROP TABLE IF EXISTS balance_snapshot"))
+        conn.execute(text("DROP TABLE IF EXISTS ledger_entry"))
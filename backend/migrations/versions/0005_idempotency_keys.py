@@ -0,0 +1,37 @@
+"""Stored responses for Idempotency-Key retries of create_order / deposit."""
+
+from sqlalchemy import text
+
+revision = 5
+description = "idempotency keys"
+
+
+def upgrade(engine):
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+                CREATE TABLE IF NOT EXISTS idempotency_key (
+                    scope VARCHAR(32) NOT NULL,
+                    "key" VARCHAR(64) NOT NULL,
+                    request_hash VARCHAR(64) NOT NULL,
+                    status_code INTEGER,
+                    response_body TEXT,
+                    created_at DATETIME,
+                    PRIMARY KEY (scope, "key")
+                )
+                """
+            )
+        )
+        # The expiry sweep deletes by age
+        conn.execute(
+            text(
+                "CREATE INDEX IF NOT EXISTS ix_idempotency_key_created_at "
+                "ON idempotency_key (created_at)"
+            )
+        )
+
+
+def downgrade(engine):
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS idempotency_key"))
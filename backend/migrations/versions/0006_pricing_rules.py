@@ -0,0 +1,44 @@
+"""Pricing and promotion rules (see pricing.py)."""
+
+from sqlalchemy import text
+
+revision = 6
+description = "pricing rules"
+
+
+def upgrade(engine):
+    # No rows are inserted: with no loyalty_tier rules pricing.py falls back
+    # to the previous built-in VIP tier (200 spent or 5 orders, 5% off).
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+                CREATE TABLE IF NOT EXISTS pricing_rule (
+                    id INTEGER NOT NULL,
+                    name VARCHAR(120) NOT NULL,
+                    kind VARCHAR(20) NOT NULL,
+                    is_active BOOLEAN,
+                    dish_id INTEGER,
+                    bundle_dish_ids VARCHAR(255),
+                    percent_off FLOAT,
+                    amount_off FLOAT,
+                    start_minute INTEGER,
+                    end_minute INTEGER,
+                    days_mask INTEGER,
+                    valid_from DATETIME,
+                    valid_until DATETIME,
+                    min_total_spent FLOAT,
+                    min_order_count INTEGER,
+                    created_at DATETIME,
+                    updated_at DATETIME,
+                    PRIMARY KEY (id),
+                    FOREIGN KEY(dish_id) REFERENCES dish (id)
+                )
+                """
+            )
+        )
+
+
+def downgrade(engine):
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS pricing_rule"))
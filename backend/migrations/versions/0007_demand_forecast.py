@@ -0,0 +1,39 @@
+"""Per-dish demand forecasts written by the offline forecast job."""
+
+from sqlalchemy import text
+
+revision = 7
+description = "demand forecasts"
+
+
+def upgrade(engine):
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+                CREATE TABLE IF NOT EXISTS demand_forecast (
+                    id INTEGER NOT NULL,
+                    target_date DATE NOT NULL,
+                    dish_id INTEGER NOT NULL,
+                    total FLOAT NOT NULL,
+                    hourly VARCHAR(400) NOT NULL,
+                    model VARCHAR(30) NOT NULL,
+                    backtest_mae FLOAT,
+                    generated_at DATETIME,
+                    PRIMARY KEY (id),
+                    FOREIGN KEY(dish_id) REFERENCES dish (id)
+                )
+                """
+            )
+        )
+        conn.execute(
+            text(
+                "CREATE UNIQUE INDEX IF NOT EXISTS ix_demand_forecast_target_date_dish_id "
+                "ON demand_forecast (target_date, dish_id)"
+            )
+        )
+
+
+def downgrade(engine):
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS demand_forecast"))
@@ -13,7 +13,7 @@ class User(db.Model):
     password_hash = db.Column(db.String(256), nullable=False)
     role = db.Column(db.String(20), default="customer")
 
-    deposit_balance = db.Column(db.Float, default=0.0)
+    # Wallet balance lives in the ledger (see ledger.py), not on the user row
     total_spent = db.Column(db.Float, default=0.0)
     order_count = db.Column(db.Integer, default=0)
     warnings = db.Column(db.Integer, default=0)
@@ -21,6 +21,7 @@ class User(db.Model):
     is_active = db.Column(db.Boolean, default=True)
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
@@ -35,34 +36,54 @@ class Dish(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=False)
-    price = db.Column(db.Float, nullable=False)
+    price = db.Column(db.Float, nullable=False, index=True)
 
     image_url = db.Column(db.String(500))
-    is_vip_only = db.Column(db.Boolean, default=False)
+    is_vip_only = db.Column(db.Boolean, default=False, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     chef_id = db.Column(db.Integer, db.ForeignKey("user.id"))
     chef = db.relationship("User", backref="dishes")
 
 
+# Indexes are created by migrations/versions/0004_hot_path_indexes.py; they are
+# declared here too so db.create_all() (tests, benchmarks) builds the same schema.
 class Order(db.Model):
     __tablename__ = "order"
+    __table_args__ = (
+        db.Index("ix_order_dispatch", "status", "assigned_chef_id", "priority_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    customer_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    customer_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False, index=True)
 
     status = db.Column(db.String(20), default="pending")
     total_price = db.Column(db.Float, default=0.0)
     discount_applied = db.Column(db.Float, default=0.0)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    # Bumped on every status change; drives ETag / Last-Modified for order lists
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Kitchen dispatch (see dispatch.py): queue position and the chef it is assigned to
+    priority_at = db.Column(db.DateTime)
+    assigned_chef_id = db.Column(db.Integer, db.ForeignKey("user.id"))
+
+    # Delivery (see delivery.py). Coordinates are optional; orders without them
+    # cannot be routed and are left for manual handling.
+    delivery_address = db.Column(db.String(300))
+    delivery_lat = db.Column(db.Float)
+    delivery_lng = db.Column(db.Float)
+    delivery_batch_id = db.Column(db.Integer, db.ForeignKey("delivery_batch.id"))
+    delivery_stop = db.Column(db.Integer)  # position within the batch route
 
-    customer = db.relationship("User", backref="orders")
+    customer = db.relationship("User", backref="orders", foreign_keys=[customer_id])
 
 
 class OrderItem(db.Model):
     __tablename__ = "order_item"
 
     id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, db.ForeignKey("order.id"), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey("order.id"), nullable=False, index=True)
     dish_id = db.Column(db.Integer, db.ForeignKey("dish.id"), nullable=False)
 
     quantity = db.Column(db.Integer, default=1)
@@ -70,3 +91,123 @@ class OrderItem(db.Model):
 
     order = db.relationship("Order", backref="items")
     dish = db.relationship("Dish")
+
+
+class DeliveryBatch(db.Model):
+    __tablename__ = "delivery_batch"
+
+    id = db.Column(db.Integer, primary_key=True)
+    driver_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+
+    status = db.Column(db.String(20), default="assigned")  # assigned | completed
+    route_km = db.Column(db.Float, default=0.0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    completed_at = db.Column(db.DateTime)
+
+    driver = db.relationship("User")
+    orders = db.relationship("Order", backref="delivery_batch", order_by="Order.delivery_stop")
+
+
+# One wallet movement. Append-only: rows are never updated or deleted.
+# Amounts are signed integer cents (credits > 0, debits < 0).
+class LedgerEntry(db.Model):
+    __tablename__ = "ledger_entry"
+    __table_args__ = (db.Index("ix_ledger_entry_user_id_id", "user_id", "id"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+
+    kind = db.Column(db.String(20), nullable=False)  # opening | deposit | order_debit | refund
+    amount_cents = db.Column(db.Integer, nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey("order.id"), index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+# A user's balance as of ledger entry `last_entry_id` (inclusive).
+# Current balance = latest snapshot + entries with a higher id.
+class BalanceSnapshot(db.Model):
+    __tablename__ = "balance_snapshot"
+    __table_args__ = (
+        db.Index("ix_balance_snapshot_user_id_last_entry_id", "user_id", "last_entry_id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+
+    balance_cents = db.Column(db.Integer, nullable=False)
+    last_entry_id = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+# One row per Idempotency-Key seen by a money-moving endpoint. status_code is
+# NULL while the first request is still running; afterwards the row holds the
+# response to replay for retries. Swept after IDEMPOTENCY_TTL_HOURS.
+class IdempotencyKey(db.Model):
+    __tablename__ = "idempotency_key"
+
+    scope = db.Column(db.String(32), primary_key=True)  # endpoint, e.g. "create_order"
+    key = db.Column(db.String(64), primary_key=True)
+
+    request_hash = db.Column(db.String(64), nullable=False)  # sha256 of the request body
+    status_code = db.Column(db.Integer)
+    response_body = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+
+# Pricing / promotion rule, compiled into an in-memory index by pricing.py.
+#   time_of_day   price change for one dish (dish_id) or every dish in a window;
+#                 percent_off < 0 is a surcharge (e.g. -10 = +10% at peak)
+#   dish_promo    discount on one dish (percent_off or amount_off per unit)
+#   bundle        discount when all of bundle_dish_ids are in the cart
+#                 (percent_off of the bundle's price or amount_off per bundle)
+#   loyalty_tier  percent_off the order for VIPs reaching min_total_spent or
+#                 min_order_count; the lowest tier decides VIP promotion
+# The optional window is minutes since local midnight [start_minute,
+# end_minute), wrapping past midnight when end <= start, on the weekdays in
+# days_mask (bit 0 = Monday; NULL = every day).
+class PricingRule(db.Model):
+    __tablename__ = "pricing_rule"
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(120), nullable=False)
+    kind = db.Column(db.String(20), nullable=False)
+    is_active = db.Column(db.Boolean, default=True)
+
+    dish_id = db.Column(db.Integer, db.ForeignKey("dish.id"))
+    bundle_dish_ids = db.Column(db.String(255))  # comma-separated, bundles only
+
+    percent_off = db.Column(db.Float)
+    amount_off = db.Column(db.Float)
+
+    start_minute = db.Column(db.Integer)
+    end_minute = db.Column(db.Integer)
+    days_mask = db.Column(db.Integer)
+    valid_from = db.Column(db.DateTime)
+    valid_until = db.Column(db.DateTime)
+
+    min_total_spent = db.Column(db.Float)
+    min_order_count = db.Column(db.Integer)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+# Forecast demand for one dish on one (restaurant-local) day, written by the
+# offline job in forecast.py. hourly = 24 comma-separated quantities.
+class DemandForecast(db.Model):
+    __tablename__ = "demand_forecast"
+    __table_args__ = (
+        db.Index("ix_demand_forecast_target_date_dish_id", "target_date", "dish_id", unique=True),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    target_date = db.Column(db.Date, nullable=False)
+    dish_id = db.Column(db.Integer, db.ForeignKey("dish.id"), nullable=False)
+
+    total = db.Column(db.Float, nullable=False)
+    hourly = db.Column(db.String(400), nullable=False)
+    model = db.Column(db.String(30), nullable=False)  # seasonal_average | exp_smoothing
+    backtest_mae = db.Column(db.Float)
+    generated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    dish = db.relationship("Dish")
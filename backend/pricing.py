@@ -0,0 +1,414 @@
+"""
+Pricing and promotion rules engine.
+
+Rules live in the pricing_rule table (see models.PricingRule for the kinds).
+Each worker compiles them once into an index keyed by hour-of-week slot and
+dish id, so pricing a cart only looks at the handful of rules that can apply
+to its dishes right now, however many rules exist in total. The index is
+rebuilt only when the table changes; workers check for changes with one
+aggregate query at most every PRICING_RULES_CHECK_INTERVAL seconds.
+
+How a cart is priced:
+  1. unit price = dish price, changed by the most specific time_of_day rule
+     (a rule for the dish beats an all-dishes rule; newer beats older)
+  2. bundles, best saving first, each consuming the units it covers
+  3. the best dish_promo on every unit not used by a bundle
+  4. VIPs get their loyalty tier's percent off what is left
+"""
+
+import os
+import threading
+import time
+from collections import Counter, defaultdict, namedtuple
+from datetime import datetime, timezone
+from decimal import Decimal, ROUND_HALF_UP
+from itertools import chain
+from zoneinfo import ZoneInfo
+
+from flask import current_app
+from sqlalchemy import false, func, or_, select
+
+from extensions import db
+from ledger import to_cents
+from models import User, PricingRule
+
+
+RULE_KINDS = ("time_of_day", "dish_promo", "bundle", "loyalty_tier")
+
+# Time windows are in restaurant local time – override in .env
+RESTAURANT_TIMEZONE = os.environ.get("RESTAURANT_TIMEZONE", "UTC")
+
+# Seconds between checks for rule changes made by other workers
+DEFAULT_CHECK_INTERVAL = 5
+
+HOURS_PER_WEEK = 7 * 24
+ALL_DAYS = 0b1111111
+
+LoyaltyTier = namedtuple(
+    "LoyaltyTier", ["rule_id", "name", "min_total_spent", "min_order_count", "percent_off"]
+)
+
+# Used while no loyalty_tier rules exist: the original hard-coded VIP rules
+# (total_spent >= 200 or order_count >= 5, 5% off every order)
+DEFAULT_LOYALTY_TIERS = (
+    LoyaltyTier(rule_id=None, name="VIP", min_total_spent=200, min_order_count=5, percent_off=5.0),
+)
+
+CompiledRule = namedtuple(
+    "CompiledRule",
+    [
+        "id", "name", "kind", "dish_id", "bundle", "percent_off", "amount_cents",
+        "start_minute", "end_minute", "days_mask", "valid_from", "valid_until",
+    ],
+)
+
+Quote = namedtuple(
+    "Quote",
+    ["unit_cents", "subtotal_cents", "discount_cents", "total_cents", "tier", "adjustments"],
+)
+
+
+def percent_of(cents, percent):
+    """`percent`% of an amount in cents, rounded half up."""
+    return int(
+        (Decimal(cents) * Decimal(str(percent)) / 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP)
+    )
+
+
+def parse_bundle(value):
+    """'3,7,12' -> (3, 7, 12)"""
+    return tuple(int(part) for part in (value or "").split(",") if part.strip())
+
+
+def tier_qualifies(tier, user):
+    return (
+        tier.min_total_spent is not None and user.total_spent >= tier.min_total_spent
+    ) or (
+        tier.min_order_count is not None and user.order_count >= tier.min_order_count
+    )
+
+
+# ---------------------------------------------------------------------------
+# Compilation
+# ---------------------------------------------------------------------------
+
+def _hour_slots(rule):
+    """Hour-of-week slots (0 = Monday 00:00) in which the rule can be active."""
+
+    mask = ALL_DAYS if rule.days_mask is None else rule.days_mask
+    days = [d for d in range(7) if mask & (1 << d)]
+
+    if rule.start_minute is None:
+        return {d * 24 + h for d in days for h in range(24)}
+
+    start, end = rule.start_minute, rule.end_minute
+    slots = set()
+    for d in days:
+        if start < end:
+            slots.update(d * 24 + h for h in range(start // 60, (end - 1) // 60 + 1))
+        else:
+            # Wraps past midnight: the rest of day d, then the morning of d + 1
+            slots.update(d * 24 + h for h in range(start // 60, 24))
+            if end > 0:
+                nxt = (d + 1) % 7
+                slots.update(nxt * 24 + h for h in range(0, (end - 1) // 60 + 1))
+    return slots
+
+
+def naive_utc(value):
+    """Rule and order times are naive UTC; convert aware datetimes to that."""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _is_active(rule, now, weekday, minute):
+    """Exact check of the rule's validity period, days and window."""
+
+    if rule.valid_from is not None and now < rule.valid_from:
+        return False
+    if rule.valid_until is not None and now >= rule.valid_until:
+        return False
+
+    mask = ALL_DAYS if rule.days_mask is None else rule.days_mask
+    if rule.start_minute is None:
+        return bool(mask & (1 << weekday))
+
+    start, end = rule.start_minute, rule.end_minute
+    if start < end:
+        return start <= minute < end and bool(mask & (1 << weekday))
+    return (minute >= start and bool(mask & (1 << weekday))) or (
+        minute < end and bool(mask & (1 << ((weekday - 1) % 7)))
+    )
+
+
+class CompiledRules:
+    """
+    Immutable evaluation structure for one version of the rule table.
+
+    index[hour_of_week][dish_id] -> rules that may apply to that dish in that
+    hour (dish_id None: time_of_day rules for every dish). Bundles are listed
+    under each of their dishes.
+    """
+
+    def __init__(self, rules, loyalty_tiers):
+        self.rules = rules
+        self.index = [defaultdict(list) for _ in range(HOURS_PER_WEEK)]
+        for rule in rules:
+            dish_ids = rule.bundle if rule.kind == "bundle" else (rule.dish_id,)
+            for slot in _hour_slots(rule):
+                for dish_id in dish_ids:
+                    self.index[slot][dish_id].append(rule)
+
+        # Highest discount first; the last one is the entry tier
+        self.loyalty_tiers = sorted(
+            loyalty_tiers or DEFAULT_LOYALTY_TIERS, key=lambda t: t.percent_off, reverse=True
+        )
+
+    def candidates(self, slot, dish_id):
+        """Rules that may apply to `dish_id` in hour-of-week `slot`."""
+        hour = self.index[slot]
+        return chain(hour.get(dish_id, ()), hour.get(None, ()))
+
+    # -- loyalty ------------------------------------------------------------
+
+    def qualifies_for_vip(self, user):
+        return any(tier_qualifies(tier, user) for tier in self.loyalty_tiers)
+
+    def vip_qualified_clause(self):
+        conditions = []
+        for tier in self.loyalty_tiers:
+            if tier.min_total_spent is not None:
+                conditions.append(User.total_spent >= tier.min_total_spent)
+            if tier.min_order_count is not None:
+                conditions.append(User.order_count >= tier.min_order_count)
+        return or_(*conditions) if conditions else false()
+
+    def tier_for(self, user):
+        """The best tier a VIP reaches; VIPs set by hand get the entry tier."""
+        if user.role != "vip":
+            return None
+        for tier in self.loyalty_tiers:
+            if tier_qualifies(tier, user):
+                return tier
+        return self.loyalty_tiers[-1]
+
+    # -- pricing ------------------------------------------------------------
+
+    def quote(self, user, items, now=None, tz=None):
+        """
+        Price `items` ([(dish, quantity), ...]) for `user` at `now` (naive
+        UTC; aware datetimes are converted).
+        Amounts are in cents; adjustments list every rule that changed the
+        price (negative amount = saving for the customer).
+        """
+
+        now = naive_utc(now) or datetime.utcnow()
+        local = now.replace(tzinfo=timezone.utc).astimezone(tz or timezone.utc)
+        weekday, minute = local.weekday(), local.hour * 60 + local.minute
+        slot = weekday * 24 + local.hour
+
+        adjustments = []
+
+        def adjust(rule, cents):
+            if cents:
+                adjustments.append(
+                    {"rule_id": rule.id, "name": rule.name, "kind": rule.kind, "amount_cents": cents}
+                )
+
+        quantities = Counter()
+        for dish, quantity in items:
+            quantities[dish.id] += quantity
+
+        unit_cents = {}
+        promos = {}
+        bundles = {}
+        for dish, _ in items:
+            if dish.id in unit_cents:
+                continue
+
+            active = [r for r in self.candidates(slot, dish.id) if _is_active(r, now, weekday, minute)]
+
+            unit = to_cents(dish.price)
+            timed = [r for r in active if r.kind == "time_of_day"]
+            if timed:
+                rule = max(timed, key=lambda r: (r.dish_id is not None, r.id))
+                changed = max(0, unit - self._saving(rule, unit))
+                adjust(rule, (changed - unit) * quantities[dish.id])
+                unit = changed
+            unit_cents[dish.id] = unit
+
+            promos[dish.id] = [r for r in active if r.kind == "dish_promo"]
+            for rule in active:
+                if rule.kind == "bundle":
+                    bundles[rule.id] = rule
+
+        subtotal = sum(unit_cents[dish.id] * quantity for dish, quantity in items)
+        discount = 0
+
+        # Bundles first (usually the bigger saving), best saving per bundle first
+        remaining = Counter(quantities)
+
+        def bundle_saving(rule):
+            return self._saving(rule, sum(unit_cents[d] for d in rule.bundle))
+
+        complete = [r for r in bundles.values() if all(d in unit_cents for d in r.bundle)]
+        for rule in sorted(complete, key=bundle_saving, reverse=True):
+            count = min(remaining[d] for d in rule.bundle)
+            if count <= 0:
+                continue
+            for d in rule.bundle:
+                remaining[d] -= count
+            saving = bundle_saving(rule) * count
+            discount += saving
+            adjust(rule, -saving)
+
+        # Then the single best promotion on each remaining unit
+        for dish_id, quantity in remaining.items():
+            if quantity <= 0 or not promos[dish_id]:
+                continue
+            unit = unit_cents[dish_id]
+            rule = max(promos[dish_id], key=lambda r: self._saving(r, unit))
+            saving = self._saving(rule, unit) * quantity
+            discount += saving
+            adjust(rule, -saving)
+
+        tier = self.tier_for(user)
+        if tier is not None:
+            saving = percent_of(subtotal - discount, tier.percent_off)
+            discount += saving
+            if saving:
+                adjustments.append(
+                    {"rule_id": tier.rule_id, "name": tier.name, "kind": "loyalty_tier", "amount_cents": -saving}
+                )
+
+        return Quote(
+            unit_cents=unit_cents,
+            subtotal_cents=subtotal,
+            discount_cents=discount,
+            total_cents=subtotal - discount,
+            tier=tier.name if tier is not None else None,
+            adjustments=adjustments,
+        )
+
+    @staticmethod
+    def _saving(rule, cents):
+        """What `rule` takes off an amount of `cents` (negative for surcharges)."""
+        if rule.percent_off is not None:
+            return percent_of(cents, rule.percent_off)
+        return min(rule.amount_cents or 0, cents)
+
+
+def compile_rules(rows):
+    """Build CompiledRules from PricingRule rows (or objects with the same fields)."""
+
+    rules = []
+    tiers = []
+    for row in rows:
+        if not row.is_active:
+            continue
+        if row.kind == "loyalty_tier":
+            tiers.append(
+                LoyaltyTier(
+                    rule_id=row.id,
+                    name=row.name,
+                    min_total_spent=row.min_total_spent,
+                    min_order_count=row.min_order_count,
+                    percent_off=row.percent_off or 0.0,
+                )
+            )
+            continue
+        rules.append(
+            CompiledRule(
+                id=row.id,
+                name=row.name,
+                kind=row.kind,
+                dish_id=row.dish_id,
+                bundle=parse_bundle(row.bundle_dish_ids),
+                percent_off=row.percent_off,
+                amount_cents=to_cents(row.amount_off) if row.amount_off is not None else None,
+                start_minute=row.start_minute,
+                end_minute=row.end_minute,
+                days_mask=row.days_mask,
+                valid_from=row.valid_from,
+                valid_until=row.valid_until,
+            )
+        )
+    return CompiledRules(rules, tiers)
+
+
+# ---------------------------------------------------------------------------
+# Per-worker cache
+# ---------------------------------------------------------------------------
+
+class RuleCache:
+    """The compiled rules of one app, recompiled when the table changes."""
+
+    def __init__(self, check_interval):
+        self.check_interval = check_interval
+        self.compiled = None
+        self._fingerprint = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self.compiled is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return self.compiled
+
+        with self._lock:
+            # count + newest updated_at changes on every insert, edit and delete
+            fingerprint = tuple(
+                db.session.execute(
+                    select(func.count(PricingRule.id), func.max(PricingRule.updated_at))
+                ).one()
+            )
+            if self.compiled is None or fingerprint != self._fingerprint:
+                self.compiled = compile_rules(db.session.query(PricingRule).all())
+                self._fingerprint = fingerprint
+            self._checked_at = time.monotonic()
+            return self.compiled
+
+    def invalidate(self):
+        self._checked_at = 0.0
+
+
+def init_pricing(app):
+    """
+    Settings (env vars of the same name override the defaults):
+      PRICING_RULES_CHECK_INTERVAL  seconds between rule change checks (default 5)
+      RESTAURANT_TIMEZONE           IANA name used for time windows (default UTC)
+    """
+
+    app.config.setdefault(
+        "PRICING_RULES_CHECK_INTERVAL",
+        float(os.environ.get("PRICING_RULES_CHECK_INTERVAL", DEFAULT_CHECK_INTERVAL)),
+    )
+    app.config.setdefault("RESTAURANT_TIMEZONE", RESTAURANT_TIMEZONE)
+
+    app.extensions["pricing"] = {
+        "cache": RuleCache(app.config["PRICING_RULES_CHECK_INTERVAL"]),
+        "tz": ZoneInfo(app.config["RESTAURANT_TIMEZONE"]),
+    }
+
+
+def restaurant_tz():
+    return current_app.extensions["pricing"]["tz"]
+
+
+def local_today():
+    """Today's date in restaurant local time."""
+    return datetime.now(restaurant_tz()).date()
+
+
+def current_rules():
+    return current_app.extensions["pricing"]["cache"].get()
+
+
+def invalidate_rules():
+    """Call after changing pricing_rule rows so this worker recompiles right away."""
+    current_app.extensions["pricing"]["cache"].invalidate()
+
+
+def quote_order(user, items, now=None):
+    """Price a cart with the current rules. See CompiledRules.quote()."""
+    return current_rules().quote(user, items, now=now, tz=restaurant_tz())
@@ -0,0 +1,347 @@
+"""
+Rate limiting and admission control for expensive endpoints.
+
+Two independent guards, applied as decorators:
+
+- @rate_limit: token buckets keyed per user_id and per client IP. Buckets
+  live in memory (per process) by default, or in a small SQLite file shared
+  by every gunicorn worker on the host (RATELIMIT_STORAGE_URL).
+- @concurrency_limit: caps how many requests of one kind run at once in a
+  worker (e.g. full-table admin scans). Excess requests are
+  rejected immediately instead of queueing behind the slow ones.
+
+The same storage also hands out named slots (acquire_slot / release_slot),
+which llm_scheduler.py uses to cap generations across every worker.
+
+Both answer with a fast 429 + Retry-After and bump the load-shedding
+counters exposed at /api/admin/load.
+"""
+
+import math
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import defaultdict
+from functools import wraps
+
+from flask import current_app, jsonify, request
+
+
+# How often each storage drops idle buckets, in seconds
+SWEEP_INTERVAL = 60
+
+
+class MemoryStorage:
+    """Token buckets in a dict. Limits apply per worker process."""
+
+    shared = False
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+        # Longest time any bucket needs to refill from empty; a bucket idle
+        # that long is full, which is the same as having no bucket at all
+        self._max_refill = 0.0
+        self._swept = time.monotonic()
+        self._slots = {}  # name -> {token: expires}
+
+    def _sweep(self, now):
+        idle_since = now - self._max_refill
+        for key in [k for k, (_, updated) in self._buckets.items() if updated < idle_since]:
+            del self._buckets[key]
+        self._swept = now
+
+    def take(self, key, rate, capacity, now=None):
+        """
+        Take one token from bucket `key` (refilled at `rate` tokens/sec, holding
+        at most `capacity`). Returns seconds to wait, 0 if allowed.
+        """
+
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            # Keys come from client input (user_id), so they must not pile up
+            self._max_refill = max(self._max_refill, capacity / rate)
+            if now - self._swept >= SWEEP_INTERVAL:
+                self._sweep(now)
+
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                return 0.0
+            self._buckets[key] = (tokens, now)
+            return (1 - tokens) / rate
+
+    def acquire_slot(self, name, limit, lease, now=None):
+        """
+        Take one of `limit` slots called `name`, held for at most `lease`
+        seconds. Returns a token for release_slot(), or None if all are taken.
+        """
+
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            held = self._slots.setdefault(name, {})
+            for token in [t for t, expires in held.items() if expires < now]:
+                del held[token]
+            if len(held) >= limit:
+                return None
+            token = uuid.uuid4().hex
+            held[token] = now + lease
+            return token
+
+    def release_slot(self, name, token):
+        with self._lock:
+            self._slots.get(name, {}).pop(token, None)
+
+
+class SQLiteStorage:
+    """
+    Token buckets in a SQLite file, shared by all worker processes on a host.
+
+    Kept separate from restaurant.db so limiter writes never contend with
+    order writes. Each take() is one short BEGIN IMMEDIATE transaction.
+    """
+
+    shared = True
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._max_refill = 0.0  # see MemoryStorage
+        self._swept = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_bucket ("
+                " key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS slot ("
+                " token TEXT PRIMARY KEY, name TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def take(self, key, rate, capacity, now=None):
+        # Wall clock, not monotonic: the value is shared between processes
+        now = time.time() if now is None else now
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated FROM rate_bucket WHERE key = ?", (key,)
+            ).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            tokens = min(capacity, tokens + max(0.0, now - updated) * rate)
+
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_bucket (key, tokens, updated) VALUES (?, ?, ?)",
+                (key, tokens, now),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        self._max_refill = max(self._max_refill, capacity / rate)
+        if now - self._swept >= SWEEP_INTERVAL:
+            self._swept = now
+            # Its own short transaction; idle buckets are full, so dropping them
+            # changes no limit
+            conn.execute("DELETE FROM rate_bucket WHERE updated < ?", (now - self._max_refill,))
+        return wait
+
+    def acquire_slot(self, name, limit, lease, now=None):
+        # Expired slots belong to workers that died mid-request
+        now = time.time() if now is None else now
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM slot WHERE name = ? AND expires < ?", (name, now))
+            (held,) = conn.execute(
+                "SELECT COUNT(*) FROM slot WHERE name = ?", (name,)
+            ).fetchone()
+            token = None
+            if held < limit:
+                token = uuid.uuid4().hex
+                conn.execute(
+                    "INSERT INTO slot (token, name, expires) VALUES (?, ?, ?)",
+                    (token, name, now + lease),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return token
+
+    def release_slot(self, name, token):
+        self._connect().execute("DELETE FROM slot WHERE token = ?", (token,))
+
+
+def storage_from_url(url):
+    """'memory://' or 'sqlite:///path/to/file.db'."""
+    if not url or url == "memory://":
+        return MemoryStorage()
+    if url.startswith("sqlite:///"):
+        return SQLiteStorage(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported RATELIMIT_STORAGE_URL: {url}")
+
+
+class LoadStats:
+    """Per-endpoint counters: admitted, rate limited, shed by concurrency caps."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = defaultdict(lambda: {"admitted": 0, "rate_limited": 0, "shed": 0})
+        self.in_flight = defaultdict(int)
+
+    def bump(self, name, field):
+        with self._lock:
+            self.counters[name][field] += 1
+
+    def enter(self, group):
+        with self._lock:
+            self.in_flight[group] += 1
+
+    def leave(self, group):
+        with self._lock:
+            self.in_flight[group] -= 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "endpoints": {name: dict(c) for name, c in self.counters.items()},
+                "in_flight": dict(self.in_flight),
+            }
+
+
+def init_rate_limiting(app):
+    """
+    Settings (env vars of the same name override the defaults):
+      RATELIMIT_ENABLED       "0" disables every limit (e.g. in tests)
+      RATELIMIT_STORAGE_URL   "memory://" (default) or "sqlite:///path"
+    """
+
+    app.config.setdefault(
+        "RATELIMIT_ENABLED", os.environ.get("RATELIMIT_ENABLED", "1") != "0"
+    )
+    app.config.setdefault(
+        "RATELIMIT_STORAGE_URL", os.environ.get("RATELIMIT_STORAGE_URL", "memory://")
+    )
+
+    app.extensions["ratelimit"] = {
+        "storage": storage_from_url(app.config["RATELIMIT_STORAGE_URL"]),
+        "stats": LoadStats(),
+        "semaphores": {},
+        "lock": threading.Lock(),
+    }
+
+
+def load_stats():
+    return current_app.extensions["ratelimit"]["stats"].snapshot()
+
+
+def too_many_requests(message, retry_after):
+    """429 + Retry-After (whole seconds, at least 1); the shape of every shed request."""
+    retry_after = max(1, math.ceil(retry_after))
+    response = jsonify({"error": message, "retry_after": retry_after})
+    response.status_code = 429
+    response.headers["Retry-After"] = str(retry_after)
+    return response
+
+
+def _request_user_id():
+    """user_id from the URL or JSON body, if the endpoint has one."""
+    view_args = request.view_args or {}
+    if "user_id" in view_args:
+        return str(view_args["user_id"])
+    data = request.get_json(silent=True)
+    if isinstance(data, dict) and data.get("user_id") is not None:
+        return str(data["user_id"])
+    return None
+
+
+def rate_limit(name, per_user=None, per_ip=None):
+    """
+    Token-bucket limit for a view. `per_user` / `per_ip` are (requests, seconds)
+    tuples, e.g. per_user=(10, 60) allows a burst of 10 and refills at 10/minute.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            state = current_app.extensions["ratelimit"]
+            if not current_app.config["RATELIMIT_ENABLED"]:
+                return view(*args, **kwargs)
+
+            checks = []
+            user_id = _request_user_id() if per_user else None
+            if user_id is not None:
+                checks.append((f"{name}:user:{user_id}", per_user))
+            if per_ip:
+                checks.append((f"{name}:ip:{request.remote_addr}", per_ip))
+
+            for key, (requests_allowed, seconds) in checks:
+                wait = state["storage"].take(
+                    key, rate=requests_allowed / seconds, capacity=requests_allowed
+                )
+                if wait > 0:
+                    state["stats"].bump(name, "rate_limited")
+                    return too_many_requests("Rate limit exceeded", wait)
+
+            state["stats"].bump(name, "admitted")
+            return view(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def concurrency_limit(group, max_in_flight, retry_after=5):
+    """
+    Allow at most `max_in_flight` concurrent requests in `group` per worker
+    process; reject the rest right away with 429. Views sharing a group share
+    the cap.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            state = current_app.extensions["ratelimit"]
+            if not current_app.config["RATELIMIT_ENABLED"]:
+                return view(*args, **kwargs)
+
+            with state["lock"]:
+                semaphore = state["semaphores"].setdefault(
+                    group, threading.BoundedSemaphore(max_in_flight)
+                )
+
+            if not semaphore.acquire(blocking=False):
+                state["stats"].bump(group, "shed")
+                return too_many_requests("Server busy, try again shortly", retry_after)
+
+            state["stats"].bump(group, "admitted")
+            state["stats"].enter(group)
+            try:
+                return view(*args, **kwargs)
+            finally:
+                state["stats"].leave(group)
+                semaphore.release()
+
+        return wrapper
+
+    return decorator
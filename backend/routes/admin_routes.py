@@ -1,20 +1,54 @@
+import math
+import os
+from datetime import date, timedelta
+
 from flask import Blueprint, jsonify, request
+from sqlalchemy.orm import joinedload
 
+from cancellation import cancel_orders, cancellable_order_ids
+from delivery import complete_batch_if_done
+from dispatch import ORDER_STATUSES, InvalidTransition, check_transition, transition
 from extensions import db
-from models import User, Order
+from http_cache import (
+    append_only_validators,
+    apply_validators,
+    collection_validators,
+    combine_validators,
+    not_modified,
+)
+from ledger import balance_cents, balances_for, from_cents, reconcile, take_snapshots
+from llm_scheduler import llm_scheduler
+from models import User, Order, LedgerEntry, DemandForecast
+from pricing import local_today
+from ratelimit import concurrency_limit, load_stats, rate_limit
 
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/api/admin")
 
+# Concurrent full-table admin listings per worker
+ADMIN_HEAVY_MAX_IN_FLIGHT = int(os.environ.get("ADMIN_HEAVY_MAX_IN_FLIGHT", "2"))
+
 
 @admin_bp.route("/users", methods=["GET"])
+@rate_limit("admin_users", per_ip=(60, 60))
+@concurrency_limit("admin_heavy", ADMIN_HEAVY_MAX_IN_FLIGHT)
 def list_users():
     """
     List all users with key stats.
     WARNING: In a real app this must be protected (manager/admin only).
     """
 
+    # Balances change through ledger inserts, which don't touch the user rows
+    validators = combine_validators(
+        collection_validators(User.query, User.created_at, User.updated_at),
+        append_only_validators(LedgerEntry.query, LedgerEntry.id, LedgerEntry.created_at),
+    )
+    cached = not_modified(validators)
+    if cached:
+        return cached
+
     users = User.query.order_by(User.id.asc()).all()
+    balances = balances_for()
     data = []
 
     for u in users:
@@ -24,7 +58,7 @@ def list_users():
                 "name": u.name,
                 "email": u.email,
                 "role": u.role,
-                "deposit_balance": u.deposit_balance,
+                "deposit_balance": from_cents(balances.get(u.id, 0)),
                 "total_spent": u.total_spent,
                 "order_count": u.order_count,
                 "warnings": u.warnings,
@@ -34,16 +68,23 @@ def list_users():
             }
         )
 
-    return jsonify({"users": data})
+    return apply_validators(jsonify({"users": data}), validators)
 
 
 @admin_bp.route("/orders", methods=["GET"])
+@rate_limit("admin_orders", per_ip=(60, 60))
+@concurrency_limit("admin_heavy", ADMIN_HEAVY_MAX_IN_FLIGHT)
 def list_all_orders():
     """
     List all orders in the system.
     WARNING: In a real app this must be protected (manager/admin only).
     """
 
+    validators = collection_validators(Order.query, Order.created_at, Order.updated_at)
+    cached = not_modified(validators)
+    if cached:
+        return cached
+
     orders = Order.query.order_by(Order.created_at.desc()).all()
     data = []
 
@@ -67,7 +108,7 @@ def list_all_orders():
             }
         )
 
-    return jsonify({"orders": data})
+    return apply_validators(jsonify({"orders": data}), validators)
 
 
 @admin_bp.route("/users/<int:user_id>/status", methods=["PATCH"])
@@ -107,7 +148,7 @@ def update_user_status(user_id):
                 "name": user.name,
                 "email": user.email,
                 "role": user.role,
-                "deposit_balance": user.deposit_balance,
+                "deposit_balance": from_cents(balance_cents(user.id)),
                 "total_spent": user.total_spent,
                 "order_count": user.order_count,
                 "warnings": user.warnings,
@@ -127,8 +168,13 @@ def update_order_status(order_id):
 
     Expected JSON body:
     {
-      "status": "pending" | "paid" | "preparing" | "on_the_way" | "delivered" | "cancelled"
+      "status": "pending" | "paid" | "preparing" | "ready" | "on_the_way" | "delivered" | "cancelled"
     }
+
+    Only transitions allowed by dispatch.ORDER_TRANSITIONS are accepted;
+    anything else returns 409. Cancelling refunds the customer and reverses
+    their stats (see cancellation.py); delivering the last order of a
+    delivery batch completes the batch, freeing its driver.
     """
 
     order = Order.query.get(order_id)
@@ -141,24 +187,31 @@ def update_order_status(order_id):
     if not new_status:
         return jsonify({"error": "status is required"}), 400
 
-    allowed_statuses = {
-      "pending",
-      "paid",
-      "preparing",
-      "on_the_way",
-      "delivered",
-      "cancelled",
-    }
-
-    if new_status not in allowed_statuses:
+    if new_status not in ORDER_STATUSES:
         return jsonify(
             {
-                "error": f"Invalid status. Must be one of {sorted(list(allowed_statuses))}."
+                "error": f"Invalid status. Must be one of {sorted(list(ORDER_STATUSES))}."
             }
         ), 400
 
-    order.status = new_status
-    db.session.commit()
+    try:
+        if new_status == "cancelled":
+            check_transition(order.status, new_status)
+        else:
+            transition(order, new_status)
+    except InvalidTransition as e:
+        return jsonify({"error": str(e), "current_status": order.status}), 409
+
+    if new_status == "cancelled":
+        summary = cancel_orders([order.id])
+        if not summary["cancelled"]:
+            # Someone else moved the order on between our read and the update
+            return jsonify({"error": "Order can no longer be cancelled"}), 409
+    else:
+        if order.delivery_batch:
+            # Same bookkeeping as the driver's drop-off confirmation
+            complete_batch_if_done(order.delivery_batch)
+        db.session.commit()
 
     return jsonify(
         {
@@ -184,6 +237,51 @@ def update_order_status(order_id):
 
 
 
+@admin_bp.route("/orders/cancel", methods=["POST"])
+def bulk_cancel_orders():
+    """
+    Cancel many orders at once (e.g. kitchen outage), refunding customers and
+    reversing their stats in set-based batches.
+
+    JSON body, one of:
+    {
+      "order_ids": [1, 2, 3]
+    }
+    {
+      "statuses": ["paid", "preparing"]   # every order currently in these statuses
+    }
+    """
+
+    data = request.get_json() or {}
+    order_ids = data.get("order_ids")
+    statuses = data.get("statuses")
+
+    if order_ids is None and statuses is None:
+        return jsonify({"error": "order_ids or statuses is required"}), 400
+
+    if order_ids is not None:
+        if not isinstance(order_ids, list) or not all(isinstance(i, int) for i in order_ids):
+            return jsonify({"error": "order_ids must be a list of integers"}), 400
+    else:
+        if not isinstance(statuses, list) or not set(statuses) <= ORDER_STATUSES:
+            return jsonify(
+                {"error": f"statuses must be a list from {sorted(list(ORDER_STATUSES))}."}
+            ), 400
+        order_ids = cancellable_order_ids(statuses)
+
+    summary = cancel_orders(order_ids)
+
+    return jsonify(
+        {
+            "message": f"Cancelled {len(summary['cancelled'])} order(s)",
+            "cancelled": summary["cancelled"],
+            "skipped": summary["skipped"],
+            "refunded": from_cents(summary["refunded_cents"]),
+            "demoted_user_ids": summary["demoted_user_ids"],
+        }
+    )
+
+
 @admin_bp.route("/users/<int:user_id>/role", methods=["PATCH"])
 def update_user_role(user_id):
     """
@@ -227,7 +325,7 @@ def update_user_role(user_id):
                 "name": user.name,
                 "email": user.email,
                 "role": user.role,
-                "deposit_balance": user.deposit_balance,
+                "deposit_balance": from_cents(balance_cents(user.id)),
                 "total_spent": user.total_spent,
                 "order_count": user.order_count,
                 "warnings": user.warnings,
@@ -237,3 +335,92 @@ def update_user_role(user_id):
             },
         }
     )
+
+
+@admin_bp.route("/wallet/snapshots", methods=["POST"])
+def snapshot_balances():
+    """
+    Write balance snapshots for users with enough new ledger entries.
+    Normally run periodically via `flask --app app wallet-snapshot`.
+
+    Optional JSON body: {"min_entries": 50}
+    """
+
+    data = request.get_json(silent=True) or {}
+    min_entries = data.get("min_entries", 50)
+
+    if not isinstance(min_entries, int) or min_entries < 1:
+        return jsonify({"error": "min_entries must be an integer >= 1"}), 400
+
+    written = take_snapshots(min_entries=min_entries)
+    return jsonify({"snapshots_written": written})
+
+
+@admin_bp.route("/wallet/reconcile", methods=["GET"])
+def reconcile_balances():
+    """
+    Check every user's derived balance against the full ledger.
+    WARNING: In a real app this must be protected (manager/admin only).
+    """
+
+    report = reconcile()
+    status = 200 if not report["mismatches"] else 409
+    return jsonify(report), status
+
+
+@admin_bp.route("/load", methods=["GET"])
+def get_load_stats():
+    """
+    Load-shedding counters for this worker: admitted / rate-limited / shed
+    requests per endpoint and current in-flight counts per concurrency group,
+    plus the assistant's LLM queue under "llm".
+    """
+
+    return jsonify({**load_stats(), "llm": llm_scheduler().snapshot()})
+
+
+@admin_bp.route("/forecast", methods=["GET"])
+def get_forecast():
+    """
+    Per-dish demand forecast for one day, busiest dishes first, as written by
+    the offline job (`flask --app app forecast`).
+
+    Query params: date (YYYY-MM-DD, default tomorrow in restaurant time).
+    """
+
+    try:
+        target = date.fromisoformat(request.args["date"]) if request.args.get("date") else None
+    except ValueError:
+        return jsonify({"error": "date must be YYYY-MM-DD"}), 400
+    target = target or local_today() + timedelta(days=1)
+
+    rows = (
+        DemandForecast.query.filter_by(target_date=target)
+        .options(joinedload(DemandForecast.dish))
+        .order_by(DemandForecast.total.desc(), DemandForecast.dish_id.asc())
+        .all()
+    )
+    if not rows:
+        return jsonify(
+            {"error": f"No forecast for {target.isoformat()}; run `flask --app app forecast`"}
+        ), 404
+
+    return jsonify(
+        {
+            "date": target.isoformat(),
+            "generated_at": rows[0].generated_at.isoformat(),
+            "dishes": [
+                {
+                    "dish_id": f.dish_id,
+                    "name": f.dish.name,
+                    "expected_quantity": f.total,
+                    # Whole portions to prep ahead
+                    "prep_quantity": math.ceil(f.total - 1e-9),
+                    "hourly": [float(q) for q in f.hourly.split(",")],
+                    "model": f.model,
+                    "backtest_mae": f.backtest_mae,
+                }
+                for f in rows
+            ],
+        }
+    )
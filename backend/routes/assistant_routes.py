@@ -1,9 +1,14 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 import os
+import time
 import requests
+from sqlalchemy import func
 
 from extensions import db
+from intent import DISH_TERMS, parse_intent
+from llm_scheduler import QueueFull, QueueTimeout, llm_scheduler, priority_for_role
 from models import User, Dish
+from ratelimit import rate_limit, too_many_requests
 
 assistant_bp = Blueprint("assistant", __name__, url_prefix="/api/assistant")
 
@@ -11,36 +16,238 @@ assistant_bp = Blueprint("assistant", __name__, url_prefix="/api/assistant")
 OLLAMA_URL = os.environ.get("OLLAMA_URL", "http://localhost:11434")
 OLLAMA_MODEL = os.environ.get("OLLAMA_MODEL", "phi3")  # or "mistral", "llama3", etc.
 
+# Keep the model, and with it the cached prompt prefix, loaded between requests
+OLLAMA_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+# Fixed context size: a different num_ctx per request makes Ollama reload the model
+OLLAMA_NUM_CTX = int(os.environ.get("OLLAMA_NUM_CTX", "4096"))
+
+# Cheapest N dishes shown to the model
+MENU_CONTEXT_DISHES = 20
+
+# The system message is this preamble plus the menu block, byte-identical for
+# every user until the menu changes, so Ollama can reuse the evaluated prefix
+# and only process the short per-request user message. Anything that varies
+# per request (role, message) must go in the user message.
+ASSISTANT_PREAMBLE = """You are an AI assistant for a restaurant ordering system.
+Each request gives the customer's role and what they asked for.
+If the role is not 'vip', do NOT recommend VIP-only dishes.
+Based on the menu and their role, recommend 2-5 dishes that fit their request.
+Explain your reasoning in a friendly way, and clearly mention dish names and prices
+so the frontend can show them. Keep the answer concise."""
+
+# One connection pool for all calls to the model server
+_http = requests.Session()
+
+# Preference keywords scored by rank_dishes (+2 when the dish matches)
+PREFERENCE_TERMS = {
+    keyword: DISH_TERMS[keyword] for keyword in ("spicy", "vegan", "fish", "meat", "rice")
+}
 
-def call_ollama_llm(prompt: str) -> str:
+
+def ollama_chat(messages):
     """
-    Call a local Ollama model via its HTTP API.
+    Call a local Ollama model via its HTTP API and return the whole response
+    (message plus prompt_eval_count / *_duration stats).
     """
 
     url = f"{OLLAMA_URL}/api/chat"
     payload = {
         "model": OLLAMA_MODEL,
-        "messages": [
-            {"role": "user", "content": prompt}
-        ],
+        "messages": messages,
+        "stream": False,
+        "keep_alive": OLLAMA_KEEP_ALIVE,
+        "options": {"num_ctx": OLLAMA_NUM_CTX},
     }
 
-    resp = requests.post(url, json=payload, timeout=120)
+    resp = _http.post(url, json=payload, timeout=120)
     resp.raise_for_status()
-    data = resp.json()
+    return resp.json()
 
-    # Ollama /api/chat returns: {"model": "...", "message": {"role": "...", "content": "..."}, ...}
-    try:
-        return data["message"]["content"]
-    except Exception:
-        return str(data)
+
+def menu_system_prompt():
+    """
+    Preamble + menu block, rebuilt only when the dish table changes so the
+    text stays byte-identical between requests.
+    """
+
+    cache = current_app.extensions.setdefault("assistant_menu", {"fingerprint": None})
+    fingerprint = tuple(
+        db.session.query(func.count(Dish.id), func.max(Dish.updated_at)).one()
+    )
+    if cache["fingerprint"] != fingerprint:
+        dishes = (
+            Dish.query.order_by(Dish.price.asc(), Dish.id.asc()).limit(MENU_CONTEXT_DISHES).all()
+        )
+
+        menu_lines = []
+        for d in dishes:
+            vip_tag = " (VIP only)" if d.is_vip_only else ""
+            menu_lines.append(f"- {d.name}{vip_tag}: ${d.price:.2f} — {d.description}")
+
+        menu_text = "\n".join(menu_lines) if menu_lines else "No dishes available."
+        cache["text"] = (
+            f"{ASSISTANT_PREAMBLE}\n\nMenu (including VIP-only dishes):\n{menu_text}"
+        )
+        cache["fingerprint"] = fingerprint
+
+    return cache["text"]
+
+
+def rank_dishes(
+    user,
+    preference="",
+    min_price=None,
+    max_price=None,
+    required=(),
+    sort=None,
+    max_results=5,
+):
+    """
+    Deterministic recommender behind /recommend and the rules path of /chat.
+
+    `required` is a list of term tuples (see intent.DISH_TERMS); a dish must
+    contain one term of every tuple. `sort` is None (best score, then
+    cheapest), "price_asc" or "price_desc". Returns [(score, dish)].
+    """
+
+    # Base query: all dishes
+    query = Dish.query
+
+    # Filter by VIP if user is not VIP
+    if user.role != "vip":
+        query = query.filter_by(is_vip_only=False)
+
+    # Filter by budget if provided
+    if min_price is not None:
+        query = query.filter(Dish.price >= min_price)
+    if max_price is not None:
+        query = query.filter(Dish.price <= max_price)
+
+    recommendations = []
+
+    for d in query.all():
+        text = f"{d.name} {d.description or ''}".lower()
+
+        if not all(any(term in text for term in terms) for terms in required):
+            continue
+
+        score = 0
+
+        # Simple scoring based on preference keywords in name/description
+        for keyword, terms in PREFERENCE_TERMS.items():
+            if keyword in preference and any(term in text for term in terms):
+                score += 2
+
+        # Slight preference for cheaper dishes
+        score += max(0, 5 - int(d.price // 5))
+
+        recommendations.append((score, d))
+
+    if sort == "price_asc":
+        recommendations.sort(key=lambda pair: (pair[1].price, -pair[0]))
+    elif sort == "price_desc":
+        recommendations.sort(key=lambda pair: (-pair[1].price, -pair[0]))
+    else:
+        # Sort by score desc, then by price asc
+        recommendations.sort(key=lambda pair: (-pair[0], pair[1].price))
+
+    # Take top N
+    return recommendations[: max_results or 5]
+
+
+def _dish_json(score, d):
+    return {
+        "id": d.id,
+        "name": d.name,
+        "description": d.description,
+        "price": d.price,
+        "is_vip_only": d.is_vip_only,
+        "score": score,
+    }
+
+
+def _rules_answer(intent, recommendations):
+    """Plain-text answer for a query the rules path handled."""
+
+    what = (" or " if intent.match_any else " ").join(intent.keywords) + " dishes"
+    if intent.sort == "price_asc":
+        what = f"cheapest {what}"
+    elif intent.sort == "price_desc":
+        what = f"most expensive {what}"
+
+    if intent.min_price is not None and intent.max_price is not None:
+        what += f" between ${intent.min_price:.2f} and ${intent.max_price:.2f}"
+    elif intent.max_price is not None:
+        what += f" up to ${intent.max_price:.2f}"
+    elif intent.min_price is not None:
+        what += f" from ${intent.min_price:.2f}"
+
+    lines = [f"Here are the {what} on our menu:"]
+    for _, d in recommendations:
+        vip_tag = " (VIP only)" if d.is_vip_only else ""
+        lines.append(f"- {d.name}{vip_tag}: ${d.price:.2f} — {d.description}")
+    return "\n".join(lines)
+
+
+def _answer_with_rules(user, intent, started):
+    """
+    Answer a confidently parsed query from the menu. Returns the response,
+    or None when nothing matches (the LLM may still suggest alternatives).
+    """
+
+    recommendations = rank_dishes(
+        user,
+        preference=" ".join(intent.keywords),
+        min_price=intent.min_price,
+        max_price=intent.max_price,
+        required=(
+            [tuple(term for k in intent.keywords for term in DISH_TERMS[k])]
+            if intent.match_any
+            else [DISH_TERMS[k] for k in intent.keywords]
+        ),
+        sort=intent.sort,
+        max_results=intent.max_results,
+    )
+    if not recommendations:
+        return None
+
+    took_ms = round((time.monotonic() - started) * 1000, 1)
+
+    # What an LLM answer has been costing this worker
+    llm = llm_scheduler().snapshot()
+    saved_ms = (
+        round(llm["avg_queue_wait_ms"] + llm["avg_generation_ms"] - took_ms, 1)
+        if llm["completed"]
+        else None
+    )
+    current_app.logger.info(
+        "assistant route=rules user=%s slots=%s took_ms=%s saved_ms=%s",
+        user.id, intent._asdict(), took_ms, saved_ms,
+    )
+
+    return jsonify(
+        {
+            "answer": _rules_answer(intent, recommendations),
+            "user_role": user.role,
+            "route": "rules",
+            "recommendations": [_dish_json(score, d) for score, d in recommendations],
+            "timing": {"total_ms": took_ms, "estimated_saved_ms": saved_ms},
+        }
+    )
 
 
 @assistant_bp.route("/chat", methods=["POST"])
+@rate_limit("assistant_chat", per_user=(6, 60), per_ip=(30, 60))
 def chat_with_assistant():
     """
     LLM-based assistant using Ollama.
 
+    Structured queries ("vegan under $15", "cheapest fish dish") are parsed
+    by intent.py and answered straight from the menu with rank_dishes. Only
+    open-ended requests reach the model, through the LLM scheduler
+    (llm_scheduler.py): VIPs are served first and no more generations run at
+    once than the model server has slots (OLLAMA_NUM_PARALLEL).
+
     Expected JSON body:
     {
       "user_id": 1,
@@ -58,6 +265,8 @@ def chat_with_assistant():
     if not user_message:
         return jsonify({"error": "message is required"}), 400
 
+    started = time.monotonic()
+
     user = User.query.get(user_id)
     if not user:
         return jsonify({"error": "User not found"}), 404
@@ -65,36 +274,38 @@ def chat_with_assistant():
     if user.is_blacklisted or not user.is_active:
         return jsonify({"error": "User is not allowed to use the assistant"}), 403
 
-    # Fetch some menu context for the model
-    dishes = Dish.query.order_by(Dish.price.asc()).limit(20).all()
-
-    menu_lines = []
-    for d in dishes:
-        vip_tag = " (VIP only)" if d.is_vip_only else ""
-        menu_lines.append(f"- {d.name}{vip_tag}: ${d.price:.2f} — {d.description}")
-
-    menu_text = "\n".join(menu_lines) if menu_lines else "No dishes available."
-
-    # Build the prompt for the LLM
-    prompt = f"""
-You are an AI assistant for a restaurant ordering system.
-You see the following menu (including VIP-only dishes):
-
-{menu_text}
+    intent = parse_intent(user_message)
+    if intent.confident:
+        response = _answer_with_rules(user, intent, started)
+        if response is not None:
+            return response
+        reason = "no_matches"
+    else:
+        reason = "open_ended"
+    current_app.logger.info(
+        "assistant route=llm user=%s reason=%s unparsed=%s", user_id, reason, intent.unparsed
+    )
 
-The user has the following role: {user.role}.
-If the user is not 'vip', do NOT recommend VIP-only dishes.
+    messages = [
+        {"role": "system", "content": menu_system_prompt()},
+        {
+            "role": "user",
+            "content": f"Customer role: {user.role}\nRequest: \"\"\"{user_message}\"\"\"",
+        },
+    ]
 
-The user says:
-\"\"\"{user_message}\"\"\".
-
-Based on the menu and their role, recommend 2-5 dishes that fit their request.
-Explain your reasoning in a friendly way, and clearly mention dish names and prices
-so the frontend can show them. Keep the answer concise.
-"""
+    # Don't hold a database connection while waiting for the model
+    user_role = user.role
+    db.session.remove()
 
     try:
-        llm_answer = call_ollama_llm(prompt)
+        result, timing = llm_scheduler().run(
+            lambda: ollama_chat(messages), priority=priority_for_role(user_role)
+        )
+    except QueueFull:
+        return too_many_requests("The assistant is busy, try again shortly", 10)
+    except QueueTimeout:
+        return too_many_requests("The assistant is busy, try again shortly", 5)
     except Exception as e:
         return jsonify(
             {
@@ -103,10 +314,27 @@ so the frontend can show them. Keep the answer concise.
             }
         ), 500
 
+    try:
+        llm_answer = result["message"]["content"]
+    except Exception:
+        llm_answer = str(result)
+
+    timings = {
+        "queue_wait_ms": round(timing.queue_wait * 1000, 1),
+        "generation_ms": round(timing.generation * 1000, 1),
+        # Tokens Ollama had to evaluate; small when the cached prefix was reused
+        "prompt_eval_count": result.get("prompt_eval_count"),
+        "prompt_eval_ms": round(result.get("prompt_eval_duration", 0) / 1e6, 1),
+        "eval_ms": round(result.get("eval_duration", 0) / 1e6, 1),
+    }
+    current_app.logger.info("assistant chat user=%s role=%s %s", user_id, user_role, timings)
+
     return jsonify(
         {
             "answer": llm_answer,
-            "user_role": user.role,
+            "user_role": user_role,
+            "route": "llm",
+            "timing": timings,
         }
     )
 
@@ -142,66 +370,16 @@ def recommend_dishes():
     if user.is_blacklisted or not user.is_active:
         return jsonify({"error": "User is not allowed to place orders"}), 403
 
-    # Base query: all dishes
-    query = Dish.query
-
-    # Filter by VIP if user is not VIP
-    if user.role != "vip":
-        query = query.filter_by(is_vip_only=False)
-
-    dishes = query.all()
-
-    # In-memory filtering / scoring
-    recommendations = []
-
-    for d in dishes:
-        # Filter by budget if provided
-        if max_price is not None:
-            try:
-                if d.price > float(max_price):
-                    continue
-            except ValueError:
-                pass  # ignore bad number, just don't filter
-
-        score = 0
-
-        # Simple scoring based on preference keywords in name/description
-        text = f"{d.name} {d.description or ''}".lower()
-
-        if "spicy" in preference and "spicy" in text:
-            score += 2
-        if "vegan" in preference and "vegan" in text:
-            score += 2
-        if "fish" in preference and "fish" in text:
-            score += 2
-        if "meat" in preference and ("beef" in text or "chicken" in text or "meat" in text):
-            score += 2
-        if "rice" in preference and "rice" in text:
-            score += 2
-
-        # Slight preference for cheaper dishes
-        score += max(0, 5 - int(d.price // 5))
-
-        recommendations.append((score, d))
-
-    # Sort by score desc, then by price asc
-    recommendations.sort(key=lambda pair: (-pair[0], pair[1].price))
-
-    # Take top N
-    recommendations = recommendations[: max_results or 5]
+    budget = None
+    if max_price is not None:
+        try:
+            budget = float(max_price)
+        except (TypeError, ValueError):
+            pass  # ignore bad number, just don't filter
 
-    result_dishes = []
-    for score, d in recommendations:
-        result_dishes.append(
-            {
-                "id": d.id,
-                "name": d.name,
-                "description": d.description,
-                "price": d.price,
-                "is_vip_only": d.is_vip_only,
-                "score": score,
-            }
-        )
+    recommendations = rank_dishes(
+        user, preference=preference, max_price=budget, max_results=max_results
+    )
 
     message_parts = []
     if max_price is not None:
@@ -217,6 +395,6 @@ def recommend_dishes():
         {
             "message": summary,
             "user_role": user.role,
-            "recommendations": result_dishes,
+            "recommendations": [_dish_json(score, d) for score, d in recommendations],
         }
     )
@@ -0,0 +1,117 @@
+from flask import Blueprint, jsonify, request
+
+from delivery import (
+    DEFAULT_CAPACITY,
+    DEFAULT_TIME_BUDGET,
+    PlanningConflict,
+    assign_delivery_batches,
+    complete_batch_if_done,
+    current_batch,
+)
+from dispatch import InvalidTransition, transition
+from extensions import db
+from models import User, Order
+
+delivery_bp = Blueprint("delivery", __name__, url_prefix="/api/delivery")
+
+
+def _batch_json(batch):
+    return {
+        "id": batch.id,
+        "driver_id": batch.driver_id,
+        "status": batch.status,
+        "route_km": batch.route_km,
+        "created_at": batch.created_at.isoformat(),
+        "stops": [
+            {
+                "stop": o.delivery_stop,
+                "order_id": o.id,
+                "status": o.status,
+                "address": o.delivery_address,
+                "lat": o.delivery_lat,
+                "lng": o.delivery_lng,
+            }
+            for o in batch.orders
+        ],
+    }
+
+
+def _get_driver(driver_id):
+    """Return (driver, error_response)."""
+    driver = User.query.get(driver_id)
+    if not driver or driver.role != "delivery":
+        return None, (jsonify({"error": "Driver not found"}), 404)
+    if not driver.is_active:
+        return None, (jsonify({"error": "Driver is not active"}), 403)
+    return driver, None
+
+
+@delivery_bp.route("/batches/plan", methods=["POST"])
+def plan_batches():
+    """
+    Group ready orders into batches and assign them to available drivers.
+    WARNING: In a real app this must be protected (manager only).
+
+    Optional JSON body:
+    {
+      "capacity": 5,          # max orders per driver
+      "time_budget_ms": 200   # route optimisation budget
+    }
+    """
+
+    data = request.get_json(silent=True) or {}
+
+    try:
+        capacity = int(data.get("capacity", DEFAULT_CAPACITY))
+        time_budget = float(data.get("time_budget_ms", DEFAULT_TIME_BUDGET * 1000)) / 1000
+    except (TypeError, ValueError):
+        return jsonify({"error": "capacity and time_budget_ms must be numbers"}), 400
+
+    if capacity <= 0 or time_budget <= 0:
+        return jsonify({"error": "capacity and time_budget_ms must be > 0"}), 400
+
+    try:
+        batches = assign_delivery_batches(capacity=capacity, time_budget=time_budget)
+    except PlanningConflict as e:
+        return jsonify({"error": str(e)}), 409
+
+    return jsonify({"batches": [_batch_json(b) for b in batches]}), 201
+
+
+@delivery_bp.route("/drivers/<int:driver_id>/batch", methods=["GET"])
+def get_driver_batch(driver_id):
+    """The driver's current batch with stops in route order."""
+
+    driver, error = _get_driver(driver_id)
+    if error:
+        return error
+
+    batch = current_batch(driver.id)
+    if not batch:
+        return jsonify({"batch": None})
+
+    return jsonify({"batch": _batch_json(batch)})
+
+
+@delivery_bp.route("/drivers/<int:driver_id>/orders/<int:order_id>/delivered", methods=["POST"])
+def mark_delivered(driver_id, order_id):
+    """Driver confirms a drop-off. Completes the batch after the last stop."""
+
+    driver, error = _get_driver(driver_id)
+    if error:
+        return error
+
+    batch = current_batch(driver.id)
+    order = Order.query.get(order_id)
+    if not batch or not order or order.delivery_batch_id != batch.id:
+        return jsonify({"error": "Order not found in this driver's batch"}), 404
+
+    try:
+        transition(order, "delivered")
+    except InvalidTransition as e:
+        return jsonify({"error": str(e), "current_status": order.status}), 409
+
+    complete_batch_if_done(batch)
+    db.session.commit()
+
+    return jsonify({"message": "Order delivered", "batch": _batch_json(batch)})
@@ -0,0 +1,107 @@
+from flask import Blueprint, jsonify, request
+
+from dispatch import (
+    InvalidTransition,
+    chef_loads,
+    chef_queue,
+    claim_next_order,
+    dispatch_pending,
+    transition,
+)
+from extensions import db
+from models import User, Order
+
+kitchen_bp = Blueprint("kitchen", __name__, url_prefix="/api/kitchen")
+
+
+def _order_json(order):
+    return {
+        "id": order.id,
+        "customer_id": order.customer_id,
+        "status": order.status,
+        "assigned_chef_id": order.assigned_chef_id,
+        "total_price": order.total_price,
+        "created_at": order.created_at.isoformat(),
+        "items": [
+            {
+                "dish_id": item.dish_id,
+                "quantity": item.quantity,
+            }
+            for item in order.items
+        ],
+    }
+
+
+def _get_chef(chef_id):
+    """Return (chef, error_response)."""
+    chef = User.query.get(chef_id)
+    if not chef or chef.role != "chef":
+        return None, (jsonify({"error": "Chef not found"}), 404)
+    if not chef.is_active:
+        return None, (jsonify({"error": "Chef is not active"}), 403)
+    return chef, None
+
+
+@kitchen_bp.route("/dispatch", methods=["POST"])
+def run_dispatch():
+    """
+    Assign all paid, unassigned orders to chefs.
+    WARNING: In a real app this must be protected (manager only).
+    """
+
+    assigned = dispatch_pending()
+    return jsonify({"assigned": assigned, "chef_loads": chef_loads()})
+
+
+@kitchen_bp.route("/chefs/<int:chef_id>/queue", methods=["GET"])
+def get_chef_queue(chef_id):
+    """Orders waiting for this chef, highest priority first."""
+
+    chef, error = _get_chef(chef_id)
+    if error:
+        return error
+
+    limit = request.args.get("limit", 50, type=int)
+    orders = chef_queue(chef.id, limit=max(1, min(limit, 200)))
+
+    return jsonify({"chef_id": chef.id, "orders": [_order_json(o) for o in orders]})
+
+
+@kitchen_bp.route("/chefs/<int:chef_id>/claim", methods=["POST"])
+def claim_order(chef_id):
+    """
+    Claim the next order in this chef's queue and move it to 'preparing'.
+    Returns 204 if there is nothing to claim.
+    """
+
+    chef, error = _get_chef(chef_id)
+    if error:
+        return error
+
+    order = claim_next_order(chef.id)
+    if order is None:
+        return "", 204
+
+    return jsonify({"message": "Order claimed", "order": _order_json(order)})
+
+
+@kitchen_bp.route("/chefs/<int:chef_id>/orders/<int:order_id>/ready", methods=["POST"])
+def mark_ready(chef_id, order_id):
+    """Chef marks an order they are preparing as ready for delivery."""
+
+    chef, error = _get_chef(chef_id)
+    if error:
+        return error
+
+    order = Order.query.get(order_id)
+    if not order or order.assigned_chef_id != chef.id:
+        return jsonify({"error": "Order not found for this chef"}), 404
+
+    try:
+        transition(order, "ready")
+    except InvalidTransition as e:
+        return jsonify({"error": str(e), "current_status": order.status}), 409
+
+    db.session.commit()
+
+    return jsonify({"message": "Order ready", "order": _order_json(order)})
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 
 from extensions import db
+from http_cache import apply_validators, collection_validators, not_modified
 from models import Dish
 
 menu_bp = Blueprint("menu", __name__, url_prefix="/api/menu")
@@ -8,6 +9,11 @@ menu_bp = Blueprint("menu", __name__, url_prefix="/api/menu")
 
 @menu_bp.route("/", methods=["GET"])
 def get_menu():
+    validators = collection_validators(Dish.query, Dish.updated_at)
+    cached = not_modified(validators)
+    if cached:
+        return cached
+
     dishes = Dish.query.all()
 
     data = []
@@ -23,7 +29,7 @@ def get_menu():
             }
         )
 
-    return jsonify({"dishes": data})
+    return apply_validators(jsonify({"dishes": data}), validators)
 
 
 @menu_bp.route("/", methods=["POST"])
@@ -1,43 +1,35 @@
 from flask import Blueprint, request, jsonify
 
+from dispatch import new_order_priority
 from extensions import db
+from http_cache import apply_validators, collection_validators, not_modified
+from idempotency import commit_or_defer, idempotent
+from ledger import balance_cents, from_cents, record_entry
+from loyalty import maybe_update_vip_status
+from pricing import quote_order
 from models import User, Dish, Order, OrderItem
 
 order_bp = Blueprint("orders", __name__, url_prefix="/api/orders")
 
 
-def maybe_update_vip_status(user):
-    """
-    Promote a user to VIP based on simple rules.
-    Returns True if the user was just promoted.
-    """
-
-    # Already VIP? Nothing to do.
-    if user.role == "vip":
-        return False
-
-    # Example rules:
-    # - total_spent >= 200 OR
-    # - order_count >= 5
-    if user.total_spent >= 200 or user.order_count >= 5:
-        user.role = "vip"
-        return True
-
-    return False
-
-
 @order_bp.route("/", methods=["POST"])
+@idempotent("create_order")
 def create_order():
     """
     Create a new order.
 
+    Send an Idempotency-Key header to make retries safe (see idempotency.py).
+
     Expected JSON body:
     {
       "user_id": 1,
       "items": [
         {"dish_id": 1, "quantity": 2},
         {"dish_id": 3, "quantity": 1}
-      ]
+      ],
+      "delivery_address": "12 Main St",   # optional
+      "delivery_lat": 40.71,              # optional, needed for route planning
+      "delivery_lng": -74.00              # optional, needed for route planning
     }
     """
     data = request.get_json() or {}
@@ -48,6 +40,23 @@ def create_order():
     if not user_id or not items:
         return jsonify({"error": "user_id and items are required"}), 400
 
+    delivery_address = (data.get("delivery_address") or "").strip() or None
+    delivery_lat = data.get("delivery_lat")
+    delivery_lng = data.get("delivery_lng")
+
+    if (delivery_lat is None) != (delivery_lng is None):
+        return jsonify({"error": "delivery_lat and delivery_lng must be given together"}), 400
+
+    if delivery_lat is not None:
+        try:
+            delivery_lat = float(delivery_lat)
+            delivery_lng = float(delivery_lng)
+        except (TypeError, ValueError):
+            return jsonify({"error": "delivery_lat and delivery_lng must be numbers"}), 400
+
+        if not (-90 <= delivery_lat <= 90 and -180 <= delivery_lng <= 180):
+            return jsonify({"error": "delivery coordinates out of range"}), 400
+
     user = User.query.get(user_id)
     if not user:
         return jsonify({"error": "User not found"}), 404
@@ -68,8 +77,7 @@ def create_order():
     if missing:
         return jsonify({"error": f"Unknown dish_id(s): {missing}"}), 400
 
-    # Calculate total price and enforce VIP-only rules
-    subtotal = 0.0
+    # Enforce VIP-only rules
     normalized_items = []
     vip_only_dish_ids = []
 
@@ -86,7 +94,6 @@ def create_order():
             vip_only_dish_ids.append(dish_id)
             continue  # we can accumulate then fail later (or fail immediately)
 
-        subtotal += dish.price * quantity
         normalized_items.append((dish, quantity))
 
     if vip_only_dish_ids and user.role != "vip":
@@ -98,21 +105,21 @@ def create_order():
             }
         ), 403
 
-
-    # VIP discount: 5% for VIP customers
-    discount = 0.0
-    if user.role == "vip":
-        discount = round(subtotal * 0.05, 2)
-
-    total = subtotal - discount
+    # Time-of-day prices, promotions, bundles and the loyalty tier discount
+    quote = quote_order(user, normalized_items)
+    subtotal = from_cents(quote.subtotal_cents)
+    discount = from_cents(quote.discount_cents)
+    total = from_cents(quote.total_cents)
+    total_cents = quote.total_cents
 
     # Check balance
-    if user.deposit_balance < total:
+    balance = balance_cents(user.id)
+    if balance < total_cents:
         return jsonify(
             {
                 "error": "Insufficient balance",
                 "required": total,
-                "current_balance": user.deposit_balance,
+                "current_balance": from_cents(balance),
             }
         ), 400
 
@@ -122,6 +129,10 @@ def create_order():
         status="paid",  # we'll assume instant payment for now
         total_price=total,
         discount_applied=discount,
+        priority_at=new_order_priority(user),
+        delivery_address=delivery_address,
+        delivery_lat=delivery_lat,
+        delivery_lng=delivery_lng,
     )
     db.session.add(order)
     db.session.flush()  # get order.id before creating items
@@ -131,19 +142,21 @@ def create_order():
             order_id=order.id,
             dish_id=dish.id,
             quantity=qty,
-            unit_price=dish.price,
+            unit_price=from_cents(quote.unit_cents[dish.id]),
         )
         db.session.add(item)
 
+    # Charge the wallet
+    record_entry(user.id, "order_debit", -total_cents, order_id=order.id)
+
     # Update user stats
-    user.deposit_balance -= total
     user.total_spent += total
     user.order_count += 1
 
     # VIP promotion
     just_promoted = maybe_update_vip_status(user)
 
-    db.session.commit()
+    commit_or_defer()
 
     # Build response
     return jsonify(
@@ -156,6 +169,15 @@ def create_order():
                 "subtotal": subtotal,
                 "discount": discount,
                 "total": total,
+                "adjustments": [
+                    {
+                        "rule_id": a["rule_id"],
+                        "name": a["name"],
+                        "kind": a["kind"],
+                        "amount": from_cents(a["amount_cents"]),
+                    }
+                    for a in quote.adjustments
+                ],
                 "items": [
                     {
                         "dish_id": i.dish_id,
@@ -165,10 +187,11 @@ def create_order():
                     for i in order.items
                 ],
             },
-            "user_balance": user.deposit_balance,
+            "user_balance": from_cents(balance - total_cents),
             "vip_status": {
                 "role": user.role,
                 "just_promoted": just_promoted,
+                "applied_tier": quote.tier,
             },
         }
     ), 201
@@ -181,11 +204,14 @@ def list_orders_for_user(user_id):
     if not user:
         return jsonify({"error": "User not found"}), 404
 
-    orders = (
-        Order.query.filter_by(customer_id=user_id)
-        .order_by(Order.created_at.desc())
-        .all()
-    )
+    user_orders = Order.query.filter_by(customer_id=user_id)
+
+    validators = collection_validators(user_orders, Order.created_at, Order.updated_at)
+    cached = not_modified(validators)
+    if cached:
+        return cached
+
+    orders = user_orders.order_by(Order.created_at.desc()).all()
 
     data = []
     for o in orders:
@@ -207,4 +233,4 @@ def list_orders_for_user(user_id):
             }
         )
 
-    return jsonify({"orders": data})
+    return apply_validators(jsonify({"orders": data}), validators)
@@ -0,0 +1,303 @@
+from datetime import datetime
+
+from flask import Blueprint, jsonify, request
+
+from extensions import db
+from ledger import from_cents
+from models import User, Dish, PricingRule
+from pricing import RULE_KINDS, invalidate_rules, naive_utc, parse_bundle, quote_order
+
+pricing_bp = Blueprint("pricing", __name__, url_prefix="/api/admin/pricing-rules")
+
+DAY_NAMES = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+
+def _minute_to_hhmm(minute):
+    return None if minute is None else f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+def _rule_json(rule):
+    return {
+        "id": rule.id,
+        "name": rule.name,
+        "kind": rule.kind,
+        "is_active": rule.is_active,
+        "dish_id": rule.dish_id,
+        "bundle_dish_ids": list(parse_bundle(rule.bundle_dish_ids)) or None,
+        "percent_off": rule.percent_off,
+        "amount_off": rule.amount_off,
+        "start_time": _minute_to_hhmm(rule.start_minute),
+        "end_time": _minute_to_hhmm(rule.end_minute),
+        "days": (
+            None
+            if rule.days_mask is None
+            else [name for d, name in enumerate(DAY_NAMES) if rule.days_mask & (1 << d)]
+        ),
+        "valid_from": rule.valid_from.isoformat() if rule.valid_from else None,
+        "valid_until": rule.valid_until.isoformat() if rule.valid_until else None,
+        "min_total_spent": rule.min_total_spent,
+        "min_order_count": rule.min_order_count,
+        "updated_at": rule.updated_at.isoformat() if rule.updated_at else None,
+    }
+
+
+def _parse_hhmm(value):
+    hours, minutes = value.split(":")
+    minute = int(hours) * 60 + int(minutes)
+    if not 0 <= int(minutes) < 60 or not 0 <= minute < 24 * 60:
+        raise ValueError(value)
+    return minute
+
+
+def _parse_datetime(value):
+    """ISO 8601 -> naive UTC. Values without an offset are taken as UTC."""
+    return naive_utc(datetime.fromisoformat(value)) if value else None
+
+
+def _number(data, field):
+    value = data.get(field)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"{field} must be a number")
+    return float(value)
+
+
+def _apply_rule_fields(rule, data):
+    """
+    Validate `data` (the JSON shape returned by _rule_json) and copy it onto
+    `rule`. Returns an error message, or None.
+    """
+
+    name = (data.get("name") or "").strip()
+    kind = data.get("kind")
+    if not name or not kind:
+        return "name and kind are required"
+    if kind not in RULE_KINDS:
+        return f"kind must be one of {list(RULE_KINDS)}"
+
+    try:
+        percent_off = _number(data, "percent_off")
+        amount_off = _number(data, "amount_off")
+        min_total_spent = _number(data, "min_total_spent")
+    except ValueError as e:
+        return str(e)
+
+    min_order_count = data.get("min_order_count")
+    if min_order_count is not None and (not isinstance(min_order_count, int) or min_order_count < 0):
+        return "min_order_count must be a non-negative integer"
+
+    dish_id = data.get("dish_id")
+    bundle_dish_ids = data.get("bundle_dish_ids")
+
+    if kind == "loyalty_tier":
+        if percent_off is None or not 0 <= percent_off <= 100:
+            return "loyalty_tier rules need percent_off between 0 and 100"
+        if min_total_spent is None and min_order_count is None:
+            return "loyalty_tier rules need min_total_spent and/or min_order_count"
+        if amount_off is not None or dish_id is not None or bundle_dish_ids:
+            return "loyalty_tier rules take no amount_off, dish_id or bundle_dish_ids"
+    else:
+        if (percent_off is None) == (amount_off is None):
+            return "give exactly one of percent_off or amount_off"
+        # Only time-of-day rules may raise prices (negative values = surcharge)
+        low = -100 if kind == "time_of_day" else 0
+        if percent_off is not None and not low <= percent_off <= 100:
+            return f"percent_off must be between {low} and 100"
+        if amount_off is not None and kind != "time_of_day" and amount_off < 0:
+            return "amount_off must be >= 0"
+        if min_total_spent is not None or min_order_count is not None:
+            return "only loyalty_tier rules take min_total_spent / min_order_count"
+
+    if dish_id is not None and (isinstance(dish_id, bool) or not isinstance(dish_id, int)):
+        return "dish_id must be an integer"
+    if kind == "dish_promo" and dish_id is None:
+        return "dish_promo rules need a dish_id"
+    if kind == "bundle":
+        if dish_id is not None:
+            return "bundle rules use bundle_dish_ids, not dish_id"
+        if (
+            not isinstance(bundle_dish_ids, list)
+            or not all(isinstance(d, int) for d in bundle_dish_ids)
+            or len(set(bundle_dish_ids)) < 2
+        ):
+            return "bundle rules need bundle_dish_ids: a list of at least 2 dish ids"
+        bundle_dish_ids = sorted(set(bundle_dish_ids))
+    elif bundle_dish_ids:
+        return "only bundle rules take bundle_dish_ids"
+
+    wanted = set(bundle_dish_ids or []) | ({dish_id} if dish_id is not None else set())
+    if wanted:
+        found = {d for (d,) in db.session.query(Dish.id).filter(Dish.id.in_(wanted))}
+        if wanted - found:
+            return f"Unknown dish_id(s): {sorted(wanted - found)}"
+
+    start_time, end_time = data.get("start_time"), data.get("end_time")
+    if (start_time is None) != (end_time is None):
+        return "start_time and end_time must be given together"
+    start_minute = end_minute = None
+    if start_time is not None:
+        try:
+            start_minute, end_minute = _parse_hhmm(start_time), _parse_hhmm(end_time)
+        except (AttributeError, ValueError):
+            return "start_time and end_time must be HH:MM"
+        if start_minute == end_minute:
+            return "start_time and end_time must differ (omit both for all day)"
+
+    days = data.get("days")
+    days_mask = None
+    if days is not None:
+        if not isinstance(days, list) or not days or not set(days) <= set(DAY_NAMES):
+            return f"days must be a non-empty list from {DAY_NAMES}"
+        days_mask = sum(1 << DAY_NAMES.index(d) for d in set(days))
+
+    try:
+        valid_from = _parse_datetime(data.get("valid_from"))
+        valid_until = _parse_datetime(data.get("valid_until"))
+    except (TypeError, ValueError):
+        return "valid_from and valid_until must be ISO 8601 datetimes"
+    if valid_from and valid_until and valid_until <= valid_from:
+        return "valid_until must be after valid_from"
+
+    rule.name = name
+    rule.kind = kind
+    rule.is_active = bool(data.get("is_active", True))
+    rule.dish_id = dish_id
+    rule.bundle_dish_ids = ",".join(str(d) for d in bundle_dish_ids) if kind == "bundle" else None
+    rule.percent_off = percent_off
+    rule.amount_off = amount_off
+    rule.start_minute = start_minute
+    rule.end_minute = end_minute
+    rule.days_mask = days_mask
+    rule.valid_from = valid_from
+    rule.valid_until = valid_until
+    rule.min_total_spent = min_total_spent
+    rule.min_order_count = min_order_count
+    return None
+
+
+@pricing_bp.route("/", methods=["GET"])
+def list_rules():
+    """All pricing rules, active or not."""
+    rules = PricingRule.query.order_by(PricingRule.id.asc()).all()
+    return jsonify({"rules": [_rule_json(r) for r in rules]})
+
+
+@pricing_bp.route("/", methods=["POST"])
+def create_rule():
+    """
+    Create a pricing rule.
+
+    Example JSON bodies:
+    {"name": "Happy hour", "kind": "time_of_day", "percent_off": 20,
+     "start_time": "15:00", "end_time": "17:00", "days": ["mon", "tue"]}
+    {"name": "Friday peak", "kind": "time_of_day", "percent_off": -10,
+     "start_time": "18:00", "end_time": "21:00", "days": ["fri"]}
+    {"name": "Curry week", "kind": "dish_promo", "dish_id": 3, "amount_off": 2.5,
+     "valid_from": "2025-06-01T00:00:00", "valid_until": "2025-06-08T00:00:00"}
+    {"name": "Lunch combo", "kind": "bundle", "bundle_dish_ids": [1, 4], "percent_off": 15}
+    {"name": "Gold", "kind": "loyalty_tier", "percent_off": 10,
+     "min_total_spent": 1000, "min_order_count": 25}
+    """
+    rule = PricingRule()
+    error = _apply_rule_fields(rule, request.get_json() or {})
+    if error:
+        return jsonify({"error": error}), 400
+
+    db.session.add(rule)
+    db.session.commit()
+    invalidate_rules()
+
+    return jsonify({"message": "Rule created", "rule": _rule_json(rule)}), 201
+
+
+@pricing_bp.route("/<int:rule_id>", methods=["PATCH"])
+def update_rule(rule_id):
+    """Change some fields of a rule (same fields as POST)."""
+    rule = PricingRule.query.get(rule_id)
+    if not rule:
+        return jsonify({"error": "Rule not found"}), 404
+
+    merged = {**_rule_json(rule), **(request.get_json() or {})}
+    error = _apply_rule_fields(rule, merged)
+    if error:
+        db.session.rollback()
+        return jsonify({"error": error}), 400
+
+    db.session.commit()
+    invalidate_rules()
+
+    return jsonify({"message": "Rule updated", "rule": _rule_json(rule)})
+
+
+@pricing_bp.route("/<int:rule_id>", methods=["DELETE"])
+def delete_rule(rule_id):
+    rule = PricingRule.query.get(rule_id)
+    if not rule:
+        return jsonify({"error": "Rule not found"}), 404
+
+    db.session.delete(rule)
+    db.session.commit()
+    invalidate_rules()
+
+    return jsonify({"message": "Rule deleted", "rule_id": rule_id})
+
+
+@pricing_bp.route("/quote", methods=["POST"])
+def preview_quote():
+    """
+    Price a cart with the current rules without placing an order.
+
+    Expected JSON body:
+    {
+      "user_id": 1,
+      "items": [{"dish_id": 1, "quantity": 2}],
+      "at": "2025-06-06T19:30:00"     # optional, UTC unless an offset is given; default now
+    }
+    """
+    data = request.get_json() or {}
+    items = data.get("items") or []
+
+    user = User.query.get(data.get("user_id"))
+    if not user:
+        return jsonify({"error": "User not found"}), 404
+
+    try:
+        at = _parse_datetime(data.get("at"))
+        wanted = [(item["dish_id"], int(item.get("quantity", 1))) for item in items]
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": "items need dish_id / quantity; at must be ISO 8601"}), 400
+
+    # Same rule as checkout, so no quote is given for a cart it would refuse
+    if any(quantity <= 0 for _, quantity in wanted):
+        return jsonify({"error": "quantity must be >= 1"}), 400
+
+    dishes_by_id = {
+        d.id: d for d in Dish.query.filter(Dish.id.in_([d for d, _ in wanted])).all()
+    }
+    missing = [d for d, _ in wanted if d not in dishes_by_id]
+    if missing:
+        return jsonify({"error": f"Unknown dish_id(s): {missing}"}), 400
+
+    quote = quote_order(user, [(dishes_by_id[d], q) for d, q in wanted], now=at)
+
+    return jsonify(
+        {
+            "unit_prices": {
+                str(dish_id): from_cents(cents) for dish_id, cents in quote.unit_cents.items()
+            },
+            "subtotal": from_cents(quote.subtotal_cents),
+            "discount": from_cents(quote.discount_cents),
+            "total": from_cents(quote.total_cents),
+            "applied_tier": quote.tier,
+            "adjustments": [
+                {
+                    "rule_id": a["rule_id"],
+                    "name": a["name"],
+                    "kind": a["kind"],
+                    "amount": from_cents(a["amount_cents"]),
+                }
+                for a in quote.adjustments
+            ],
+        }
+    )
@@ -1,15 +1,18 @@
 from flask import Blueprint, request, jsonify
 
-from extensions import db
-from models import User
+from idempotency import commit_or_defer, idempotent
+from ledger import balance_cents, from_cents, record_entry, to_cents
+from models import User, LedgerEntry
 
 wallet_bp = Blueprint("wallet", __name__, url_prefix="/api/wallet")
 
 
 @wallet_bp.route("/deposit", methods=["POST"])
+@idempotent("deposit")
 def deposit():
     """
-    Add funds to a user's deposit_balance.
+    Add funds to a user's wallet (one "deposit" ledger entry).
+    Send an Idempotency-Key header to make retries safe.
 
     Expected JSON body:
     {
@@ -27,11 +30,11 @@ def deposit():
         return jsonify({"error": "user_id and amount are required"}), 400
 
     try:
-        amount = float(amount)
-    except ValueError:
+        amount_cents = to_cents(amount)
+    except (ArithmeticError, ValueError):
         return jsonify({"error": "amount must be a number"}), 400
 
-    if amount <= 0:
+    if amount_cents <= 0:
         return jsonify({"error": "amount must be > 0"}), 400
 
     user = User.query.get(user_id)
@@ -41,9 +44,8 @@ def deposit():
     if not user.is_active or user.is_blacklisted:
         return jsonify({"error": "User is not allowed to deposit"}), 403
 
-    # Update balance
-    user.deposit_balance += amount
-    db.session.commit()
+    record_entry(user.id, "deposit", amount_cents)
+    commit_or_defer()
 
     return jsonify(
         {
@@ -52,7 +54,45 @@ def deposit():
                 "id": user.id,
                 "name": user.name,
                 "email": user.email,
-                "deposit_balance": user.deposit_balance,
+                "deposit_balance": from_cents(balance_cents(user.id)),
             },
         }
     )
+
+
+@wallet_bp.route("/<int:user_id>/transactions", methods=["GET"])
+def list_transactions(user_id):
+    """
+    A user's wallet history, newest first.
+
+    Query params: limit (default 50, max 500), before_id (for paging).
+    """
+
+    user = User.query.get(user_id)
+    if not user:
+        return jsonify({"error": "User not found"}), 404
+
+    limit = max(1, min(request.args.get("limit", 50, type=int), 500))
+    before_id = request.args.get("before_id", type=int)
+
+    query = LedgerEntry.query.filter_by(user_id=user.id)
+    if before_id:
+        query = query.filter(LedgerEntry.id < before_id)
+    entries = query.order_by(LedgerEntry.id.desc()).limit(limit).all()
+
+    return jsonify(
+        {
+            "user_id": user.id,
+            "balance": from_cents(balance_cents(user.id)),
+            "transactions": [
+                {
+                    "id": e.id,
+                    "kind": e.kind,
+                    "amount": from_cents(e.amount_cents),
+                    "order_id": e.order_id,
+                    "created_at": e.created_at.isoformat(),
+                }
+                for e in entries
+            ],
+        }
+    )
@@ -0,0 +1,97 @@
+"""
+Shared fixtures for the route tests.
+
+    cd backend
+    python -m pytest -q            # or -n auto with pytest-xdist
+
+The app and schema are built once per session on an in-memory SQLite
+database, so each xdist worker gets its own private database. Every test
+runs inside one outer transaction that is rolled back afterwards; the
+session joins it with a SAVEPOINT, so code under test can commit freely
+(a commit only releases the savepoint) and nothing leaks into the next test.
+"""
+
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app
+from extensions import db
+
+TEST_CONFIG = {
+    "TESTING": True,
+    # One in-memory database, shared through Flask-SQLAlchemy's StaticPool
+    "SQLALCHEMY_DATABASE_URI": "sqlite://",
+    "RATELIMIT_ENABLED": False,
+    # Per-worker caches would outlive the rolled-back rows they were built from
+    "IDEMPOTENCY_CACHE_SIZE": 0,
+    "PRICING_RULES_CHECK_INTERVAL": 0,
+}
+
+
+def _enable_savepoints(engine):
+    """
+    pysqlite issues its own BEGIN/COMMIT around statements, which breaks
+    SAVEPOINT. Turn that off and let SQLAlchemy emit BEGIN itself.
+    """
+
+    @event.listens_for(engine, "connect")
+    def _no_pysqlite_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+
+def make_test_app():
+    """A fresh app on its own in-memory database, schema created."""
+
+    app = create_app(TEST_CONFIG)
+    with app.app_context():
+        _enable_savepoints(db.engine)
+        db.create_all()
+        # Sessions join the test's transaction through a SAVEPOINT instead of
+        # committing (or rolling back) the outer transaction
+        db.session.configure(join_transaction_mode="create_savepoint")
+    return app
+
+
+@contextmanager
+def rolled_back_session(app):
+    """db.session for the block and every request it makes, rolled back at the end."""
+
+    with app.app_context():
+        engine = db.engine
+        connection = engine.connect()
+        transaction = connection.begin()
+
+        # Every session (the test's and each request's) binds to this connection
+        db.engines[None] = connection
+        try:
+            yield db.session
+        finally:
+            db.session.remove()
+            db.engines[None] = engine
+            transaction.rollback()
+            connection.close()
+
+            app.extensions["pricing"]["cache"].invalidate()
+            app.extensions.pop("assistant_menu", None)
+
+
+@pytest.fixture(scope="session")
+def app():
+    return make_test_app()
+
+
+@pytest.fixture(autouse=True)
+def session(app):
+    with rolled_back_session(app) as session:
+        yield session
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
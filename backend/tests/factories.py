@@ -0,0 +1,87 @@
+"""
+Row factories for tests. Every column has a default and any of them can be
+overridden by keyword:
+
+    user = make_user(role="vip", balance=100)
+    dish = make_dish(price=12.5, is_vip_only=True)
+    order = make_order(user, [(dish, 2)], status="delivered")
+
+Each helper commits, which inside a test only releases the SAVEPOINT (see
+conftest.py).
+"""
+
+import itertools
+
+from werkzeug.security import generate_password_hash
+
+from extensions import db
+from ledger import record_entry, to_cents
+from models import User, Dish, Order, OrderItem
+
+DEFAULT_PASSWORD = "secret"
+
+_seq = itertools.count(1)
+_password_hashes = {}
+
+
+def _password_hash(password):
+    # Hashing is deliberately slow; do it once per distinct password
+    if password not in _password_hashes:
+        _password_hashes[password] = generate_password_hash(password)
+    return _password_hashes[password]
+
+
+def make_user(balance=0, password=DEFAULT_PASSWORD, **fields):
+    """A user with `balance` dollars deposited into their wallet."""
+
+    n = next(_seq)
+    fields.setdefault("name", f"User {n}")
+    fields.setdefault("email", f"user{n}@example.com")
+    fields.setdefault("role", "customer")
+
+    user = User(password_hash=_password_hash(password), **fields)
+    db.session.add(user)
+    db.session.flush()
+
+    if balance:
+        record_entry(user.id, "deposit", to_cents(balance))
+
+    db.session.commit()
+    return user
+
+
+def make_dish(**fields):
+    n = next(_seq)
+    fields.setdefault("name", f"Dish {n}")
+    fields.setdefault("description", "house special")
+    fields.setdefault("price", 10.0)
+
+    dish = Dish(**fields)
+    db.session.add(dish)
+    db.session.commit()
+    return dish
+
+
+def make_order(user, items, **fields):
+    """
+    An order for `user` with `items` = [(dish, quantity), ...] at the dishes'
+    list prices. Writes no ledger entries; place orders through the API to
+    test charging.
+    """
+
+    fields.setdefault("status", "paid")
+    fields.setdefault(
+        "total_price", round(sum(dish.price * quantity for dish, quantity in items), 2)
+    )
+
+    order = Order(customer_id=user.id, **fields)
+    db.session.add(order)
+    db.session.flush()
+
+    for dish, quantity in items:
+        db.session.add(
+            OrderItem(order_id=order.id, dish_id=dish.id, quantity=quantity, unit_price=dish.price)
+        )
+
+    db.session.commit()
+    return order
@@ -0,0 +1,191 @@
+from datetime import datetime, timedelta
+
+from delivery import available_drivers
+from extensions import db
+from factories import make_dish, make_order, make_user
+from forecast import run_forecast
+from models import BalanceSnapshot, User
+from pricing import local_today
+
+
+def set_status(client, order, status):
+    return client.patch(f"/api/admin/orders/{order.id}/status", json={"status": status})
+
+
+def test_status_follows_the_allowed_transitions(client):
+    order = make_order(make_user(), [(make_dish(), 1)], status="paid")
+
+    assert set_status(client, order, "preparing").status_code == 200
+    resp = set_status(client, order, "delivered")
+
+    assert resp.status_code == 409
+    assert resp.get_json()["current_status"] == "preparing"
+
+
+def test_delivering_the_last_batched_order_frees_the_driver(client):
+    driver = make_user(role="delivery")
+    order = make_order(
+        make_user(), [(make_dish(), 1)], status="ready", delivery_lat=40.72, delivery_lng=-74.0
+    )
+    client.post("/api/delivery/batches/plan")
+
+    assert set_status(client, order, "delivered").status_code == 200
+
+    assert client.get(f"/api/delivery/drivers/{driver.id}/batch").get_json()["batch"] is None
+    assert available_drivers() == [driver.id]
+
+
+def test_unknown_status_is_rejected(client):
+    order = make_order(make_user(), [(make_dish(), 1)])
+
+    assert set_status(client, order, "eaten").status_code == 400
+
+
+def test_cancelling_refunds_the_customer(client):
+    user = make_user(balance=40)
+    dish = make_dish(price=15.0)
+    placed = client.post(
+        "/api/orders/", json={"user_id": user.id, "items": [{"dish_id": dish.id, "quantity": 2}]}
+    ).get_json()
+
+    resp = client.patch(
+        f"/api/admin/orders/{placed['order']['id']}/status", json={"status": "cancelled"}
+    )
+
+    assert resp.status_code == 200
+    assert client.get(f"/api/wallet/{user.id}/transactions").get_json()["balance"] == 40.0
+
+
+def test_users_list_includes_balances(client):
+    user = make_user(balance=12.5)
+
+    users = client.get("/api/admin/users").get_json()["users"]
+
+    assert [(u["id"], u["deposit_balance"]) for u in users] == [(user.id, 12.5)]
+
+
+def test_load_stats_include_the_llm_queue(client):
+    resp = client.get("/api/admin/load")
+
+    assert resp.status_code == 200
+    assert resp.get_json()["llm"]["in_flight"] == 0
+
+
+def test_users_list_revalidates_until_the_ledger_changes(client):
+    user = make_user(balance=5)
+
+    etag = client.get("/api/admin/users").headers["ETag"]
+    assert client.get("/api/admin/users", headers={"If-None-Match": etag}).status_code == 304
+
+    client.post("/api/wallet/deposit", json={"user_id": user.id, "amount": 1})
+
+    assert client.get("/api/admin/users", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_bulk_cancel_refunds_reverses_stats_and_demotes(client):
+    user = make_user(balance=250)
+    dish = make_dish(price=200.0)
+    placed = client.post(
+        "/api/orders/", json={"user_id": user.id, "items": [{"dish_id": dish.id, "quantity": 1}]}
+    ).get_json()
+    assert placed["vip_status"]["just_promoted"] is True
+    delivered = make_order(user, [(dish, 1)], status="delivered")
+
+    resp = client.post(
+        "/api/admin/orders/cancel", json={"order_ids": [placed["order"]["id"], delivered.id]}
+    )
+
+    body = resp.get_json()
+    assert resp.status_code == 200
+    assert (body["cancelled"], body["skipped"]) == ([placed["order"]["id"]], [delivered.id])
+    assert body["refunded"] == 200.0
+    assert body["demoted_user_ids"] == [user.id]
+
+    user = db.session.get(User, user.id)
+    assert (user.role, user.total_spent, user.order_count) == ("customer", 0, 0)
+    assert client.get(f"/api/wallet/{user.id}/transactions").get_json()["balance"] == 250.0
+
+
+def test_bulk_cancel_by_status(client):
+    user = make_user()
+    dish = make_dish()
+    paid = make_order(user, [(dish, 1)], status="paid")
+    preparing = make_order(user, [(dish, 1)], status="preparing")
+    make_order(user, [(dish, 1)], status="delivered")
+
+    resp = client.post("/api/admin/orders/cancel", json={"statuses": ["paid", "preparing"]})
+
+    assert sorted(resp.get_json()["cancelled"]) == sorted([paid.id, preparing.id])
+
+
+def test_bulk_cancel_validates_the_body(client):
+    for body in ({}, {"order_ids": ["1"]}, {"statuses": ["eaten"]}):
+        assert client.post("/api/admin/orders/cancel", json=body).status_code == 400
+
+
+def test_snapshots_keep_balances_reconciled(client):
+    busy = make_user()
+    make_user(balance=3)  # below the threshold, reconciled from the ledger alone
+    for amount in (1, 2, 3):
+        client.post("/api/wallet/deposit", json={"user_id": busy.id, "amount": amount})
+
+    resp = client.post("/api/admin/wallet/snapshots", json={"min_entries": 2})
+
+    assert resp.get_json() == {"snapshots_written": 1}
+    assert BalanceSnapshot.query.filter_by(user_id=busy.id).count() == 1
+    client.post("/api/wallet/deposit", json={"user_id": busy.id, "amount": 4})
+
+    report = client.get("/api/admin/wallet/reconcile")
+
+    assert report.status_code == 200
+    assert report.get_json()["mismatches"] == []
+    assert report.get_json()["users_checked"] == 2
+    assert client.get(f"/api/wallet/{busy.id}/transactions").get_json()["balance"] == 10.0
+
+
+def test_snapshots_reject_a_bad_threshold(client):
+    resp = client.post("/api/admin/wallet/snapshots", json={"min_entries": 0})
+
+    assert resp.status_code == 400
+
+
+def test_reconcile_reports_a_wrong_snapshot(client):
+    user = make_user(balance=5)
+    db.session.add(BalanceSnapshot(user_id=user.id, balance_cents=999, last_entry_id=0))
+    db.session.commit()
+
+    resp = client.get("/api/admin/wallet/reconcile")
+
+    assert resp.status_code == 409
+    assert resp.get_json()["mismatches"] == [
+        {"user_id": user.id, "ledger_cents": 500, "derived_cents": 999 + 500}
+    ]
+
+
+def test_forecast_lists_the_busiest_dishes_first(client):
+    popular, quiet = make_dish(name="Ramen"), make_dish(name="Soup")
+    user = make_user()
+    now = datetime.utcnow()
+    for days_ago in range(1, 15):
+        created_at = now - timedelta(days=days_ago)
+        make_order(user, [(popular, 3)], status="delivered", created_at=created_at)
+        if days_ago % 7 == 0:
+            make_order(user, [(quiet, 1)], status="delivered", created_at=created_at)
+    target = local_today() + timedelta(days=1)
+    assert run_forecast(target, workers=1) == 2
+
+    resp = client.get(f"/api/admin/forecast?date={target.isoformat()}")
+
+    body = resp.get_json()
+    assert resp.status_code == 200
+    assert body["date"] == target.isoformat()
+    assert [d["name"] for d in body["dishes"]] == ["Ramen", "Soup"]
+    ramen = body["dishes"][0]
+    assert ramen["expected_quantity"] > 0
+    assert ramen["prep_quantity"] >= ramen["expected_quantity"]
+    assert len(ramen["hourly"]) == 24
+
+
+def test_forecast_for_a_day_without_one(client):
+    assert client.get("/api/admin/forecast?date=2020-01-01").status_code == 404
+    assert client.get("/api/admin/forecast?date=tomorrow").status_code == 400
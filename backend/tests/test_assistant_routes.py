@@ -0,0 +1,105 @@
+import pytest
+
+import routes.assistant_routes as assistant_routes
+from factories import make_dish, make_user
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """Replace the Ollama call; the list collects the messages sent."""
+
+    calls = []
+
+    def ollama_chat(messages):
+        calls.append(messages)
+        return {"message": {"role": "assistant", "content": "Try the curry."}}
+
+    monkeypatch.setattr(assistant_routes, "ollama_chat", ollama_chat)
+    return calls
+
+
+def chat(client, user, message):
+    return client.post("/api/assistant/chat", json={"user_id": user.id, "message": message})
+
+
+def test_recommend_respects_budget_and_vip_dishes(client):
+    user = make_user()
+    cheap = make_dish(name="Spicy tofu", price=8.0)
+    make_dish(name="Spicy lobster", price=40.0)
+    make_dish(name="Spicy wagyu", price=9.0, is_vip_only=True)
+
+    resp = client.post(
+        "/api/assistant/recommend",
+        json={"user_id": user.id, "max_price": 20, "preference": "spicy"},
+    )
+
+    assert [d["id"] for d in resp.get_json()["recommendations"]] == [cheap.id]
+
+
+def test_structured_chat_is_answered_without_the_llm(client, fake_llm):
+    user = make_user()
+    make_dish(name="Vegan bowl", price=14.0)
+    make_dish(name="Vegan feast", price=30.0)
+    make_dish(name="Fish stew", price=9.0)
+
+    resp = chat(client, user, "vegan under $15")
+
+    body = resp.get_json()
+    assert body["route"] == "rules"
+    assert [d["name"] for d in body["recommendations"]] == ["Vegan bowl"]
+    assert "Vegan bowl" in body["answer"]
+    assert fake_llm == []
+
+
+def test_open_ended_chat_goes_to_the_llm(client, fake_llm):
+    user = make_user(role="vip")
+    make_dish(name="Vegan bowl", price=14.0)
+
+    resp = chat(client, user, "something light for a date night")
+
+    body = resp.get_json()
+    assert body["route"] == "llm"
+    assert body["answer"] == "Try the curry."
+    [(system, question)] = fake_llm
+    assert "Vegan bowl" in system["content"]
+    assert "Customer role: vip" in question["content"]
+
+
+def test_structured_chat_without_matches_falls_back_to_the_llm(client, fake_llm):
+    make_dish(name="Vegan bowl", price=14.0)
+
+    resp = chat(client, make_user(), "vegan under $5")
+
+    assert resp.get_json()["route"] == "llm"
+
+
+def test_system_prompt_is_identical_across_users(client, fake_llm):
+    make_dish(name="Vegan bowl", price=14.0)
+
+    chat(client, make_user(), "something light")
+    chat(client, make_user(role="vip"), "what goes with wine?")
+
+    assert fake_llm[0][0] == fake_llm[1][0]
+
+
+def test_chat_is_shed_with_429_when_the_llm_queue_is_full(app, client, monkeypatch):
+    from llm_scheduler import LLMScheduler
+
+    full = LLMScheduler(max_in_flight=0, max_queue=0, queue_timeout=1)
+    monkeypatch.setitem(app.extensions, "llm_scheduler", full)
+
+    resp = chat(client, make_user(), "something light for a date night")
+
+    assert resp.status_code == 429
+    assert resp.headers["Retry-After"] == "10"
+
+
+def test_or_query_returns_dishes_matching_either_keyword(client, fake_llm):
+    make_dish(name="Fish stew", price=9.0)
+    make_dish(name="Chicken wings", price=8.0)
+    make_dish(name="Tofu bowl", price=7.0)
+
+    body = chat(client, make_user(), "fish or chicken").get_json()
+
+    assert body["route"] == "rules"
+    assert sorted(d["name"] for d in body["recommendations"]) == ["Chicken wings", "Fish stew"]
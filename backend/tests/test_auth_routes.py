@@ -0,0 +1,50 @@
+from factories import DEFAULT_PASSWORD, make_user
+
+
+def test_register_creates_a_customer(client):
+    resp = client.post(
+        "/api/auth/register",
+        json={"name": "Ada", "email": " Ada@Example.com ", "password": "pw"},
+    )
+
+    assert resp.status_code == 201
+    assert resp.get_json()["user"]["email"] == "ada@example.com"
+
+
+def test_register_requires_every_field(client):
+    resp = client.post("/api/auth/register", json={"name": "Ada", "email": "ada@example.com"})
+    assert resp.status_code == 400
+
+
+def test_register_rejects_a_taken_email(client):
+    user = make_user()
+
+    resp = client.post(
+        "/api/auth/register",
+        json={"name": "Other", "email": user.email, "password": "pw"},
+    )
+
+    assert resp.status_code == 400
+    assert resp.get_json()["error"] == "Email already registered"
+
+
+def test_login_returns_the_role(client):
+    user = make_user(role="vip")
+
+    resp = client.post("/api/auth/login", json={"email": user.email, "password": DEFAULT_PASSWORD})
+
+    assert resp.status_code == 200
+    assert resp.get_json()["user"] == {
+        "id": user.id,
+        "name": user.name,
+        "email": user.email,
+        "role": "vip",
+    }
+
+
+def test_login_with_a_wrong_password(client):
+    user = make_user()
+
+    resp = client.post("/api/auth/login", json={"email": user.email, "password": "nope"})
+
+    assert resp.status_code == 401
@@ -0,0 +1,86 @@
+from factories import make_dish, make_order, make_user
+
+
+def make_ready_order(**fields):
+    fields.setdefault("delivery_lat", 40.72)
+    fields.setdefault("delivery_lng", -74.0)
+    return make_order(make_user(), [(make_dish(), 1)], status="ready", **fields)
+
+
+def plan(client, **body):
+    return client.post("/api/delivery/batches/plan", json=body)
+
+
+def delivered(client, driver, order):
+    return client.post(f"/api/delivery/drivers/{driver.id}/orders/{order.id}/delivered")
+
+
+def test_planning_batches_ready_orders_for_a_driver(client):
+    driver = make_user(role="delivery")
+    near = make_ready_order(delivery_lat=40.713, delivery_lng=-74.005)
+    far = make_ready_order(delivery_lat=40.75, delivery_lng=-73.98)
+    unroutable = make_ready_order(delivery_lat=None, delivery_lng=None)
+
+    resp = plan(client)
+
+    assert resp.status_code == 201
+    (batch,) = resp.get_json()["batches"]
+    assert batch["driver_id"] == driver.id
+    assert sorted(s["order_id"] for s in batch["stops"]) == sorted([near.id, far.id])
+    assert {s["status"] for s in batch["stops"]} == {"on_the_way"}
+    assert unroutable.status == "ready"
+
+    current = client.get(f"/api/delivery/drivers/{driver.id}/batch").get_json()["batch"]
+    assert current["id"] == batch["id"]
+
+
+def test_planning_respects_capacity(client):
+    first, second = make_user(role="delivery"), make_user(role="delivery")
+    for _ in range(3):
+        make_ready_order()
+
+    batches = plan(client, capacity=2).get_json()["batches"]
+
+    assert sorted(b["driver_id"] for b in batches) == [first.id, second.id]
+    assert sorted(len(b["stops"]) for b in batches) == [1, 2]
+
+
+def test_planning_rejects_bad_parameters(client):
+    assert plan(client, capacity=0).status_code == 400
+    assert plan(client, time_budget_ms="soon").status_code == 400
+
+
+def test_last_drop_off_completes_the_batch(client):
+    driver = make_user(role="delivery")
+    orders = [make_ready_order(), make_ready_order(delivery_lat=40.73)]
+    plan(client)
+
+    first = delivered(client, driver, orders[0])
+    last = delivered(client, driver, orders[1])
+
+    assert first.status_code == 200
+    assert first.get_json()["batch"]["status"] == "assigned"
+    assert last.get_json()["batch"]["status"] == "completed"
+    assert client.get(f"/api/delivery/drivers/{driver.id}/batch").get_json()["batch"] is None
+
+
+def test_drop_off_is_limited_to_the_drivers_batch(client):
+    driver, other = make_user(role="delivery"), make_user(role="delivery")
+    order = make_ready_order()
+    plan(client)
+
+    resp = delivered(client, other, order)
+
+    assert resp.status_code == 404
+
+
+def test_drop_off_cannot_be_confirmed_twice(client):
+    driver = make_user(role="delivery")
+    orders = [make_ready_order(), make_ready_order(delivery_lat=40.73)]
+    plan(client)
+    delivered(client, driver, orders[0])
+
+    resp = delivered(client, driver, orders[0])
+
+    assert resp.status_code == 409
+    assert resp.get_json()["current_status"] == "delivered"
@@ -0,0 +1,37 @@
+from conftest import make_test_app, rolled_back_session
+from factories import make_user
+from models import User
+
+
+def test_rows_written_by_a_request_are_visible_to_the_test(client):
+    resp = client.post(
+        "/api/auth/register",
+        json={"name": "Ada", "email": "ada@example.com", "password": "pw"},
+    )
+    assert resp.status_code == 201
+    assert User.query.filter_by(email="ada@example.com").count() == 1
+
+
+def test_rows_committed_in_one_test_are_gone_in_the_next():
+    # Two tests' worth of setup/teardown on a private database, in sequence
+    app = make_test_app()
+    client = app.test_client()
+
+    with rolled_back_session(app):
+        resp = client.post(
+            "/api/auth/register",
+            json={"name": "Ada", "email": "ada@example.com", "password": "pw"},
+        )
+        assert resp.status_code == 201
+        make_user(email="grace@example.com")
+        assert User.query.count() == 2
+
+    with rolled_back_session(app):
+        assert User.query.count() == 0
+
+
+def test_factory_rows_are_visible_to_requests(client):
+    user = make_user(balance=25)
+    resp = client.get(f"/api/wallet/{user.id}/transactions")
+    assert resp.status_code == 200
+    assert resp.get_json()["balance"] == 25.0
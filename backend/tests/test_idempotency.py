@@ -0,0 +1,81 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, update
+
+from extensions import db
+from factories import make_dish, make_user
+from models import IdempotencyKey, LedgerEntry, Order
+
+
+def deposit_body(user):
+    return json.dumps({"user_id": user.id, "amount": 5})
+
+
+def deposit(client, user, key):
+    return client.post(
+        "/api/wallet/deposit",
+        data=deposit_body(user),
+        content_type="application/json",
+        headers={"Idempotency-Key": key},
+    )
+
+
+def test_a_reservation_still_running_answers_409(client):
+    user = make_user()
+    deposit(client, user, "k1")
+    db.session.execute(update(IdempotencyKey).values(status_code=None, response_body=None))
+    db.session.commit()
+
+    resp = deposit(client, user, "k1")
+
+    assert resp.status_code == 409
+    assert resp.headers["Retry-After"] == "1"
+
+
+def test_an_abandoned_reservation_is_taken_over(app, client):
+    user = make_user()
+    # What a worker killed mid-request leaves behind: the reservation only
+    stale = datetime.utcnow() - timedelta(seconds=app.config["IDEMPOTENCY_LEASE_SECONDS"] + 1)
+    db.session.execute(
+        insert(IdempotencyKey).values(
+            scope="deposit",
+            key="k2",
+            request_hash=hashlib.sha256(deposit_body(user).encode()).hexdigest(),
+            created_at=stale,
+        )
+    )
+    db.session.commit()
+
+    resp = deposit(client, user, "k2")
+
+    assert resp.status_code == 200
+    assert "Idempotent-Replayed" not in resp.headers
+    assert db.session.query(LedgerEntry).filter_by(user_id=user.id).count() == 1
+
+
+def test_writes_and_stored_response_commit_together(client, monkeypatch):
+    import routes.order_routes as order_routes
+
+    user = make_user(balance=50)
+    dish = make_dish(price=10.0)
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    # Fail after the order rows are flushed but before the response is stored
+    monkeypatch.setattr(order_routes, "maybe_update_vip_status", broken)
+    client.application.testing = False  # return the 500 instead of raising
+    try:
+        resp = client.post(
+            "/api/orders/",
+            json={"user_id": user.id, "items": [{"dish_id": dish.id, "quantity": 1}]},
+            headers={"Idempotency-Key": "k3"},
+        )
+    finally:
+        client.application.testing = True
+
+    assert resp.status_code == 500
+    assert Order.query.count() == 0
+    assert IdempotencyKey.query.count() == 0
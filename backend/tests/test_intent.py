@@ -0,0 +1,55 @@
+import pytest
+
+from intent import parse_intent
+
+
+@pytest.mark.parametrize(
+    "message, min_price, max_price, keywords, sort",
+    [
+        ("vegan under $15", None, 15.0, ["vegan"], None),
+        ("cheapest fish dish", None, None, ["fish"], "price_asc"),
+        ("spicy dishes between $10 and $20", 10.0, 20.0, ["spicy"], None),
+        ("plant-based noodles $8-$12", 8.0, 12.0, ["vegan", "noodle"], None),
+        ("most expensive beef", None, None, ["beef"], "price_desc"),
+        ("show me dishes over 30 dollars", 30.0, None, [], None),
+        ("My maximum budget is $20. I'm in the mood for: spicy fish.", None, 20.0,
+         ["spicy", "fish"], None),
+    ],
+)
+def test_structured_queries_are_parsed(message, min_price, max_price, keywords, sort):
+    intent = parse_intent(message)
+
+    assert intent.confident
+    assert (intent.min_price, intent.max_price, intent.keywords, intent.sort) == (
+        min_price, max_price, keywords, sort
+    )
+
+
+def test_result_count():
+    assert parse_intent("top 3 curries").max_results == 3
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        "something light for a date night",
+        "something spicy, not too expensive",
+        "no fish please",
+        "hi",
+        "between $20 and $10 but not curry",
+    ],
+)
+def test_open_ended_messages_are_left_to_the_llm(message):
+    assert not parse_intent(message).confident
+
+
+def test_or_between_keywords_matches_any_of_them():
+    intent = parse_intent("fish or chicken under $20")
+
+    assert intent.confident and intent.match_any
+    assert sorted(intent.keywords) == ["chicken", "fish"]
+    assert not parse_intent("fish and chicken").match_any
+
+
+def test_mixed_and_or_is_left_to_the_llm():
+    assert not parse_intent("spicy fish or chicken").confident
@@ -0,0 +1,67 @@
+from factories import make_dish, make_order, make_user
+
+
+def claim(client, chef):
+    return client.post(f"/api/kitchen/chefs/{chef.id}/claim")
+
+
+def test_claim_dispatches_and_starts_the_oldest_order(client):
+    chef = make_user(role="chef")
+    dish = make_dish(chef_id=chef.id)
+    customer = make_user()
+    first = make_order(customer, [(dish, 1)])
+    make_order(customer, [(dish, 2)])
+
+    resp = claim(client, chef)
+
+    assert resp.status_code == 200
+    order = resp.get_json()["order"]
+    assert (order["id"], order["status"], order["assigned_chef_id"]) == (
+        first.id,
+        "preparing",
+        chef.id,
+    )
+
+
+def test_claim_with_an_empty_queue_returns_204(client):
+    chef = make_user(role="chef")
+
+    assert claim(client, chef).status_code == 204
+
+
+def test_only_chefs_can_claim(client):
+    customer = make_user()
+
+    assert claim(client, customer).status_code == 404
+
+
+def test_claimed_order_can_be_marked_ready(client):
+    chef = make_user(role="chef")
+    order = make_order(make_user(), [(make_dish(chef_id=chef.id), 1)])
+    claim(client, chef)
+
+    resp = client.post(f"/api/kitchen/chefs/{chef.id}/orders/{order.id}/ready")
+
+    assert resp.status_code == 200
+    assert resp.get_json()["order"]["status"] == "ready"
+
+
+def test_ready_needs_a_claimed_order(client):
+    chef = make_user(role="chef")
+    order = make_order(make_user(), [(make_dish(), 1)], assigned_chef_id=chef.id)
+
+    resp = client.post(f"/api/kitchen/chefs/{chef.id}/orders/{order.id}/ready")
+
+    assert resp.status_code == 409
+    assert resp.get_json()["current_status"] == "paid"
+
+
+def test_ready_is_limited_to_the_assigned_chef(client):
+    chef, other = make_user(role="chef"), make_user(role="chef")
+    order = make_order(
+        make_user(), [(make_dish(), 1)], status="preparing", assigned_chef_id=chef.id
+    )
+
+    resp = client.post(f"/api/kitchen/chefs/{other.id}/orders/{order.id}/ready")
+
+    assert resp.status_code == 404
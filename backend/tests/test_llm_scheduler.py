@@ -0,0 +1,143 @@
+import threading
+import time
+
+import pytest
+
+from flask import Flask
+
+from llm_scheduler import LLMScheduler, QueueFull, QueueTimeout, SLOT_NAME, init_llm_scheduler
+from ratelimit import SQLiteStorage, init_rate_limiting
+
+
+def hold_slot(scheduler, priority=1):
+    """Occupy one generation slot until the returned event is set."""
+
+    started, release = threading.Event(), threading.Event()
+
+    def generate():
+        started.set()
+        release.wait(5)
+
+    thread = threading.Thread(target=scheduler.run, args=(generate, priority))
+    thread.start()
+    started.wait(5)
+    return release, thread
+
+
+def test_runs_immediately_with_no_queue_when_a_slot_is_free():
+    scheduler = LLMScheduler(max_in_flight=1, max_queue=0, queue_timeout=1)
+
+    result, timing = scheduler.run(lambda: "ok")
+
+    assert result == "ok"
+    assert timing.queue_wait < 0.1
+
+
+def test_sheds_requests_beyond_the_queue():
+    scheduler = LLMScheduler(max_in_flight=1, max_queue=0, queue_timeout=1)
+    release, thread = hold_slot(scheduler)
+    try:
+        with pytest.raises(QueueFull):
+            scheduler.run(lambda: "ok")
+    finally:
+        release.set()
+        thread.join()
+
+    assert scheduler.snapshot()["rejected"] == 1
+
+
+def test_gives_up_after_the_queue_timeout():
+    scheduler = LLMScheduler(max_in_flight=1, max_queue=1, queue_timeout=0.05)
+    release, thread = hold_slot(scheduler)
+    try:
+        with pytest.raises(QueueTimeout):
+            scheduler.run(lambda: "ok")
+    finally:
+        release.set()
+        thread.join()
+
+
+def test_vips_are_admitted_first():
+    scheduler = LLMScheduler(max_in_flight=1, max_queue=2, queue_timeout=5)
+    release, holder = hold_slot(scheduler)
+    order = []
+
+    def wait(name, priority):
+        scheduler.run(lambda: order.append(name), priority)
+
+    regular = threading.Thread(target=wait, args=("regular", 1))
+    regular.start()
+    while scheduler.snapshot()["waiting"] < 1:
+        time.sleep(0.001)
+    vip = threading.Thread(target=wait, args=("vip", 0))
+    vip.start()
+    while scheduler.snapshot()["waiting"] < 2:
+        time.sleep(0.001)
+
+    release.set()
+    for thread in (holder, regular, vip):
+        thread.join()
+
+    assert order == ["vip", "regular"]
+
+
+def test_slots_are_shared_between_workers(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "slots.db"))
+    # Two workers, each allowed two generations, one model server slot
+    first, second = (
+        LLMScheduler(max_in_flight=2, max_queue=1, queue_timeout=0.2, slots=storage, slot_limit=1)
+        for _ in range(2)
+    )
+    release, thread = hold_slot(first)
+    try:
+        with pytest.raises(QueueTimeout):
+            second.run(lambda: "ok")
+    finally:
+        release.set()
+        thread.join()
+
+    assert second.run(lambda: "ok")[0] == "ok"
+
+
+def test_slots_of_dead_workers_expire(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "slots.db"))
+    assert storage.acquire_slot(SLOT_NAME, 1, lease=10, now=100) is not None
+
+    assert storage.acquire_slot(SLOT_NAME, 1, lease=10, now=105) is None
+    assert storage.acquire_slot(SLOT_NAME, 1, lease=10, now=111) is not None
+
+
+def make_scheduler_app(**config):
+    app = Flask(__name__)
+    app.config.update(config)
+    init_rate_limiting(app)
+    init_llm_scheduler(app)
+    return app
+
+
+@pytest.fixture
+def scheduler_env(monkeypatch):
+    for name in ("LLM_MAX_QUEUE", "LLM_MAX_IN_FLIGHT", "RATELIMIT_STORAGE_URL"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("GUNICORN_THREADS", "4")
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    monkeypatch.setenv("OLLAMA_NUM_PARALLEL", "2")
+
+
+def test_default_queue_leaves_a_thread_free(scheduler_env):
+    app = make_scheduler_app()
+
+    assert app.config["LLM_MAX_IN_FLIGHT"] + app.config["LLM_MAX_QUEUE"] == 3
+
+
+def test_workers_split_the_model_server_without_shared_storage(scheduler_env):
+    app = make_scheduler_app()
+
+    assert app.config["LLM_MAX_IN_FLIGHT"] == 1
+
+
+def test_workers_share_every_slot_with_shared_storage(scheduler_env, tmp_path):
+    app = make_scheduler_app(RATELIMIT_STORAGE_URL=f"sqlite:///{tmp_path / 'limits.db'}")
+
+    assert app.config["LLM_MAX_IN_FLIGHT"] == 2
+    assert app.extensions["llm_scheduler"].slot_limit == 2
@@ -0,0 +1,41 @@
+from factories import make_dish
+
+
+def test_menu_lists_dishes(client):
+    dish = make_dish(name="Green curry", price=11.5, is_vip_only=True)
+
+    resp = client.get("/api/menu/")
+
+    assert resp.status_code == 200
+    [listed] = resp.get_json()["dishes"]
+    assert listed["id"] == dish.id
+    assert listed["price"] == 11.5
+    assert listed["is_vip_only"] is True
+
+
+def test_menu_revalidates_with_etag(client):
+    make_dish()
+
+    etag = client.get("/api/menu/").headers["ETag"]
+    resp = client.get("/api/menu/", headers={"If-None-Match": etag})
+
+    assert resp.status_code == 304
+
+
+def test_create_dish(client):
+    resp = client.post(
+        "/api/menu/",
+        json={"name": "Pad thai", "description": "rice noodles", "price": "9.5"},
+    )
+
+    assert resp.status_code == 201
+    assert resp.get_json()["dish"]["price"] == 9.5
+
+
+def test_create_dish_validates_price(client):
+    resp = client.post(
+        "/api/menu/",
+        json={"name": "Pad thai", "description": "rice noodles", "price": "cheap"},
+    )
+
+    assert resp.status_code == 400
@@ -0,0 +1,102 @@
+from factories import make_dish, make_order, make_user
+from models import Order
+
+
+def place(client, user, items, **kwargs):
+    return client.post(
+        "/api/orders/",
+        json={
+            "user_id": user.id,
+            "items": [{"dish_id": dish.id, "quantity": qty} for dish, qty in items],
+        },
+        **kwargs,
+    )
+
+
+def test_order_charges_the_wallet(client):
+    user = make_user(balance=50)
+    dish = make_dish(price=12.0)
+
+    resp = place(client, user, [(dish, 2)])
+
+    assert resp.status_code == 201
+    body = resp.get_json()
+    assert body["order"]["total"] == 24.0
+    assert body["order"]["status"] == "paid"
+    assert body["user_balance"] == 26.0
+
+
+def test_order_needs_enough_balance(client):
+    user = make_user(balance=5)
+    dish = make_dish(price=12.0)
+
+    resp = place(client, user, [(dish, 1)])
+
+    assert resp.status_code == 400
+    assert resp.get_json()["error"] == "Insufficient balance"
+    assert Order.query.count() == 0
+
+
+def test_customers_cannot_order_vip_only_dishes(client):
+    user = make_user(balance=50)
+    dish = make_dish(is_vip_only=True)
+
+    resp = place(client, user, [(dish, 1)])
+
+    assert resp.status_code == 403
+    assert resp.get_json()["vip_only_dish_ids"] == [dish.id]
+
+
+def test_vips_can_order_vip_only_dishes(client):
+    user = make_user(role="vip", balance=50)
+    dish = make_dish(is_vip_only=True)
+
+    assert place(client, user, [(dish, 1)]).status_code == 201
+
+
+def test_unknown_dishes_are_rejected(client):
+    user = make_user(balance=50)
+
+    resp = client.post(
+        "/api/orders/", json={"user_id": user.id, "items": [{"dish_id": 999, "quantity": 1}]}
+    )
+
+    assert resp.status_code == 400
+
+
+def test_retry_with_the_same_idempotency_key_places_one_order(client):
+    user = make_user(balance=50)
+    dish = make_dish(price=10.0)
+    headers = {"Idempotency-Key": "checkout-1"}
+
+    first = place(client, user, [(dish, 1)], headers=headers)
+    retry = place(client, user, [(dish, 1)], headers=headers)
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert Order.query.filter_by(customer_id=user.id).count() == 1
+
+
+def test_reusing_a_key_for_a_different_cart_is_rejected(client):
+    user = make_user(balance=50)
+    dish = make_dish(price=10.0)
+    headers = {"Idempotency-Key": "checkout-2"}
+
+    place(client, user, [(dish, 1)], headers=headers)
+    resp = place(client, user, [(dish, 2)], headers=headers)
+
+    assert resp.status_code == 422
+
+
+def test_list_orders_for_user(client):
+    user = make_user()
+    dish = make_dish(price=8.0)
+    order = make_order(user, [(dish, 3)], status="delivered")
+
+    resp = client.get(f"/api/orders/user/{user.id}")
+
+    assert resp.status_code == 200
+    [listed] = resp.get_json()["orders"]
+    assert listed["id"] == order.id
+    assert listed["total_price"] == 24.0
+    assert listed["items"] == [{"dish_id": dish.id, "quantity": 3, "unit_price": 8.0}]
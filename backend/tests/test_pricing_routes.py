@@ -0,0 +1,108 @@
+import pytest
+
+from factories import make_dish, make_user
+
+
+def create_rule(client, **rule):
+    return client.post("/api/admin/pricing-rules/", json=rule)
+
+
+def test_dish_promo_is_applied_to_orders(client):
+    user = make_user(balance=100)
+    dish = make_dish(price=20.0)
+    create_rule(client, name="Curry week", kind="dish_promo", dish_id=dish.id, percent_off=25)
+
+    resp = client.post(
+        "/api/orders/", json={"user_id": user.id, "items": [{"dish_id": dish.id, "quantity": 2}]}
+    )
+
+    assert resp.status_code == 201
+    order = resp.get_json()["order"]
+    assert order["total"] == 30.0
+    assert [a["name"] for a in order["adjustments"]] == ["Curry week"]
+
+
+def test_quote_uses_the_time_window(client):
+    user = make_user()
+    dish = make_dish(price=10.0)
+    create_rule(
+        client,
+        name="Happy hour",
+        kind="time_of_day",
+        percent_off=20,
+        start_time="15:00",
+        end_time="17:00",
+    )
+
+    def quote(at):
+        return client.post(
+            "/api/admin/pricing-rules/quote",
+            json={"user_id": user.id, "items": [{"dish_id": dish.id, "quantity": 1}], "at": at},
+        ).get_json()
+
+    assert quote("2025-06-06T16:00:00")["total"] == 8.0
+    assert quote("2025-06-06T18:00:00")["total"] == 10.0
+
+
+def test_bundle_needs_two_dishes(client):
+    dish = make_dish()
+
+    resp = create_rule(client, name="Combo", kind="bundle", bundle_dish_ids=[dish.id], percent_off=10)
+
+    assert resp.status_code == 400
+
+
+def test_rules_can_be_disabled(client):
+    user = make_user()
+    dish = make_dish(price=10.0)
+    rule = create_rule(
+        client, name="Promo", kind="dish_promo", dish_id=dish.id, amount_off=2
+    ).get_json()["rule"]
+
+    client.patch(f"/api/admin/pricing-rules/{rule['id']}", json={"is_active": False})
+    resp = client.post(
+        "/api/admin/pricing-rules/quote",
+        json={"user_id": user.id, "items": [{"dish_id": dish.id, "quantity": 1}]},
+    )
+
+    assert resp.get_json()["total"] == 10.0
+
+
+def test_times_with_an_offset_are_converted_to_utc(client):
+    user = make_user()
+    dish = make_dish(price=10.0)
+    rule = create_rule(
+        client,
+        name="New year",
+        kind="dish_promo",
+        dish_id=dish.id,
+        amount_off=1,
+        valid_from="2025-01-01T00:00:00+02:00",
+        valid_until="2025-01-02T00:00:00+02:00",
+    ).get_json()["rule"]
+
+    def quote(at):
+        resp = client.post(
+            "/api/admin/pricing-rules/quote",
+            json={"user_id": user.id, "items": [{"dish_id": dish.id, "quantity": 1}], "at": at},
+        )
+        assert resp.status_code == 200
+        return resp.get_json()["total"]
+
+    assert rule["valid_from"] == "2024-12-31T22:00:00"
+    assert quote("2025-01-01T10:00:00Z") == 9.0
+    assert quote("2024-12-31T23:00:00+02:00") == 10.0
+
+
+@pytest.mark.parametrize("quantity", [0, -2])
+def test_quote_rejects_quantities_checkout_would_refuse(client, quantity):
+    user = make_user()
+    dish = make_dish()
+
+    resp = client.post(
+        "/api/admin/pricing-rules/quote",
+        json={"user_id": user.id, "items": [{"dish_id": dish.id, "quantity": quantity}]},
+    )
+
+    assert resp.status_code == 400
+    assert resp.get_json()["error"] == "quantity must be >= 1"
@@ -0,0 +1,45 @@
+import pytest
+
+from ratelimit import SWEEP_INTERVAL, MemoryStorage, SQLiteStorage
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def storage(request, tmp_path):
+    if request.param == "memory":
+        return MemoryStorage()
+    return SQLiteStorage(str(tmp_path / "buckets.db"))
+
+
+def bucket_count(storage):
+    if isinstance(storage, MemoryStorage):
+        return len(storage._buckets)
+    return storage._connect().execute("SELECT count(*) FROM rate_bucket").fetchone()[0]
+
+
+def test_limits_and_refills(storage):
+    # 2 requests per 10 s
+    assert storage.take("ip:1", rate=0.2, capacity=2, now=1000.0) == 0
+    assert storage.take("ip:1", rate=0.2, capacity=2, now=1000.0) == 0
+    assert storage.take("ip:1", rate=0.2, capacity=2, now=1000.0) == pytest.approx(5.0)
+    assert storage.take("ip:1", rate=0.2, capacity=2, now=1005.0) == 0
+
+
+def test_idle_buckets_are_dropped(storage):
+    start = storage._swept
+    for user_id in range(100):
+        storage.take(f"user:{user_id}", rate=0.1, capacity=6, now=start + 1)
+
+    # Every bucket has refilled by now; the next sweep drops them all
+    storage.take("ip:1", rate=0.1, capacity=6, now=start + SWEEP_INTERVAL + 61)
+
+    assert bucket_count(storage) == 1
+
+
+def test_buckets_still_refilling_are_kept(storage):
+    start = storage._swept
+    # Needs 600 s to refill
+    storage.take("user:1", rate=0.01, capacity=6, now=start + 1)
+
+    storage.take("ip:1", rate=0.1, capacity=6, now=start + SWEEP_INTERVAL + 61)
+
+    assert bucket_count(storage) == 2
@@ -0,0 +1,59 @@
+import pytest
+
+from factories import make_user
+
+
+def test_deposit_adds_to_the_balance(client):
+    user = make_user(balance=10)
+
+    resp = client.post("/api/wallet/deposit", json={"user_id": user.id, "amount": 15.25})
+
+    assert resp.status_code == 200
+    assert resp.get_json()["user"]["deposit_balance"] == 25.25
+
+
+@pytest.mark.parametrize("amount", [0, -5, "lots"])
+def test_deposit_rejects_bad_amounts(client, amount):
+    user = make_user()
+
+    resp = client.post("/api/wallet/deposit", json={"user_id": user.id, "amount": amount})
+
+    assert resp.status_code == 400
+
+
+def test_deposit_is_blocked_for_blacklisted_users(client):
+    user = make_user(is_blacklisted=True)
+
+    resp = client.post("/api/wallet/deposit", json={"user_id": user.id, "amount": 5})
+
+    assert resp.status_code == 403
+
+
+def test_deposit_retry_with_the_same_idempotency_key_is_replayed(client):
+    user = make_user()
+    headers = {"Idempotency-Key": "deposit-1"}
+
+    first = client.post(
+        "/api/wallet/deposit", json={"user_id": user.id, "amount": 5}, headers=headers
+    )
+    retry = client.post(
+        "/api/wallet/deposit", json={"user_id": user.id, "amount": 5}, headers=headers
+    )
+
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.get_json() == first.get_json()
+    assert client.get(f"/api/wallet/{user.id}/transactions").get_json()["balance"] == 5.0
+
+
+def test_transactions_are_paged_newest_first(client):
+    user = make_user()
+    for amount in (1, 2, 3):
+        client.post("/api/wallet/deposit", json={"user_id": user.id, "amount": amount})
+
+    page = client.get(f"/api/wallet/{user.id}/transactions?limit=2").get_json()
+    older = client.get(
+        f"/api/wallet/{user.id}/transactions?before_id={page['transactions'][-1]['id']}"
+    ).get_json()
+
+    assert [t["amount"] for t in page["transactions"]] == [3.0, 2.0]
+    assert [t["amount"] for t in older["transactions"]] == [1.0]
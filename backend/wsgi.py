@@ -0,0 +1,29 @@
+"""
+WSGI entry point for production servers.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Run `flask --app app db upgrade` as a deploy step first. On startup we only
+check the schema version (one query, no DDL) and refuse to serve a database
+that is behind the code.
+
+SCHEMA_STARTUP=upgrade applies pending migrations instead (single-instance
+setups); SCHEMA_STARTUP=skip disables the check.
+"""
+
+import os
+
+import migrations
+from app import create_app
+from extensions import db
+
+app = create_app()
+
+with app.app_context():
+    mode = os.environ.get("SCHEMA_STARTUP", "verify")
+    if mode == "upgrade":
+        migrations.upgrade(db.engine)
+    elif mode == "verify":
+        migrations.verify(db.engine)
+    # Don't hand this process's connections to forked workers
+    db.engine.dispose()
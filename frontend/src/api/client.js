@@ -4,4 +4,47 @@ const api = axios.create({
   baseURL: "http://127.0.0.1:5000/api",
 });
 
+// Retries for POSTs that carry an Idempotency-Key. The backend answers a
+// repeated key with the original response, so a retry after a timeout can
+// never place a second order or credit a deposit twice.
+const MAX_RETRIES = 2;
+// Only keyed POSTs time out: they are safe to retry. Other calls (e.g. the
+// LLM assistant) may legitimately take minutes.
+const IDEMPOTENT_TIMEOUT_MS = 15000;
+
+function isRetryable(err) {
+  if (!err.config || !err.config.headers["Idempotency-Key"]) return false;
+  if (!err.response) return true; // timeout / network error
+  return err.response.status === 409 || err.response.status >= 500;
+}
+
+api.interceptors.response.use(undefined, async (err) => {
+  const config = err.config;
+  if (!isRetryable(err)) throw err;
+
+  config.retryCount = (config.retryCount || 0) + 1;
+  if (config.retryCount > MAX_RETRIES) throw err;
+
+  const retryAfter = Number(err.response?.headers["retry-after"]) || 0;
+  const delayMs = Math.max(retryAfter * 1000, 500 * 2 ** (config.retryCount - 1));
+  await new Promise((resolve) => setTimeout(resolve, delayMs));
+  return api(config);
+});
+
+export function newIdempotencyKey() {
+  if (window.crypto && window.crypto.randomUUID) {
+    return window.crypto.randomUUID();
+  }
+  return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+}
+
+// POST with an Idempotency-Key. Pass the same key again to retry a
+// submission that may already have gone through.
+export function postIdempotent(url, data, key = newIdempotencyKey()) {
+  return api.post(url, data, {
+    headers: { "Idempotency-Key": key },
+    timeout: IDEMPOTENT_TIMEOUT_MS,
+  });
+}
+
 export default api;
@@ -137,6 +137,7 @@ function AdminPage() {
     "pending",
     "paid",
     "preparing",
+    "ready",
     "on_the_way",
     "delivered",
     "cancelled",
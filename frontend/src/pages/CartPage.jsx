@@ -1,5 +1,5 @@
-import { useEffect, useState } from "react";
-import api from "../api/client";
+import { useEffect, useRef, useState } from "react";
+import { newIdempotencyKey, postIdempotent } from "../api/client";
 import { getCurrentUser } from "../auth/user";
 import { Link, useNavigate } from "react-router-dom";
 
@@ -8,6 +8,9 @@ function CartPage({ cartItems, removeFromCart, clearCart }) {
   const [error, setError] = useState("");
   const [placing, setPlacing] = useState(false);
   const [lastOrderResult, setLastOrderResult] = useState(null);
+  // One key per checkout attempt: clicking again after a failure that may
+  // have gone through (timeout) reuses it, so the order is placed only once
+  const orderKey = useRef(null);
 
   const navigate = useNavigate();
 
@@ -40,13 +43,20 @@ function CartPage({ cartItems, removeFromCart, clearCart }) {
       quantity: item.quantity,
     }));
 
+    const payload = {
+      user_id: currentUser.id,
+      items: itemsPayload,
+    };
+    const payloadJson = JSON.stringify(payload);
+    if (!orderKey.current || orderKey.current.payload !== payloadJson) {
+      orderKey.current = { key: newIdempotencyKey(), payload: payloadJson };
+    }
+
     setPlacing(true);
     try {
-      const res = await api.post("/orders/", {
-        user_id: currentUser.id,
-        items: itemsPayload,
-      });
+      const res = await postIdempotent("/orders/", payload, orderKey.current.key);
 
+      orderKey.current = null;
       setLastOrderResult(res.data);
       clearCart();
       alert("Order placed successfully!");
@@ -54,6 +64,11 @@ function CartPage({ cartItems, removeFromCart, clearCart }) {
       // navigate("/my-orders");
     } catch (err) {
       console.error(err);
+      // The server gave a definite answer (e.g. insufficient balance): the
+      // next click is a new attempt and needs a new key
+      if (err.response && err.response.status < 500 && err.response.status !== 409) {
+        orderKey.current = null;
+      }
       if (err.response && err.response.data) {
         setError(
           err.response.data.error ||
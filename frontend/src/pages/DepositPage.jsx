@@ -1,5 +1,5 @@
 import { useEffect, useState } from "react";
-import api from "../api/client";
+import { postIdempotent } from "../api/client";
 import { getCurrentUser } from "../auth/user";
 import { Link } from "react-router-dom";
 
@@ -36,7 +36,7 @@ function DepositPage() {
     }
 
     try {
-      const res = await api.post("/wallet/deposit", {
+      const res = await postIdempotent("/wallet/deposit", {
         user_id: uid,
         amount: amt,
       });